@@ -1,33 +1,66 @@
-from src.rag.models import RFPRequest, RFPResponse
+from src.rag.models import RFPRequest, RFPResponse, ReasoningJobResponse
 from src.indexing.model import IngestResponse
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+from typing import Optional
+from src.common import config
+from src.common.utils import format_sse_event
 import uvicorn
 import logging
 from src.eval.models import RFPResponseSchema
 
-app = FastAPI(title="RFP RAG API")
 logger = logging.getLogger("uvicorn.error")
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Compile the RAG graph and open the embedding client and vector store once
+    per process instead of once per request.
+    """
+    from src.rag.graph import build_graph
+    from src.rag.rag_executor import rfp_rag
+
+    app.state.graph = build_graph()
+    try:
+        rfp_rag.load_retrieval_stack()
+    except FileNotFoundError as e:
+        # No index yet, it is opened lazily after the first ingestion
+        logger.warning(f"Retrieval stack not loaded at startup: {e}")
+    yield
+
+    from src.rag.reasoning_jobs import reasoning_jobs
+
+    reasoning_jobs.shutdown()
+    await rfp_rag.aclose()
+
+
+app = FastAPI(title="RFP RAG API", lifespan=lifespan)
+
+
 @app.post("/query", response_model=RFPResponse)
-def query_rfp(request: RFPRequest):
+async def query_rfp(request: RFPRequest, http_request: Request):
     """
     Endpoint to query the LangGraph RAG graph.
     Returns structured output including answer, reasoning, and extracted requirements.
     """
     try:
-        from src.rag.graph import build_graph
-
-        # Initialize the RAG graph
-        graph = build_graph()
+        # Graph is compiled once in the application lifespan
+        graph = http_request.app.state.graph
+        graph_input = {
+            "user_query": request.user_query,
+            "metadata": request.metadata.model_dump(),
+            "reasoning_mode": request.reasoning_mode,
+        }
 
         # Invoke the graph
-        response = graph.invoke(
-            {
-                "user_query": request.user_query,
-                "metadata": request.metadata.model_dump(),
-            }
-        )
+        if config.ASYNC_QUERY_MODE:
+            response = await graph.ainvoke(graph_input)
+        else:
+            response = await run_in_threadpool(graph.invoke, graph_input)
         if not response:
             raise HTTPException(status_code=400, detail="Failed to process query")
 
@@ -37,6 +70,8 @@ def query_rfp(request: RFPRequest):
             answer=response.get("answer", ""),
             reasoning=response.get("reasoning", ""),
             extracted_requirements=response.get("extracted_requirements", []),
+            reasoning_job_id=response.get("reasoning_job_id"),
+            context_stats=response.get("context_stats"),
         )
         return output
 
@@ -45,26 +80,100 @@ def query_rfp(request: RFPRequest):
         raise HTTPException(status_code=400, detail="Failed to process query")
 
 
+@app.post("/query/stream")
+async def query_rfp_stream(request: RFPRequest):
+    """
+    Streaming variant of `/query` as server-sent events: `extracted_requirements`
+    and `context_stats` once retrieval finishes, `answer` events with tokens as
+    the LLM produces them, then `reasoning` or `reasoning_job_id` depending on
+    `reasoning_mode`, and `done`. Failures emit an `error` event.
+    """
+    from src.rag.graph import astream_query
+
+    async def event_stream():
+        try:
+            async for event, data in astream_query(
+                request.user_query,
+                request.metadata.model_dump(),
+                reasoning_mode=request.reasoning_mode,
+            ):
+                yield format_sse_event(event, jsonable_encoder(data))
+        except Exception as e:
+            logger.error(f"Streaming query failed: {e}", exc_info=True)
+            yield format_sse_event("error", {"detail": "Failed to process query"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@app.get("/reasoning/{job_id}", response_model=ReasoningJobResponse)
+def get_reasoning(job_id: str):
+    """
+    Status and result of a background retrieval-reasoning job started by a
+    `/query` request with `reasoning_mode="background"`.
+    """
+    from src.rag.reasoning_jobs import reasoning_jobs
+
+    job = reasoning_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id")
+    return ReasoningJobResponse(**job)
+
+
 @app.post("/ingest", response_model=IngestResponse)
-def ingest_pdfs():
+def ingest_pdfs(file_name: Optional[str] = None, full_rebuild: bool = False):
     """
     Trigger ingestion of PDFs into the vector database.
-    Returns the total number of chunks created.
+    Only new or changed PDFs are embedded and removed ones are deleted;
+    `file_name` re-ingests that RFP even if unchanged, `full_rebuild`
+    rebuilds everything. Returns the total number of chunks and the
+    added/updated/removed/skipped PDF counts.
     """
     try:
-        from src.indexing.ingest import ingest_data
+        from src.indexing.ingest import ingest_data, ingest_file
+        from src.rag.rag_executor import rfp_rag
 
-        total_chunks = ingest_data()
-        return IngestResponse(
-            message="Ingestion completed successfully.",
-            total_chunks=total_chunks,
-        )
+        if file_name:
+            counts = ingest_file(file_name)
+        else:
+            counts = ingest_data(full_rebuild=full_rebuild)
+        # queries are served from the previous indexes until this swap
+        rfp_rag.reload_retrieval_stack()
+        return IngestResponse(message="Ingestion completed successfully.", **counts)
 
     except Exception as e:
         logger.error(f"Ingestion failed: {e}", exc_info=True)
         raise HTTPException(status_code=400, detail="Failed to ingest PDFs")
 
 
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Hit-rate statistics of the answer cache and the query embedding cache.
+    """
+    from src.rag.rag_executor import rfp_rag
+
+    answer_cache = rfp_rag.answer_cache
+    embeddings = rfp_rag.vector_store.embeddings if rfp_rag.vector_store else None
+    return {
+        "answer_cache": answer_cache.stats() if answer_cache else None,
+        "embedding_cache": (
+            embeddings.stats() if hasattr(embeddings, "stats") else None
+        ),
+    }
+
+
+@app.post("/cache/invalidate")
+def cache_invalidate(file_name: Optional[str] = None):
+    """
+    Drop cached answers, all of them or only those that may come from `file_name`.
+    """
+    from src.rag.rag_executor import rfp_rag
+
+    if rfp_rag.answer_cache is None:
+        return {"dropped": 0}
+    return {"dropped": rfp_rag.answer_cache.invalidate(file_name)}
+
+
 @app.post("/eval_rfp")
 def eval_rfp(rag_response: RFPResponseSchema):
     """
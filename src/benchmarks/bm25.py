@@ -0,0 +1,90 @@
+"""
+Query latency of the persisted, memory-mapped BM25 index against rebuilding
+LangChain's BM25Retriever from all chunks on every call.
+
+Runs on a synthetic corpus, no API keys needed. The baseline needs `rank_bm25`.
+
+Usage:
+    python -m src.benchmarks.bm25 --chunks 20000 --queries 200
+"""
+
+from langchain_community.retrievers import BM25Retriever
+from langchain_core.documents import Document
+import statistics
+import argparse
+import tempfile
+import random
+import time
+import os
+
+from src.common.bm25_index import BM25Index
+
+VOCABULARY = [f"term{i}" for i in range(20_000)]
+
+
+def make_corpus(n_chunks: int, chunk_tokens: int, seed: int) -> list[Document]:
+    rng = random.Random(seed)
+    return [
+        Document(
+            page_content=" ".join(rng.choices(VOCABULARY, k=chunk_tokens)),
+            metadata={"file_name": f"RFP{i % 10}.pdf"},
+        )
+        for i in range(n_chunks)
+    ]
+
+
+def summarize(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(0.95 * (len(timings) - 1))]
+    print(
+        f"{label:<22} p50={statistics.median(timings) * 1000:9.3f} ms  "
+        f"p95={p95 * 1000:9.3f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=20_000)
+    parser.add_argument("--chunk-tokens", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rebuild-queries", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    documents = make_corpus(args.chunks, args.chunk_tokens, seed=0)
+    rng = random.Random(1)
+    queries = [" ".join(rng.choices(VOCABULARY, k=8)) for _ in range(args.queries)]
+    where = {"file_name": "RFP3.pdf"}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "bm25_index")
+        start = time.perf_counter()
+        BM25Index.build(
+            texts=[doc.page_content for doc in documents],
+            metadatas=[doc.metadata for doc in documents],
+            ids=[str(i) for i in range(len(documents))],
+        ).save(path)
+        print(f"chunks={args.chunks} build+save={time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        index = BM25Index.load(path)
+        print(f"load={(time.perf_counter() - start) * 1000:.1f} ms")
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            index.search(query, args.k, where)
+            timings.append(time.perf_counter() - start)
+        summarize("persisted index", timings)
+
+    timings = []
+    filtered = [doc for doc in documents if doc.metadata == where]
+    for query in queries[: args.rebuild_queries]:
+        start = time.perf_counter()
+        BM25Retriever.from_documents(filtered, k=args.k).invoke(query)
+        timings.append(time.perf_counter() - start)
+    summarize("rebuild per call", timings)
+
+
+if __name__ == "__main__":
+    main()
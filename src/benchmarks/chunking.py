@@ -0,0 +1,65 @@
+"""
+Wall-clock scaling of PDF parsing and chunking (`chunk_pdfs`) with the
+number of worker processes, on the PDFs of a directory. Checks that every
+worker count produces the same chunks in the same order. No API keys needed
+unless `EXTRACT_RFP_METADATA` is enabled.
+
+Usage:
+    python -m src.benchmarks.chunking --pdfs-dir data/ --workers 1,2,4,8
+    python -m src.benchmarks.chunking --pdfs-dir data/ --repeat 10
+"""
+
+import argparse
+import tempfile
+import shutil
+import time
+import os
+
+from src.indexing.ingest import chunk_pdfs, list_pdfs
+
+
+def corpus(pdfs_dir: str, repeat: int, tmp_dir: str) -> list[str]:
+    """PDF paths of `pdfs_dir`, copied `repeat` times under distinct names."""
+    paths = [os.path.join(pdfs_dir, file) for file in list_pdfs(pdfs_dir)]
+    if repeat <= 1:
+        return paths
+    copies = []
+    for i in range(repeat):
+        for path in paths:
+            copy = os.path.join(tmp_dir, f"{i:03d}_{os.path.basename(path)}")
+            shutil.copyfile(path, copy)
+            copies.append(copy)
+    return copies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pdfs-dir", default="data/")
+    parser.add_argument("--workers", default="1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = corpus(args.pdfs_dir, args.repeat, tmp_dir)
+        print(f"pdfs={len(paths)} cpus={os.cpu_count()}")
+        baseline, reference = None, None
+        for workers in map(int, args.workers.split(",")):
+            start = time.perf_counter()
+            chunks_by_file, failures = chunk_pdfs(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            output = [
+                (file_name, [chunk.page_content for chunk in chunks])
+                for file_name, chunks in chunks_by_file.items()
+            ]
+            reference = reference or output
+            n_chunks = sum(len(chunks) for chunks in chunks_by_file.values())
+            print(
+                f"workers={workers:<3} wall={elapsed:8.2f} s  "
+                f"speedup={baseline / elapsed:5.2f}x  chunks={n_chunks}  "
+                f"failed={len(failures)}  same_order={output == reference}"
+            )
+
+
+if __name__ == "__main__":
+    main()
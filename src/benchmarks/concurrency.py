@@ -0,0 +1,132 @@
+"""
+Concurrent /query throughput of the async graph path against the blocking one.
+
+A local stub server stands in for Gemini and Jina, each call sleeping for the
+configured latency, so the numbers show how many in-flight queries one worker
+can carry rather than the speed of the remote APIs. The blocking path runs on
+a thread pool of the same size as FastAPI's default threadpool.
+
+Usage:
+    python -m src.benchmarks.concurrency --requests 400 --concurrency 200
+"""
+
+from langchain_core.documents import Document
+from langchain_community.vectorstores import Chroma
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import argparse
+import tempfile
+import asyncio
+import time
+import os
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from src.benchmarks.stubs import StubServer, StubChatModel, create_stub_app
+from src.rag.embeddings import AsyncJinaEmbeddings
+from src.rag.rag_executor import rfp_rag
+from src.rag import graph as graph_module
+
+QUERIES = [
+    "What are the evaluation criteria?",
+    "When is the proposal submission deadline?",
+    "What insurance coverage is required from the contractor?",
+    "Describe the scope of work for inspections.",
+]
+
+
+def summarize(label: str, latencies: list[float], wall: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{label:<24} throughput={len(latencies) / wall:8.1f} q/s  "
+        f"p50={statistics.median(latencies) * 1000:8.1f} ms  "
+        f"p95={p95 * 1000:8.1f} ms  wall={wall:6.2f} s"
+    )
+
+
+def graph_input(i: int) -> dict:
+    return {"user_query": QUERIES[i % len(QUERIES)], "metadata": {"file_name": ""}}
+
+
+async def run_async(graph, n_requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> float:
+        async with semaphore:
+            start = time.perf_counter()
+            await graph.ainvoke(graph_input(i))
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(n_requests)))
+    return list(latencies), time.perf_counter() - start
+
+
+def run_sync(graph, n_requests: int, workers: int):
+    def one(i: int) -> float:
+        start = time.perf_counter()
+        graph.invoke(graph_input(i))
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        latencies = list(pool.map(one, range(n_requests)))
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--sync-workers", type=int, default=40)
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--dim", type=int, default=256)
+    args = parser.parse_args()
+
+    app = create_stub_app(
+        llm_latency=args.llm_latency,
+        embedding_latency=args.embedding_latency,
+        embedding_dim=args.dim,
+    )
+    with StubServer(app) as server, tempfile.TemporaryDirectory() as persist_dir:
+        embeddings = AsyncJinaEmbeddings(
+            model_name="stub",
+            jina_api_key="stub",
+            api_url=f"{server.url}/v1/embeddings",
+        )
+        documents = [
+            Document(
+                page_content=f"{QUERIES[i % len(QUERIES)]} section {i} of RFP{i % 5}",
+                metadata={"file_name": f"RFP{i % 5}.pdf"},
+            )
+            for i in range(200)
+        ]
+        vector_store = Chroma.from_documents(
+            documents=documents,
+            embedding=embeddings,
+            persist_directory=persist_dir,
+        )
+
+        # route every LLM and embedding call to the stub server
+        stub_llm = StubChatModel(base_url=server.url)
+        graph_module.llm = stub_llm
+        rfp_rag.generator.llm = stub_llm
+        rfp_rag.vector_store = vector_store
+        graph = graph_module.build_graph()
+
+        print(
+            f"requests={args.requests} llm_latency={args.llm_latency}s "
+            f"embedding_latency={args.embedding_latency}s"
+        )
+        latencies, wall = run_sync(graph, args.requests, args.sync_workers)
+        summarize(f"sync ({args.sync_workers} threads)", latencies, wall)
+        latencies, wall = asyncio.run(
+            run_async(graph, args.requests, args.concurrency)
+        )
+        summarize(f"async ({args.concurrency} tasks)", latencies, wall)
+
+
+if __name__ == "__main__":
+    main()
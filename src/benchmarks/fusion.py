@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the fusion stage for 100-1000 candidates: the weighted
+RRF against a minimal unweighted one, NumPy weighted score fusion, and
+batched MMR against LangChain's per-step `maximal_marginal_relevance`.
+
+Synthetic candidates and embeddings, no API keys needed.
+
+Usage:
+    python -m src.benchmarks.fusion --sizes 100 250 500 1000
+"""
+
+from langchain_community.vectorstores.utils import (
+    maximal_marginal_relevance as langchain_mmr,
+)
+from langchain_core.documents import Document
+import numpy as np
+import statistics
+import argparse
+import random
+import time
+
+from src.rag.fusion import (
+    reciprocal_rank_fusion,
+    weighted_score_fusion,
+    maximal_marginal_relevance,
+)
+
+
+def python_rrf(result_lists: list[list[Document]], c: int = 60) -> list[Document]:
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for results in result_lists:
+        for rank, doc in enumerate(results, start=1):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1 / (c + rank)
+            docs.setdefault(doc.id, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def make_lists(n_candidates: int, n_lists: int, seed: int):
+    """`n_lists` overlapping ranked lists drawn from `n_candidates` chunks."""
+    rng = random.Random(seed)
+    pool = [Document(id=str(i), page_content=f"chunk {i}") for i in range(n_candidates)]
+    per_list = max(1, n_candidates * 2 // n_lists)
+    result_lists = [
+        rng.sample(pool, min(per_list, n_candidates)) for _ in range(n_lists)
+    ]
+    score_lists = [
+        sorted((rng.random() for _ in results), reverse=True)
+        for results in result_lists
+    ]
+    return result_lists, score_lists
+
+
+def timed(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--lists", type=int, default=4)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--mmr-k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"lists={args.lists} dim={args.dim} mmr_k={args.mmr_k} (median ms)")
+    print(
+        f"{'candidates':>10} {'rrf':>8} {'py_rrf':>8} {'weighted':>8} "
+        f"{'mmr':>8} {'lc_mmr':>8}"
+    )
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        result_lists, score_lists = make_lists(size, args.lists, seed=size)
+        query = rng.standard_normal(args.dim).astype(np.float32)
+        embeddings = rng.standard_normal((size, args.dim)).astype(np.float32)
+
+        rrf_ms = timed(lambda: reciprocal_rank_fusion(result_lists), args.repeat)
+        py_rrf_ms = timed(lambda: python_rrf(result_lists), args.repeat)
+        weighted_ms = timed(
+            lambda: weighted_score_fusion(result_lists, score_lists), args.repeat
+        )
+        mmr_ms = timed(
+            lambda: maximal_marginal_relevance(query, embeddings, k=args.mmr_k),
+            args.repeat,
+        )
+        lc_mmr_ms = timed(
+            lambda: langchain_mmr(query, embeddings, k=args.mmr_k), args.repeat
+        )
+        print(
+            f"{size:>10} {rrf_ms:8.3f} {py_rrf_ms:8.3f} {weighted_ms:8.3f} "
+            f"{mmr_ms:8.3f} {lc_mmr_ms:8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Cold versus warm parse-and-chunk time of the PDFs of a directory with the
+parsed-markdown cache: the cold run parses every PDF with pymupdf4llm and
+fills an empty cache, warm runs read the markdown back from it. Checks that
+both produce the same chunks and reports the cache size on disk. Embedding
+is left out, it does not depend on the cache. No API keys needed unless
+`EXTRACT_RFP_METADATA` is enabled.
+
+Usage:
+    python -m src.benchmarks.markdown_cache --pdfs-dir data/ --warm-runs 3
+    python -m src.benchmarks.markdown_cache --pdfs-dir data/ --workers 4
+"""
+
+import argparse
+import tempfile
+import time
+import os
+
+from src.indexing import configs
+from src.indexing.ingest import chunk_pdfs, list_pdfs
+
+
+def run(paths: list[str], workers: int) -> tuple[float, list]:
+    start = time.perf_counter()
+    chunks_by_file, _ = chunk_pdfs(paths, workers=workers)
+    elapsed = time.perf_counter() - start
+    output = [
+        (file_name, [chunk.page_content for chunk in chunks])
+        for file_name, chunks in chunks_by_file.items()
+    ]
+    return elapsed, output
+
+
+def directory_size(path: str) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pdfs-dir", default="data/")
+    parser.add_argument("--warm-runs", type=int, default=3)
+    # worker processes see the temporary cache directory when forked
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    paths = [os.path.join(args.pdfs_dir, file) for file in list_pdfs(args.pdfs_dir)]
+    pdf_mb = sum(os.path.getsize(path) for path in paths) / 2**20
+    with tempfile.TemporaryDirectory() as cache_dir:
+        configs.MARKDOWN_CACHE_ENABLED = True
+        configs.MARKDOWN_CACHE_DIRECTORY = cache_dir
+        print(f"pdfs={len(paths)} size={pdf_mb:.1f} MB workers={args.workers}")
+
+        cold, reference = run(paths, args.workers)
+        cache_mb = directory_size(cache_dir) / 2**20
+        print(f"cold    wall={cold:8.2f} s  cache={cache_mb:.2f} MB")
+        for i in range(args.warm_runs):
+            warm, output = run(paths, args.workers)
+            print(
+                f"warm {i + 1:<2} wall={warm:8.2f} s  speedup={cold / warm:6.1f}x  "
+                f"same_chunks={output == reference}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Recall@k, search latency and first-pass size of the flat index for each
+quantization mode (int8, binary, Matryoshka prefix), with and without exact
+rescoring of the shortlist, against the exact float32 scan.
+
+Chunk vectors are drawn around random topic centers and queries are noisy
+copies of chunks, as in `src.benchmarks.vector_store`, with a variance that
+decays over the dimensions to mimic Matryoshka-trained embeddings. Synthetic
+data only approximates real embeddings; run it on an exported index
+(`--from-index flat_index`) for numbers on the actual corpus. No API keys
+needed.
+
+Usage:
+    python -m src.benchmarks.quantization --chunks 30000 --queries 200
+    python -m src.benchmarks.quantization --from-index flat_index --queries 200
+"""
+
+import numpy as np
+import statistics
+import argparse
+import tempfile
+import time
+import os
+
+from src.common.flat_index import FlatIndex, normalize_rows
+
+
+def make_vectors(n_chunks: int, dim: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n_chunks // 50), dim)).astype(np.float32)
+    topics = rng.integers(0, len(centers), n_chunks)
+    # variance decaying with the dimension index, like Matryoshka embeddings
+    spectrum = 1 / np.sqrt(1 + np.arange(dim) / 32)
+    return normalize_rows(
+        (centers[topics] + 0.6 * rng.standard_normal((n_chunks, dim))) * spectrum
+    )
+
+
+def measure(index: FlatIndex, queries, k: int, rescore_factor: int, truth):
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = index.search(query, k, rescore_factor=rescore_factor)[0]
+        latencies.append(time.perf_counter() - start)
+        hits += len({position for position, _ in result} & expected)
+    return latencies, hits / (k * len(queries))
+
+
+def report(label: str, size_mb: float, latencies: list[float], recall: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{label:<28} scan={size_mb:8.1f} MB  "
+        f"p50={statistics.median(latencies) * 1000:7.2f} ms  "
+        f"p95={p95 * 1000:7.2f} ms  recall={recall:.4f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=30_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument(
+        "--rescore-factors",
+        default="1,2,16,128,1024",
+        help="comma-separated shortlist sizes, as multiples of k",
+    )
+    parser.add_argument("--matryoshka-dim", type=int, default=256)
+    parser.add_argument(
+        "--from-index", help="use the embeddings of an existing flat index"
+    )
+    args = parser.parse_args()
+
+    if args.from_index:
+        vectors = normalize_rows(FlatIndex.load(args.from_index).embeddings)
+    else:
+        vectors = make_vectors(args.chunks, args.dim, seed=0)
+    n_chunks, dim = vectors.shape
+    rng = np.random.default_rng(1)
+    picked = rng.integers(0, n_chunks, args.queries)
+    queries = normalize_rows(
+        vectors[picked] + 0.3 * rng.standard_normal((args.queries, dim))
+    )
+    exact = np.argsort(-(queries @ vectors.T), axis=1)[:, : args.k]
+    truth = [set(query_top.tolist()) for query_top in exact]
+
+    ids = [str(i) for i in range(n_chunks)]
+    texts = [""] * n_chunks
+    metadatas = [{}] * n_chunks
+    print(f"chunks={n_chunks} dim={dim} k={args.k}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for quantization in (None, "int8", "binary", "matryoshka"):
+            path = os.path.join(tmp_dir, quantization or "float32")
+            FlatIndex.build(
+                ids,
+                texts,
+                metadatas,
+                vectors,
+                quantization=quantization,
+                matryoshka_dim=args.matryoshka_dim,
+            ).save(path)
+            index = FlatIndex.load(path)
+            scanned = index.quantized or index.embeddings
+            size_mb = scanned.nbytes / 2**20
+            if quantization is None:
+                latencies, recall = measure(index, queries, args.k, 1, truth)
+                report("float32 exact", size_mb, latencies, recall)
+                continue
+            label = quantization
+            if quantization == "matryoshka":
+                label = f"matryoshka-{args.matryoshka_dim}"
+            for factor in map(int, args.rescore_factors.split(",")):
+                report(
+                    f"{label} rescore x{factor}",
+                    size_mb,
+                    *measure(index, queries, args.k, factor, truth),
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Offline accuracy and latency of the local router against the prompt-based
+Gemini router, using recorded router decisions.
+
+`src/benchmarks/data/router_decisions.jsonl` holds one `{"query", "decision"}`
+record per line, where `decision` is the "1"/"0" output of the prompt router.
+Records may also carry `latency_ms` of the Gemini call. Run with `--record` to
+refresh the file from the live prompt router (needs GOOGLE_API_KEY).
+
+Usage:
+    python -m src.benchmarks.router
+    python -m src.benchmarks.router --record
+"""
+
+from langchain_core.messages import HumanMessage
+import statistics
+import argparse
+import json
+import time
+
+from src.common import config
+from src.rag.local_router import build_local_router
+
+DECISIONS_PATH = "src/benchmarks/data/router_decisions.jsonl"
+
+
+def load_decisions(path: str) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def record_decisions(path: str):
+    """Re-run the prompt router on every recorded query and store its output."""
+    from src.rag.graph import llm, parse_router_response
+
+    records = load_decisions(path)
+    for record in records:
+        message = config.ROUTER_PROMPT.format(user_query=record["query"])
+        start = time.perf_counter()
+        response = llm.invoke([HumanMessage(content=message)])
+        record["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        route = parse_router_response(response)
+        record["decision"] = "1" if route == "rag_search" else "0"
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    print(f"Recorded {len(records)} prompt-router decisions to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--decisions", default=DECISIONS_PATH)
+    parser.add_argument("--record", action="store_true")
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    if args.record:
+        record_decisions(args.decisions)
+
+    records = load_decisions(args.decisions)
+    start = time.perf_counter()
+    router = build_local_router()
+    train_ms = (time.perf_counter() - start) * 1000
+
+    low, high = config.ROUTER_UNCERTAINTY_BAND
+    local_correct, hybrid_correct, fallbacks, brier = 0, 0, 0, 0.0
+    latencies = []
+    for record in records:
+        label = int(record["decision"])
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            score = router.score(record["query"])
+            latencies.append(time.perf_counter() - start)
+
+        brier += (score - label) ** 2
+        local_correct += int(score >= 0.5) == label
+        if low < score < high:
+            # inside the band the prompt router decides, which matches the record
+            fallbacks += 1
+            hybrid_correct += 1
+        else:
+            hybrid_correct += int(score >= high) == label
+
+    n = len(records)
+    latencies.sort()
+    print(f"records={n} training={train_ms:.1f} ms band=({low}, {high})")
+    print(f"local accuracy      {local_correct / n:7.2%}")
+    print(f"hybrid accuracy     {hybrid_correct / n:7.2%}")
+    print(f"LLM fallback rate   {fallbacks / n:7.2%}")
+    print(f"brier score         {brier / n:7.4f}")
+    print(
+        f"local latency       p50={statistics.median(latencies) * 1e6:.1f} us  "
+        f"p99={latencies[int(0.99 * (len(latencies) - 1))] * 1e6:.1f} us"
+    )
+
+    llm_latencies = [r["latency_ms"] for r in records if "latency_ms" in r]
+    if llm_latencies:
+        mean_llm = statistics.mean(llm_latencies)
+        print(
+            f"prompt router       mean={mean_llm:.1f} ms  "
+            f"p50={statistics.median(llm_latencies):.1f} ms"
+        )
+        print(f"hybrid expected     mean={mean_llm * fallbacks / n:.1f} ms per query")
+    else:
+        print("prompt router       no recorded latencies, run with --record")
+
+
+if __name__ == "__main__":
+    main()
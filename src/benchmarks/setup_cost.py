@@ -0,0 +1,105 @@
+"""
+Per-request setup cost of the /query path, before and after sharing the graph
+and the retrieval stack across requests.
+
+The benchmark builds a throw-away Chroma index with fake embeddings so that no
+API keys or network calls are needed, then measures only the setup work done
+before the LLM is called (graph compilation, embedding client, vector store and
+retriever creation).
+
+Usage:
+    python -m src.benchmarks.setup_cost --requests 50 --chunks 2000
+"""
+
+from langchain_core.embeddings import FakeEmbeddings
+from langchain_core.documents import Document
+from langchain_community.vectorstores import Chroma
+import statistics
+import argparse
+import tempfile
+import time
+import os
+
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+
+from src.common import config
+from src.rag import vector_stores
+from src.rag.graph import build_graph
+from src.rag.retriever import create_ensemble_retriever
+
+
+def build_fake_index(persist_dir: str, n_chunks: int, n_files: int, dim: int):
+    documents = [
+        Document(
+            page_content=f"chunk {i} of the benchmark corpus",
+            metadata={"file_name": f"RFP{i % n_files}.pdf"},
+        )
+        for i in range(n_chunks)
+    ]
+    Chroma.from_documents(
+        documents=documents,
+        embedding=FakeEmbeddings(size=dim),
+        persist_directory=persist_dir,
+    )
+
+
+def summarize(label: str, timings: list[float]):
+    timings = sorted(timings)
+    p95 = timings[int(0.95 * (len(timings) - 1))]
+    print(
+        f"{label:<28} p50={statistics.median(timings) * 1000:8.2f} ms  "
+        f"p95={p95 * 1000:8.2f} ms  mean={statistics.mean(timings) * 1000:8.2f} ms"
+    )
+
+
+def per_request_setup(metadata: dict) -> float:
+    """Old path: compile the graph and open embeddings + Chroma on every request."""
+    start = time.perf_counter()
+    build_graph()
+    create_ensemble_retriever(metadata)
+    return time.perf_counter() - start
+
+
+def shared_setup(graph, vector_store, metadata: dict) -> float:
+    """New path: the graph and store come from the lifespan, only the filter changes."""
+    start = time.perf_counter()
+    assert graph is not None
+    create_ensemble_retriever(metadata, vector_store=vector_store)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--dim", type=int, default=1024)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        build_fake_index(persist_dir, args.chunks, args.files, args.dim)
+        config.DB_PERSIST_DIRECTORY = persist_dir
+
+        # the benchmark must not reach the embedding API, a new client is
+        # created per call as the uncached factory did before
+        vector_stores.get_embeddings_obj = lambda: FakeEmbeddings(size=args.dim)
+
+        metadatas = [
+            {"file_name": f"RFP{i % args.files}.pdf"} for i in range(args.requests)
+        ]
+
+        before = [per_request_setup(m) for m in metadatas]
+
+        graph = build_graph()
+        vector_store = vector_stores.load_vector_store()
+        after = [shared_setup(graph, vector_store, m) for m in metadatas]
+
+    print(f"requests={args.requests} chunks={args.chunks} dim={args.dim}")
+    summarize("before (per request)", before)
+    summarize("after (shared stack)", after)
+    speedup = statistics.median(before) / max(statistics.median(after), 1e-9)
+    print(f"p50 setup speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Token usage and latency of the two-call generation (answer, then a separate
+retrieval-reasoning call that re-sends the context) against the single
+structured-output call used with GENERATION_MODE="structured".
+
+Runs against the live Gemini and Jina APIs and the ingested vector store, so
+GOOGLE_API_KEY and JINA_API_KEY must be set and /ingest must have run.
+
+Usage:
+    python -m src.benchmarks.structured_generation --file-name "RFP.pdf"
+"""
+
+from langchain_core.messages import HumanMessage
+import statistics
+import argparse
+import time
+
+from src.common import config
+from src.rag.models import RAGAnswerWithRelevance
+from src.rag.rag_executor import rfp_rag
+from src.rag.retriever import create_ensemble_retriever
+
+QUERIES = [
+    "What are the evaluation criteria?",
+    "When is the proposal submission deadline?",
+    "What insurance coverage is required from the contractor?",
+    "Describe the scope of work for inspections.",
+]
+
+
+def usage(message) -> tuple[int, int]:
+    metadata = getattr(message, "usage_metadata", None) or {}
+    return metadata.get("input_tokens", 0), metadata.get("output_tokens", 0)
+
+
+def run_two_call(llm, query: str, context: str) -> dict:
+    start = time.perf_counter()
+    answer = llm.invoke(
+        config.RAG_GENERATION_PROMPT.invoke({"context": context, "input": query})
+    )
+    reasoning = llm.invoke(
+        [
+            HumanMessage(
+                content=config.RETRIEVAL_REASON_PROMPT.format(
+                    user_query=query, retrieved_documents=context
+                )
+            )
+        ]
+    )
+    latency = time.perf_counter() - start
+    answer_in, answer_out = usage(answer)
+    reason_in, reason_out = usage(reasoning)
+    return {
+        "latency": latency,
+        "input_tokens": answer_in + reason_in,
+        "output_tokens": answer_out + reason_out,
+    }
+
+
+def run_structured(llm, query: str, context: str) -> dict:
+    structured_llm = llm.with_structured_output(
+        RAGAnswerWithRelevance, include_raw=True
+    )
+    start = time.perf_counter()
+    result = structured_llm.invoke(
+        config.RAG_STRUCTURED_PROMPT.invoke({"context": context, "input": query})
+    )
+    latency = time.perf_counter() - start
+    input_tokens, output_tokens = usage(result["raw"])
+    return {
+        "latency": latency,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "parsed": result["parsed"] is not None,
+    }
+
+
+def summarize(label: str, runs: list[dict]):
+    latencies = [r["latency"] * 1000 for r in runs]
+    print(
+        f"{label:<11} mean={statistics.mean(latencies):8.1f} ms  "
+        f"p50={statistics.median(latencies):8.1f} ms  "
+        f"input_tokens={sum(r['input_tokens'] for r in runs):6d}  "
+        f"output_tokens={sum(r['output_tokens'] for r in runs):6d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file-name", default="")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    rfp_rag.load_retrieval_stack()
+    generator = rfp_rag.generator
+    retriever = create_ensemble_retriever(
+        {"file_name": args.file_name},
+        vector_store=rfp_rag.vector_store,
+        sparse_index=rfp_rag.sparse_index,
+    )
+    contexts = [
+        generator.format_retrieved_document({"docs": docs})["formatted_context"]
+        for docs in retriever.retrieve_many(QUERIES)
+    ]
+
+    two_call, structured = [], []
+    for _ in range(args.repeat):
+        for query, context in zip(QUERIES, contexts):
+            two_call.append(run_two_call(generator.llm, query, context))
+            structured.append(run_structured(generator.llm, query, context))
+
+    print(f"queries={len(QUERIES)} repeat={args.repeat} model={config.LLM_MODEL_NAME}")
+    summarize("two_call", two_call)
+    summarize("structured", structured)
+    parsed = sum(r["parsed"] for r in structured)
+    print(f"structured outputs parsed: {parsed}/{len(structured)}")
+
+
+if __name__ == "__main__":
+    main()
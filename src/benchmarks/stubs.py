@@ -0,0 +1,186 @@
+"""
+Local stub LLM and embedding servers used by the benchmarks.
+
+The embedding endpoint speaks the Jina `/v1/embeddings` protocol so the real
+embedding clients can be pointed at it. The LLM endpoint is a plain JSON API
+wrapped by `StubChatModel`, a LangChain chat model that does a real HTTP round
+trip per call. Both endpoints add a configurable latency and the embedding
+endpoint can inject throttling (429) responses, at random or above a number
+of concurrent requests like a rate-limited API.
+"""
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import PrivateAttr
+from typing import Any, Optional
+import threading
+import hashlib
+import asyncio
+import random
+import socket
+import math
+import time
+import uvicorn
+import httpx
+
+
+def hash_embedding(text: str, dim: int) -> list[float]:
+    """Deterministic bag-of-words embedding, so similar texts get similar vectors."""
+    vector = [0.0] * dim
+    for token in text.lower().split():
+        digest = hashlib.md5(token.encode("utf-8")).digest()
+        index = int.from_bytes(digest[:4], "little") % dim
+        vector[index] += 1.0 if digest[4] % 2 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def stub_completion(prompt: str) -> str:
+    if "You are a router" in prompt:
+        return "1"
+    if "break all unique query" in prompt:
+        return '{"queries": []}'
+    if "RAG retrieval evaluator" in prompt:
+        return "Document-1\nRelevance: Yes\nReasoning: stub reasoning."
+    return "Stub answer generated from the retrieved RFP documents."
+
+
+def create_stub_app(
+    llm_latency: float = 0.3,
+    embedding_latency: float = 0.05,
+    embedding_dim: int = 1024,
+    throttle_rate: float = 0.0,
+    max_concurrent_embeddings: int = 0,
+) -> FastAPI:
+    app = FastAPI(title="Stub LLM and embedding server")
+    app.state.stats = {"embedding_requests": 0, "throttled": 0, "llm_requests": 0}
+    app.state.embeddings_in_flight = 0
+
+    def throttled():
+        app.state.stats["throttled"] += 1
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Too many requests"},
+            headers={"Retry-After": "0.1"},
+        )
+
+    @app.post("/v1/embeddings")
+    async def embeddings(payload: dict):
+        app.state.stats["embedding_requests"] += 1
+        if (
+            max_concurrent_embeddings
+            and app.state.embeddings_in_flight >= max_concurrent_embeddings
+        ):
+            return throttled()
+        app.state.embeddings_in_flight += 1
+        try:
+            await asyncio.sleep(embedding_latency)
+        finally:
+            app.state.embeddings_in_flight -= 1
+        if throttle_rate and random.random() < throttle_rate:
+            return throttled()
+        return {
+            "model": payload.get("model"),
+            "data": [
+                {"index": i, "embedding": hash_embedding(text, embedding_dim)}
+                for i, text in enumerate(payload["input"])
+            ],
+        }
+
+    @app.post("/v1/generate")
+    async def generate(payload: dict):
+        app.state.stats["llm_requests"] += 1
+        await asyncio.sleep(llm_latency)
+        return {"text": stub_completion(payload["prompt"])}
+
+    return app
+
+
+class StubServer:
+    """Run a stub app with uvicorn on a free local port in a background thread."""
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=self.port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+class StubChatModel(BaseChatModel):
+    """Chat model that calls the stub `/v1/generate` endpoint over HTTP."""
+
+    base_url: str
+    timeout: float = 60.0
+    _aclient: Any = PrivateAttr(default=None)
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub-chat"
+
+    def _prompt(self, messages: list[BaseMessage]) -> dict:
+        return {"prompt": "\n".join(str(m.content) for m in messages)}
+
+    def _result(self, resp: httpx.Response) -> ChatResult:
+        text = resp.json()["text"]
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        resp = httpx.post(
+            f"{self.base_url}/v1/generate",
+            json=self._prompt(messages),
+            timeout=self.timeout,
+        )
+        return self._result(resp)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                timeout=self.timeout, limits=httpx.Limits(max_connections=None)
+            )
+        resp = await self._aclient.post(
+            f"{self.base_url}/v1/generate", json=self._prompt(messages)
+        )
+        return self._result(resp)
+
+    def with_structured_output(self, schema, **kwargs):
+        def parse(message: AIMessage):
+            return schema.model_validate_json(message.content)
+
+        async def aparse(message: AIMessage):
+            return parse(message)
+
+        return self | RunnableLambda(parse, afunc=aparse)
@@ -0,0 +1,137 @@
+"""
+Search latency and recall@k of the flat vector index (float32 and float16)
+against Chroma, on the same synthetic corpus.
+
+Chunk vectors are drawn around random topic centers and queries are noisy
+copies of chunks, so the neighbourhoods look like real embedding clusters.
+Recall is measured against an exact float32 scan. No API keys needed.
+
+Usage:
+    python -m src.benchmarks.vector_store --chunks 30000 --queries 200
+"""
+
+from langchain_core.embeddings import FakeEmbeddings
+import numpy as np
+import statistics
+import argparse
+import tempfile
+import time
+import os
+
+from src.common.flat_index import FlatIndex, normalize_rows
+from src.rag.vector_stores import RfpChroma, RfpFlatStore
+
+
+def make_corpus(n_chunks: int, dim: int, n_files: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n_chunks // 50), dim)).astype(np.float32)
+    topics = rng.integers(0, len(centers), n_chunks)
+    vectors = centers[topics] + 0.6 * rng.standard_normal((n_chunks, dim))
+    ids = [str(i) for i in range(n_chunks)]
+    metadatas = [{"file_name": f"RFP{i % n_files}.pdf"} for i in range(n_chunks)]
+    return ids, normalize_rows(vectors), metadatas
+
+
+def build_chroma(persist_dir: str, ids, vectors, metadatas, dim: int) -> RfpChroma:
+    store = RfpChroma(
+        persist_directory=persist_dir,
+        embedding_function=FakeEmbeddings(size=dim),
+        collection_metadata={"hnsw:space": "cosine"},
+    )
+    batch = 4000
+    for start in range(0, len(ids), batch):
+        store._collection.add(
+            ids=ids[start : start + batch],
+            embeddings=vectors[start : start + batch].tolist(),
+            documents=[f"chunk {i}" for i in ids[start : start + batch]],
+            metadatas=metadatas[start : start + batch],
+        )
+    return store
+
+
+def export_flat(store: RfpChroma, path: str, dtype: str, dim: int) -> RfpFlatStore:
+    """Same export as ingestion: read everything back from Chroma."""
+    data = store._collection.get(include=["embeddings", "documents", "metadatas"])
+    FlatIndex.build(
+        ids=data["ids"],
+        texts=data["documents"],
+        metadatas=data["metadatas"],
+        embeddings=data["embeddings"],
+        dtype=dtype,
+    ).save(path)
+    return RfpFlatStore(FlatIndex.load(path), FakeEmbeddings(size=dim))
+
+
+def exact_top_k(vectors, metadatas, queries, k: int, file_name: str | None):
+    rows = np.arange(len(vectors))
+    if file_name:
+        rows = np.array(
+            [i for i, m in enumerate(metadatas) if m["file_name"] == file_name]
+        )
+    scores = queries @ vectors[rows].T
+    top = np.argsort(-scores, axis=1)[:, :k]
+    return [{str(rows[i]) for i in query_top} for query_top in top]
+
+
+def measure(store, queries, k: int, where, truth) -> tuple[list[float], float]:
+    latencies, hits = [], 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vectors([query.tolist()], k, where)[0]
+        latencies.append(time.perf_counter() - start)
+        hits += len({doc.id for doc in docs} & expected)
+    return latencies, hits / (k * len(queries))
+
+
+def report(label: str, latencies: list[float], recall: float):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(
+        f"{label:<26} p50={statistics.median(latencies) * 1000:8.2f} ms  "
+        f"p95={p95 * 1000:8.2f} ms  recall={recall:.4f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=30_000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--files", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    args = parser.parse_args()
+
+    ids, vectors, metadatas = make_corpus(args.chunks, args.dim, args.files, seed=0)
+    rng = np.random.default_rng(1)
+    picked = rng.integers(0, args.chunks, args.queries)
+    queries = normalize_rows(
+        vectors[picked] + 0.3 * rng.standard_normal((args.queries, args.dim))
+    )
+    file_name = metadatas[int(picked[0])]["file_name"]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        start = time.perf_counter()
+        chroma = build_chroma(
+            os.path.join(tmp_dir, "chroma"), ids, vectors, metadatas, args.dim
+        )
+        print(f"chunks={args.chunks} dim={args.dim} k={args.k}")
+        print(f"chroma build={time.perf_counter() - start:.1f} s")
+        stores = {"chroma": chroma}
+        for dtype in ("float32", "float16"):
+            path = os.path.join(tmp_dir, f"flat_{dtype}")
+            stores[f"flat {dtype}"] = export_flat(chroma, path, dtype, args.dim)
+            size_mb = os.path.getsize(os.path.join(path, "embeddings.npy")) / 2**20
+            print(f"flat {dtype} embeddings.npy={size_mb:.1f} MB")
+
+        filters = [(None, "no filter"), ({"file_name": file_name}, "file filter")]
+        for where, label in filters:
+            truth = exact_top_k(
+                vectors, metadatas, queries, args.k, where and where["file_name"]
+            )
+            print(f"-- {label}")
+            for name, store in stores.items():
+                report(name, *measure(store, queries, args.k, where, truth))
+
+
+if __name__ == "__main__":
+    main()
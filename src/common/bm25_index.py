@@ -0,0 +1,286 @@
+from src.common.metadata_table import MetadataTable
+from collections import Counter
+from array import array
+import numpy as np
+import shutil
+import json
+import os
+import re
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Persisted BM25 inverted index.
+
+    Postings are stored sorted by term as two flat arrays, the chunk position
+    and its precomputed BM25 impact (idf times the saturated, length-normalized
+    term frequency). A query sums the posting slices of its terms, so search
+    cost depends on the postings touched, not on the corpus size. The arrays
+    are memory-mapped on load. Raw term frequencies are kept alongside, so
+    the index can be updated without the texts of its unchanged chunks.
+
+    Directory layout:
+        meta.json            num_docs, avg_doc_length, k1, b
+        vocab.json           terms, position = term id
+        offsets.npy          posting range of each term id, size V + 1
+        postings_docs.npy    chunk positions, int32
+        postings_scores.npy  BM25 impacts, float32
+        postings_freqs.npy   term frequencies, int32
+        doc_lengths.npy      tokens per chunk, int32
+        docs.json            chunk ids and metadata columns
+    """
+
+    def __init__(
+        self,
+        vocab: dict[str, int],
+        offsets: np.ndarray,
+        postings_docs: np.ndarray,
+        postings_scores: np.ndarray,
+        doc_lengths: np.ndarray,
+        doc_ids: list[str],
+        metadata: MetadataTable,
+        meta: dict,
+        postings_freqs: np.ndarray | None = None,
+    ):
+        self.vocab = vocab
+        self.offsets = offsets
+        self.postings_docs = postings_docs
+        self.postings_scores = postings_scores
+        self.postings_freqs = postings_freqs
+        self.doc_lengths = doc_lengths
+        self.doc_ids = np.asarray(doc_ids, dtype=object)
+        self.metadata = metadata
+        self.meta = meta
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.doc_ids)
+
+    @classmethod
+    def build(
+        cls,
+        texts: list[str],
+        metadatas: list[dict],
+        ids: list[str],
+        k1: float = 1.5,
+        b: float = 0.75,
+    ) -> "BM25Index":
+        builder = BM25Builder()
+        builder.add(texts)
+        return builder.build(ids, MetadataTable.from_metadatas(metadatas), k1, b)
+
+    def save(self, path: str):
+        """Write the index to `path`, replacing any previous index there."""
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+        with open(os.path.join(tmp_path, "vocab.json"), "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+        with open(os.path.join(tmp_path, "docs.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": self.doc_ids.tolist(),
+                    "columns": self.metadata.to_dict(),
+                },
+                f,
+            )
+        np.save(os.path.join(tmp_path, "offsets.npy"), self.offsets)
+        np.save(os.path.join(tmp_path, "postings_docs.npy"), self.postings_docs)
+        np.save(os.path.join(tmp_path, "postings_scores.npy"), self.postings_scores)
+        if self.postings_freqs is not None:
+            np.save(os.path.join(tmp_path, "postings_freqs.npy"), self.postings_freqs)
+        np.save(os.path.join(tmp_path, "doc_lengths.npy"), self.doc_lengths)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"BM25 index not found at '{path}'. "
+                "Please run the ingestion script first (ingest.py)."
+            )
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(os.path.join(path, "vocab.json"), "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        with open(os.path.join(path, "docs.json"), "r", encoding="utf-8") as f:
+            docs = json.load(f)
+
+        def mmap(name: str) -> np.ndarray:
+            return np.load(os.path.join(path, name), mmap_mode="r")
+
+        # absent from indexes saved before term frequencies were kept
+        has_freqs = os.path.exists(os.path.join(path, "postings_freqs.npy"))
+
+        return cls(
+            vocab={term: i for i, term in enumerate(terms)},
+            offsets=mmap("offsets.npy"),
+            postings_docs=mmap("postings_docs.npy"),
+            postings_scores=mmap("postings_scores.npy"),
+            doc_lengths=mmap("doc_lengths.npy"),
+            doc_ids=docs["ids"],
+            metadata=MetadataTable(docs["columns"], num_rows=len(docs["ids"])),
+            meta=meta,
+            postings_freqs=mmap("postings_freqs.npy") if has_freqs else None,
+        )
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every chunk for `query`."""
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                continue
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            # a chunk appears at most once in the postings of a term
+            scores[self.postings_docs[start:end]] += self.postings_scores[start:end]
+        return scores
+
+    def search(
+        self, query: str, k: int, where: dict | None = None
+    ) -> list[tuple[str, float]]:
+        """Ids and scores of the top-k chunks with a positive score."""
+        if k <= 0:
+            return []
+        scores = self.scores(query)
+        mask = self.metadata.mask(where)
+        if mask is not None:
+            scores[~mask] = 0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(self.doc_ids[i], float(scores[i])) for i in candidates]
+
+    def search_many(
+        self, queries: list[str], k: int, where: dict | None = None
+    ) -> list[list[tuple[str, float]]]:
+        return [self.search(query, k, where) for query in queries]
+
+
+class BM25Builder:
+    """
+    Postings of chunks added page by page as compact int arrays, so texts
+    need not be kept; impacts are computed once all chunks are in. A builder
+    can start from the kept rows of a saved index, see `from_index`.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, tuple[array, array]] = {}
+        self.doc_lengths = array("i")
+        # (terms, term id, position, frequency) of the postings of an index
+        self.base: tuple[list[str], np.ndarray, np.ndarray, np.ndarray] | None = None
+
+    def __len__(self) -> int:
+        return len(self.doc_lengths)
+
+    @classmethod
+    def from_index(cls, index: BM25Index, keep: np.ndarray) -> "BM25Builder":
+        """
+        Builder holding the rows `keep` (sorted positions) of `index`,
+        renumbered from 0; chunks added afterwards follow them.
+        """
+        if index.postings_freqs is None:
+            raise ValueError("The BM25 index has no term frequencies.")
+        positions = np.full(index.num_docs, -1, dtype=np.int64)
+        positions[keep] = np.arange(len(keep))
+        docs = positions[index.postings_docs]
+        kept = docs >= 0
+        term_ids = np.repeat(np.arange(len(index.vocab)), np.diff(index.offsets))
+        builder = cls()
+        builder.base = (
+            sorted(index.vocab, key=index.vocab.get),
+            term_ids[kept],
+            docs[kept],
+            np.asarray(index.postings_freqs)[kept],
+        )
+        builder.doc_lengths = array("i", np.asarray(index.doc_lengths)[keep].tolist())
+        return builder
+
+    def add(self, texts: list[str]):
+        for text in texts:
+            doc = len(self.doc_lengths)
+            term_freqs = Counter(tokenize(text))
+            for term, freq in term_freqs.items():
+                docs, freqs = self.postings.setdefault(term, (array("i"), array("i")))
+                docs.append(doc)
+                freqs.append(freq)
+            self.doc_lengths.append(sum(term_freqs.values()))
+
+    def _all_postings(self) -> tuple[list[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Vocabulary and (term id, position, frequency) of every posting."""
+        base_terms = []
+        if self.base is not None:
+            # terms left without postings are dropped from the vocabulary
+            used = np.zeros(len(self.base[0]), dtype=bool)
+            used[self.base[1]] = True
+            base_terms = [term for term, u in zip(self.base[0], used) if u]
+        terms = sorted(set(base_terms).union(self.postings))
+        term_index = {term: i for i, term in enumerate(terms)}
+        term_parts, doc_parts, freq_parts = [], [], []
+        if self.base is not None:
+            base_map = np.asarray(
+                [term_index.get(term, -1) for term in self.base[0]], dtype=np.int64
+            )
+            term_parts.append(base_map[self.base[1]])
+            doc_parts.append(self.base[2])
+            freq_parts.append(self.base[3])
+        for term, (docs, freqs) in self.postings.items():
+            term_parts.append(np.full(len(docs), term_index[term], dtype=np.int64))
+            doc_parts.append(np.asarray(docs, dtype=np.int64))
+            freq_parts.append(np.asarray(freqs, dtype=np.int32))
+        if not term_parts:
+            empty = np.zeros(0, dtype=np.int64)
+            return terms, empty, empty, empty.astype(np.int32)
+        term_ids = np.concatenate(term_parts)
+        docs = np.concatenate(doc_parts)
+        freqs = np.concatenate(freq_parts).astype(np.int32)
+        order = np.lexsort((docs, term_ids))
+        return terms, term_ids[order], docs[order], freqs[order]
+
+    def build(
+        self, ids: list[str], metadata: MetadataTable, k1: float, b: float
+    ) -> BM25Index:
+        doc_lengths = np.asarray(self.doc_lengths, dtype=np.int32)
+        num_docs = len(doc_lengths)
+        avg_doc_length = float(doc_lengths.mean()) if num_docs else 0.0
+
+        terms, term_ids, docs, freqs = self._all_postings()
+        dfs = np.bincount(term_ids, minlength=len(terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(dfs, out=offsets[1:])
+        idf = np.log(1 + (num_docs - dfs + 0.5) / (dfs + 0.5))
+        norm = k1 * (1 - b + b * doc_lengths[docs] / max(avg_doc_length, 1))
+        tf = freqs.astype(np.float64)
+        impacts = idf[term_ids] * tf * (k1 + 1) / (tf + norm)
+
+        return BM25Index(
+            vocab={term: i for i, term in enumerate(terms)},
+            offsets=offsets,
+            postings_docs=docs.astype(np.int32),
+            postings_scores=impacts.astype(np.float32),
+            doc_lengths=doc_lengths,
+            doc_ids=list(ids),
+            metadata=metadata,
+            meta={
+                "num_docs": num_docs,
+                "avg_doc_length": avg_doc_length,
+                "k1": k1,
+                "b": b,
+            },
+            postings_freqs=freqs,
+        )
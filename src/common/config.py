@@ -1,20 +1,105 @@
 from langchain_core.prompts import ChatPromptTemplate
+import os
 
 # --- Paths and Directories ---
 DB_PERSIST_DIRECTORY = "chroma_db"
+BM25_INDEX_DIRECTORY = "bm25_index"
+FLAT_INDEX_DIRECTORY = "flat_index"
+METADATA_INDEX_DIRECTORY = "metadata_index"
+INDEX_GENERATION_PATH = "index_generation.json"
 
 # --- Embedding Model Configuration ---
 EMBEDDING_TYPE = "jina"
+JINA_API_URL = os.getenv("JINA_API_URL", "https://api.jina.ai/v1/embeddings")
+EMBEDDING_MAX_CONNECTIONS = 100  # async connection pool size of the embedding client
 
+# --- Query Embedding Cache ---
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_SIZE = 10_000  # in-memory LRU entries
+EMBEDDING_CACHE_TTL_SECONDS = 24 * 3600  # in-memory entry lifetime
+EMBEDDING_CACHE_PATH = "embedding_cache/query_embeddings.sqlite"
+EMBEDDING_CACHE_MAX_AGE_DAYS = 30  # on-disk entries unused for longer are evicted
+EMBEDDING_CACHE_MAX_MB = 512  # least recently used on-disk entries evicted beyond this
+
+
+# --- Vector Store Configuration ---
+# "chroma": Chroma HNSW index, "flat": exact scan of the memory-mapped flat index,
+# "sharded_chroma": one Chroma collection per RFP (ingest with SHARD_BY_FILE)
+VECTOR_STORE_TYPE = "chroma"
+SHARD_SEARCH_WORKERS = 8  # threads searching the shards of an unfiltered query
+# quantized flat index: approximate matches rescored exactly per query, times k,
+# per quantization mode. Each reaches ~0.9 recall@4 on 30k synthetic chunks
+# (src.benchmarks.quantization), rerun it on the real index before lowering them
+FLAT_RESCORE_FACTORS = {"int8": 2, "binary": 1024, "matryoshka": 128}
+# filters matching more chunks than this are passed to Chroma as `where`
+# instead of an explicit candidate id list
+METADATA_PREFILTER_MAX_IDS = 20_000
 
 # --- Retriever Configuration ---
 ENSEMBLE_RETRIEVER_WEIGHTS = [0.5, 0.5]  # [dense, sparse]
 DENSE_RETRIEVED_DOCUMENTS = 4
 SPARSE_RETRIEVED_DOCUMENTS = 3
+RRF_CONSTANT = 60  # rank offset of reciprocal-rank fusion
+# how dense and BM25 results are merged: "rrf": weighted reciprocal-rank fusion,
+# "weighted": weighted sum of min-max normalized similarity and BM25 scores
+HYBRID_FUSION_METHOD = "rrf"
+
+# --- Fusion Configuration ---
+# how sub-query results are merged before formatting:
+# "rrf": reciprocal-rank fusion, "concat": first-occurrence order
+FUSION_METHOD = "rrf"
+FUSION_TOP_K = None  # keep at most this many fused documents, None keeps all
+MMR_ENABLED = False  # reorder fused documents by maximal marginal relevance
+MMR_LAMBDA = 0.7  # 1.0 ranks by relevance only, 0.0 by diversity only
+
+# --- Rerank Configuration ---
+RERANK_ENABLED = False
+# "lexical": query-term overlap, "cross_encoder": local sentence-transformers model
+RERANK_SCORER = "lexical"
+RERANK_MODEL_NAME = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_BATCH_SIZE = 32
+RERANK_CANDIDATES = 12  # documents fetched per sub-query and retriever when reranking
+RERANK_TOP_N = 4  # documents kept for the prompt
+RERANK_MIN_SCORE = 0.2  # scores are in [0, 1]
+
+# --- Context Packing Configuration ---
+CONTEXT_TOKEN_BUDGET = 6000  # estimated tokens of retrieved context per prompt
+CONTEXT_MERGE_ADJACENT = True  # merge consecutive chunks of a file, overlap kept once
+CONTEXT_DUPLICATE_THRESHOLD = 0.8  # share of shingles already in the context
+CONTEXT_MIN_OVERLAP_CHARS = 20
+CONTEXT_MAX_OVERLAP_CHARS = 400  # above the ingestion CHUNK_OVERLAP of 100
+
+# --- Answer Cache Configuration ---
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95  # cosine similarity of query embeddings
+ANSWER_CACHE_MAX_ENTRIES = 1000
+ANSWER_CACHE_TTL_SECONDS = 3600
+
+# --- Router Configuration ---
+# "local": in-process classifier only, "llm": Gemini prompt only,
+# "hybrid": local classifier, Gemini only when the score is inside the band
+ROUTER_TYPE = "hybrid"
+ROUTER_UNCERTAINTY_BAND = (0.3, 0.7)  # (general below, rag above)
+ROUTER_EXAMPLES_PATH = "src/rag/router_examples.json"
 
 # --- LLM and Prompt Configuration ---
 LLM_MODEL_NAME = "gemini-2.5-flash"
 TEMPERATURE = 0.0
+# "two_call": answer and retrieval reasoning from two LLM calls over the same context
+# "structured": one structured-output call returns the answer and per-document relevance
+GENERATION_MODE = "two_call"
+
+# --- Serving Configuration ---
+# True: /query awaits graph.ainvoke on the event loop (async LLM and embedding calls).
+# False: /query runs the blocking graph.invoke on the threadpool.
+ASYNC_QUERY_MODE = True
+# In async mode, break down the query and retrieve documents while the router
+# call is in flight; the work is cancelled if the query is routed elsewhere.
+SPECULATIVE_RETRIEVAL = True
+# Default retrieval reasoning mode of /query: "inline", "background" or "skip"
+REASONING_MODE = "inline"
+REASONING_WORKERS = 4  # background reasoning worker pool size
+REASONING_JOB_TTL_SECONDS = 3600  # finished jobs are kept this long for polling
 
 ROUTER_PROMPT = """You are a router. Your job is to decide whether the user's query is related to RFP (Request for Proposal) documents or not. 
 Return:
@@ -61,6 +146,23 @@ Relevance: Yes/No
 Reasoning: Why Relevant or not relevant?
 """
 
+RAG_STRUCTURED_SYSTEM_PROMPT = (
+    "You are a helpful assistant. Given RFP document similar for user's query, your task is to answer the user's query "
+    "based *only* on these documents.\n"
+    "Do NOT make up any answers. If the answer is not found in it, respond with: "
+    "'I cannot answer this based on the provided information.' "
+    "No need to mention about retrieved document in your final answer.\n"
+    "Also act as an expert RAG retrieval evaluator: for every Document-index below, decide whether "
+    "it is relevant with respect to the user's query, with concise and factual reasoning.\n\n"
+    "<rfp_documents>\n{context}\n</rfp_documents>"
+)
+RAG_STRUCTURED_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", RAG_STRUCTURED_SYSTEM_PROMPT),
+        ("human", "{input}"),
+    ]
+)
+
 QUERY_BREAK_PROMPT = """You are given RAG bot user query. If user asked multiple queries in single given query, you have to break all unique query in output. If there is only query, return empty list.
 <query>
 {query}
@@ -0,0 +1,142 @@
+from array import array
+import threading
+import hashlib
+import sqlite3
+import time
+import os
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    """Cache key of a text embedded by a given model."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+def encode_vector(vector: list[float]) -> bytes:
+    """Pack a vector as raw float32, 4 bytes per dimension."""
+    return array("f", vector).tobytes()
+
+
+def decode_vector(blob: bytes) -> list[float]:
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+class EmbeddingStore:
+    """
+    Disk-backed key -> embedding store on SQLite, vectors kept as float32 blobs.
+    Keys passed to `touch` get their `last_used_at` refreshed in one batch on
+    eviction or close, so eviction drops the least recently used entries
+    without a write per read. Safe to share between threads.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        dir_path = os.path.dirname(path)
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, "
+            "vector BLOB NOT NULL, created_at REAL NOT NULL, last_used_at REAL)"
+        )
+        columns = {
+            row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")
+        }
+        if "last_used_at" not in columns:
+            # stores created before reads were tracked
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used_at REAL")
+            self._conn.execute("UPDATE embeddings SET last_used_at = created_at")
+        self._conn.commit()
+
+    def get_many(self, keys: list[str]) -> dict[str, list[float]]:
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            # stay below SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                found.update({key: decode_vector(blob) for key, blob in rows})
+        return found
+
+    def touch(self, keys):
+        """Mark entries as used now, written by the next `evict` or `close`."""
+        now = time.time()
+        with self._lock:
+            self._touched.update(dict.fromkeys(keys, now))
+
+    def _flush_touched(self):
+        """Write the pending `touch` times, called with the lock held."""
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE embeddings SET last_used_at = ? WHERE key = ?",
+            [(used_at, key) for key, used_at in self._touched.items()],
+        )
+        self._conn.commit()
+        self._touched.clear()
+
+    def put_many(self, items: dict[str, list[float]]):
+        if not items:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(key, vector, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                [
+                    (key, encode_vector(vector), now, now)
+                    for key, vector in items.items()
+                ],
+            )
+            self._conn.commit()
+
+    def evict(
+        self, max_age_seconds: float | None = None, max_bytes: int | None = None
+    ) -> int:
+        """
+        Delete entries not used for `max_age_seconds`, then the least recently
+        used entries until the vectors fit in `max_bytes`. Returns the number
+        deleted.
+        """
+        deleted = 0
+        with self._lock:
+            self._flush_touched()
+            if max_age_seconds is not None:
+                deleted += self._conn.execute(
+                    "DELETE FROM embeddings WHERE last_used_at < ?",
+                    (time.time() - max_age_seconds,),
+                ).rowcount
+            if max_bytes is not None:
+                count, total = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+                ).fetchone()
+                if total > max_bytes:
+                    keep = int(count * max_bytes / total)
+                    deleted += self._conn.execute(
+                        "DELETE FROM embeddings WHERE key NOT IN (SELECT key "
+                        "FROM embeddings ORDER BY last_used_at DESC LIMIT ?)",
+                        (keep,),
+                    ).rowcount
+            self._conn.commit()
+            if deleted:
+                # give the space back to the file system
+                self._conn.execute("VACUUM")
+        return deleted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.close()
@@ -0,0 +1,253 @@
+from src.common.metadata_table import MetadataTable
+from src.common.quantization import QuantizedVectors, QUANTIZERS
+import numpy as np
+import shutil
+import json
+import os
+
+# float16 rows cast to float32 per matrix product, small enough to stay in cache
+BLOCK_ROWS = 1024
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def top_hits(positions: np.ndarray, scores: np.ndarray, k: int):
+    """The `k` best `(position, score)` pairs, best first."""
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return [(int(p), float(s)) for p, s in zip(positions[top], scores[top])]
+
+
+class FlatIndex:
+    """
+    Exact vector index: L2-normalized chunk embeddings in one memory-mapped
+    `.npy` matrix, scored against query vectors with BLAS matrix products.
+    Scores are cosine similarities. Metadata filters select the candidate
+    rows before scoring.
+
+    With `quantized` vectors the scan runs over the compressed copy and only a
+    shortlist is rescored against the full-precision matrix, so just those
+    rows of `embeddings.npy` are read.
+
+    Directory layout:
+        embeddings.npy     (chunks, dim) float32 or float16
+        quantized_*.npy    optional compressed copy, see `QUANTIZERS`
+        docs.json          chunk ids, texts, metadata columns, quantization kind
+    """
+
+    def __init__(
+        self,
+        embeddings: np.ndarray,
+        ids: list[str],
+        texts: list[str],
+        metadata: MetadataTable,
+        quantized: QuantizedVectors | None = None,
+    ):
+        self.embeddings = embeddings
+        self.ids = ids
+        self.texts = texts
+        self.metadata = metadata
+        self.quantized = quantized
+        self.positions = {doc_id: i for i, doc_id in enumerate(ids)}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        ids: list[str],
+        texts: list[str],
+        metadatas: list[dict],
+        embeddings,
+        dtype: str = "float32",
+        quantization: str | None = None,
+        matryoshka_dim: int = 256,
+    ) -> "FlatIndex":
+        embeddings = normalize_rows(embeddings)
+        quantized = None
+        if quantization:
+            if quantization not in QUANTIZERS:
+                raise ValueError(f"Unknown quantization: {quantization}")
+            quantized = QUANTIZERS[quantization].encode(
+                embeddings, dim=matryoshka_dim
+            )
+        return cls(
+            embeddings=embeddings.astype(dtype),
+            ids=list(ids),
+            texts=list(texts),
+            metadata=MetadataTable.from_metadatas(metadatas),
+            quantized=quantized,
+        )
+
+    def save(self, path: str):
+        """Write the index to `path`, replacing any previous index there."""
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+        np.save(os.path.join(tmp_path, "embeddings.npy"), self.embeddings)
+        self._save_docs(tmp_path)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    def _save_docs(self, path: str):
+        """Everything but `embeddings.npy`."""
+        if self.quantized is not None:
+            self.quantized.save(path)
+        with open(os.path.join(path, "docs.json"), "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": self.ids,
+                    "texts": self.texts,
+                    "columns": self.metadata.to_dict(),
+                    "quantization": self.quantized and self.quantized.kind,
+                },
+                f,
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "FlatIndex":
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Flat vector index not found at '{path}'. "
+                "Please run the ingestion script first (ingest.py)."
+            )
+        with open(os.path.join(path, "docs.json"), "r", encoding="utf-8") as f:
+            docs = json.load(f)
+        quantization = docs.get("quantization")
+        return cls(
+            embeddings=np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r"),
+            ids=docs["ids"],
+            texts=docs["texts"],
+            metadata=MetadataTable(docs["columns"], num_rows=len(docs["ids"])),
+            quantized=QUANTIZERS[quantization].load(path) if quantization else None,
+        )
+
+    def scores(self, queries: np.ndarray, rows: np.ndarray | None = None):
+        """Cosine similarity of each query to each candidate row, (queries, rows)."""
+        matrix = self.embeddings if rows is None else self.embeddings[rows]
+        if matrix.dtype == np.float32:
+            return queries @ matrix.T
+        # no BLAS for float16, cast block by block
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), BLOCK_ROWS):
+            block = np.asarray(matrix[start : start + BLOCK_ROWS], dtype=np.float32)
+            scores[:, start : start + BLOCK_ROWS] = queries @ block.T
+        return scores
+
+    def search(
+        self,
+        query_vectors,
+        k: int,
+        where: dict | None = None,
+        rescore_factor: int = 4,
+    ) -> list[list[tuple[int, float]]]:
+        """
+        Top-k `(position, score)` of each query among the rows matching `where`.
+        With quantized vectors the `k * rescore_factor` best approximate matches
+        are rescored exactly.
+        """
+        queries = normalize_rows(np.atleast_2d(query_vectors))
+        rows = self.metadata.rows(where)
+        n_candidates = len(self) if rows is None else len(rows)
+        k = min(k, n_candidates)
+        if k <= 0:
+            return [[] for _ in queries]
+
+        if self.quantized is None:
+            positions = np.arange(len(self)) if rows is None else rows
+            return [
+                top_hits(positions, query_scores, k)
+                for query_scores in self.scores(queries, rows)
+            ]
+
+        approximate = self.quantized.scores(queries, rows)
+        size = min(n_candidates, k * rescore_factor)
+        shortlist = np.argpartition(-approximate, size - 1, axis=1)[:, :size]
+        if rows is not None:
+            shortlist = rows[shortlist]
+        # one exact product over the shortlisted rows of all queries
+        shortlisted_rows = np.unique(shortlist)
+        exact = self.scores(queries, shortlisted_rows)
+        columns = np.searchsorted(shortlisted_rows, shortlist)
+        return [
+            top_hits(query_shortlist, query_exact[query_columns], k)
+            for query_shortlist, query_exact, query_columns in zip(
+                shortlist, exact, columns
+            )
+        ]
+
+
+class FlatIndexWriter:
+    """
+    Builds a `FlatIndex` at `path` from embeddings added page by page: rows
+    are normalized straight into a memory-mapped `embeddings.npy` of
+    `num_rows` rows and the quantized copy is encoded per page, so the full
+    float matrix is never held in memory. `finish` replaces any previous
+    index at `path`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        num_rows: int,
+        dim: int,
+        dtype: str = "float32",
+        quantization: str | None = None,
+        matryoshka_dim: int = 256,
+    ):
+        if quantization and quantization not in QUANTIZERS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        if os.path.exists(self.tmp_path):
+            shutil.rmtree(self.tmp_path)
+        os.makedirs(self.tmp_path)
+        self.embeddings = np.lib.format.open_memmap(
+            os.path.join(self.tmp_path, "embeddings.npy"),
+            mode="w+",
+            dtype=dtype,
+            shape=(num_rows, dim),
+        )
+        self.quantizer = QUANTIZERS[quantization] if quantization else None
+        self.matryoshka_dim = matryoshka_dim
+        self.quantized_parts: list[QuantizedVectors] = []
+        self.ids: list[str] = []
+        self.texts: list[str] = []
+
+    def add(self, ids: list[str], texts: list[str], embeddings):
+        if len(self.ids) + len(ids) > len(self.embeddings):
+            raise ValueError(f"More than {len(self.embeddings)} rows added.")
+        embeddings = normalize_rows(embeddings)
+        row = len(self.ids)
+        self.embeddings[row : row + len(ids)] = embeddings
+        if self.quantizer is not None:
+            self.quantized_parts.append(
+                self.quantizer.encode(embeddings, dim=self.matryoshka_dim)
+            )
+        self.ids.extend(ids)
+        self.texts.extend(texts)
+
+    def finish(self, metadata: MetadataTable) -> int:
+        """Save the index, `metadata` has one row per added chunk. Returns rows."""
+        if len(self.ids) != len(self.embeddings):
+            raise ValueError(
+                f"Expected {len(self.embeddings)} rows, {len(self.ids)} added."
+            )
+        self.embeddings.flush()
+        quantized = None
+        if self.quantized_parts:
+            quantized = self.quantizer.concatenate(self.quantized_parts)
+        index = FlatIndex(self.embeddings, self.ids, self.texts, metadata, quantized)
+        index._save_docs(self.tmp_path)
+        del index, self.embeddings
+        if os.path.exists(self.path):
+            shutil.rmtree(self.path)
+        os.replace(self.tmp_path, self.path)
+        return len(self.ids)
@@ -0,0 +1,95 @@
+from src.common.metadata_table import (
+    MetadataColumns,
+    MetadataTable,
+    MEMBER_FILES_KEY,
+)
+import numpy as np
+import shutil
+import json
+import os
+
+
+class MetadataIndex:
+    """
+    Row-id lists per metadata value (file_name, company, project) over all
+    ingested chunks, built at ingestion. Turns a request filter into the
+    candidate chunk ids the vector search is restricted to.
+
+    Directory layout:
+        index.json  chunk ids and, per key and value, its slice of rows.npy
+        rows.npy    concatenated sorted row-id lists, int64
+    """
+
+    def __init__(
+        self, ids: list[str], table: MetadataTable, scope: np.ndarray | None = None
+    ):
+        self.ids = np.asarray(ids, dtype=object)
+        self.table = table
+        self.scope = scope
+
+    def restrict(self, where: dict) -> "MetadataIndex":
+        """View of the index over the chunks matching `where` only."""
+        return MetadataIndex(self.ids, self.table, scope=self.table.rows(where))
+
+    @classmethod
+    def build(
+        cls, ids: list[str], metadatas: list[dict], keys: list[str]
+    ) -> "MetadataIndex":
+        columns = MetadataColumns()
+        columns.extend(metadatas)
+        return cls.from_columns(ids, columns, keys)
+
+    @classmethod
+    def from_columns(
+        cls, ids: list[str], columns: MetadataColumns, keys: list[str]
+    ) -> "MetadataIndex":
+        return cls(ids, columns.table([*keys, MEMBER_FILES_KEY]))
+
+    def save(self, path: str):
+        """Write the index to `path`, replacing any previous index there."""
+        tmp_path = f"{path}.tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        offsets, parts, start = {}, [], 0
+        for key, values in self.table.postings.items():
+            offsets[key] = {}
+            for value, rows in values.items():
+                offsets[key][value] = [start, start + len(rows)]
+                parts.append(rows)
+                start += len(rows)
+        rows = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        np.save(os.path.join(tmp_path, "rows.npy"), rows)
+        with open(os.path.join(tmp_path, "index.json"), "w", encoding="utf-8") as f:
+            json.dump({"ids": self.ids.tolist(), "offsets": offsets}, f)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataIndex":
+        if not os.path.exists(path):
+            raise FileNotFoundError(
+                f"Metadata index not found at '{path}'. "
+                "Please run the ingestion script first (ingest.py)."
+            )
+        with open(os.path.join(path, "index.json"), "r", encoding="utf-8") as f:
+            data = json.load(f)
+        rows = np.load(os.path.join(path, "rows.npy"))
+        postings = {
+            key: {value: rows[start:end] for value, (start, end) in values.items()}
+            for key, values in data["offsets"].items()
+        }
+        table = MetadataTable({}, num_rows=len(data["ids"]), postings=postings)
+        return cls(data["ids"], table)
+
+    def candidate_ids(self, where: dict | None) -> list[str] | None:
+        """Ids of the chunks matching `where`, None without a filter."""
+        rows = self.table.rows(where)
+        if rows is None:
+            return None
+        if self.scope is not None:
+            rows = np.intersect1d(rows, self.scope, assume_unique=True)
+        return self.ids[rows].tolist()
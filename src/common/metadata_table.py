@@ -0,0 +1,211 @@
+from functools import reduce
+import numpy as np
+import json
+
+MAX_CACHED_FILTERS = 1024
+EMPTY_ROWS = np.zeros(0, dtype=np.int64)
+# comma-joined files of a chunk kept once for near-duplicates across files
+MEMBER_FILES_KEY = "member_files"
+# boolean key per member file on such a chunk, for Chroma `where` filters
+MEMBER_FILE_FLAG_PREFIX = "member_file:"
+
+
+def member_file_flags(files: list[str]) -> dict[str, bool]:
+    return {f"{MEMBER_FILE_FLAG_PREFIX}{file_name}": True for file_name in files}
+
+
+def is_member_file_flag(key: str) -> bool:
+    return key.startswith(MEMBER_FILE_FLAG_PREFIX)
+
+
+def expand_member_files(where: dict) -> dict:
+    """
+    Chroma `where` filter also matching the chunks standing for near-duplicates
+    of the named files: a `file_name` value, `$eq` or `$in` condition becomes
+    an `$or` with the member-file flags. Negated conditions are left as-is.
+    """
+    if len(where) > 1:
+        return {"$and": [expand_member_files({k: v}) for k, v in where.items()]}
+    [(key, condition)] = where.items()
+    if key in ("$and", "$or"):
+        return {key: [expand_member_files(c) for c in condition]}
+    if key != "file_name":
+        return where
+    if isinstance(condition, dict) and "$eq" in condition:
+        names = [condition["$eq"]]
+    elif isinstance(condition, dict) and "$in" in condition:
+        names = condition["$in"]
+    elif isinstance(condition, dict):
+        return where
+    else:
+        names = [condition]
+    flags = [{flag: True} for flag in member_file_flags(names)]
+    return {"$or": [where, *flags]}
+
+
+def build_postings(columns: dict[str, np.ndarray]) -> dict[str, dict]:
+    """
+    Sorted row-id list of every value of every column. A chunk standing for
+    near-duplicates is also listed under the `file_name` of each member file.
+    """
+    postings = {}
+    for key, column in columns.items():
+        groups: dict = {}
+        for row, value in enumerate(column):
+            if value is not None:
+                groups.setdefault(value, []).append(row)
+        postings[key] = {v: np.asarray(r, dtype=np.int64) for v, r in groups.items()}
+
+    members: dict = {}
+    for row, value in enumerate(columns.get(MEMBER_FILES_KEY, [])):
+        for file_name in (value or "").split(","):
+            if file_name:
+                members.setdefault(file_name, []).append(row)
+    for file_name, rows in members.items():
+        file_postings = postings.setdefault("file_name", {})
+        file_postings[file_name] = np.union1d(
+            file_postings.get(file_name, EMPTY_ROWS), rows
+        ).astype(np.int64)
+    return postings
+
+
+class MetadataColumns:
+    """
+    Column-wise metadata of chunks appended page by page, without a dict per
+    chunk. Member-file flags are left out, see `build_postings`.
+    """
+
+    def __init__(self):
+        self.columns: dict[str, list] = {}
+        self.num_rows = 0
+
+    def extend(self, metadatas: list[dict]):
+        for metadata in metadatas:
+            for key, value in metadata.items():
+                if is_member_file_flag(key):
+                    continue
+                column = self.columns.get(key)
+                if column is None:
+                    column = self.columns[key] = [None] * self.num_rows
+                column.append(value)
+            self.num_rows += 1
+            for column in self.columns.values():
+                if len(column) < self.num_rows:
+                    column.append(None)
+
+    def extend_rows(self, table: "MetadataTable", rows: np.ndarray):
+        """Append the rows `rows` of `table`."""
+        for key, column in table.columns.items():
+            if key not in self.columns:
+                self.columns[key] = [None] * self.num_rows
+            self.columns[key].extend(column[rows].tolist())
+        self.num_rows += len(rows)
+        for column in self.columns.values():
+            if len(column) < self.num_rows:
+                column.extend([None] * (self.num_rows - len(column)))
+
+    def table(self, keys: list[str] | None = None) -> "MetadataTable":
+        """Table of all the columns, or of `keys` with empty values dropped."""
+        if keys is None:
+            return MetadataTable(
+                dict(sorted(self.columns.items())), num_rows=self.num_rows
+            )
+        columns = {}
+        for key in keys:
+            column = self.columns.get(key)
+            if column is None:
+                columns[key] = [None] * self.num_rows
+            else:
+                columns[key] = [value or None for value in column]
+        return MetadataTable(columns, num_rows=self.num_rows)
+
+
+class MetadataTable:
+    """
+    Chunk metadata stored column-wise, one value per chunk position, with a
+    row-id list per value. Chroma-style filters are answered from the row-id
+    lists before any vector is scored:
+
+        {key: value}, {key: {"$eq": value}}, {key: {"$in": [values]}},
+        {"$and": [filters]}, {"$or": [filters]}
+
+    Several keys in one filter must all match. Results are cached per filter.
+    """
+
+    def __init__(
+        self,
+        columns: dict[str, list],
+        num_rows: int,
+        postings: dict[str, dict] | None = None,
+    ):
+        self.num_rows = num_rows
+        self.columns = {k: np.asarray(v, dtype=object) for k, v in columns.items()}
+        self.postings = build_postings(self.columns) if postings is None else postings
+        self._rows: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_metadatas(cls, metadatas: list[dict]) -> "MetadataTable":
+        columns = MetadataColumns()
+        columns.extend(metadatas)
+        return columns.table()
+
+    def to_dict(self) -> dict:
+        return {k: v.tolist() for k, v in self.columns.items()}
+
+    def row(self, i: int) -> dict:
+        """Metadata of the chunk at position `i`, without missing keys."""
+        return {
+            key: column[i]
+            for key, column in self.columns.items()
+            if column[i] is not None
+        }
+
+    def _value_rows(self, key: str, value) -> np.ndarray:
+        return self.postings.get(key, {}).get(value, EMPTY_ROWS)
+
+    def _evaluate(self, where: dict) -> np.ndarray:
+        matches = []
+        for key, condition in where.items():
+            if key == "$and":
+                rows = reduce(
+                    lambda a, b: np.intersect1d(a, b, assume_unique=True),
+                    [self._evaluate(c) for c in condition],
+                )
+            elif key == "$or":
+                rows = reduce(np.union1d, [self._evaluate(c) for c in condition])
+            elif isinstance(condition, dict) and "$eq" in condition:
+                rows = self._value_rows(key, condition["$eq"])
+            elif isinstance(condition, dict) and "$in" in condition:
+                rows = reduce(
+                    np.union1d,
+                    [self._value_rows(key, v) for v in condition["$in"]],
+                    EMPTY_ROWS,
+                )
+            elif isinstance(condition, dict):
+                raise ValueError(f"Unsupported metadata filter: {condition}")
+            else:
+                rows = self._value_rows(key, condition)
+            matches.append(rows)
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), matches)
+
+    def rows(self, where: dict | None) -> np.ndarray | None:
+        """Sorted positions of the chunks matching `where`, None without a filter."""
+        if not where:
+            return None
+        cache_key = json.dumps(where, sort_keys=True)
+        rows = self._rows.get(cache_key)
+        if rows is None:
+            rows = self._evaluate(where)
+            if len(self._rows) >= MAX_CACHED_FILTERS:
+                self._rows.clear()
+            self._rows[cache_key] = rows
+        return rows
+
+    def mask(self, where: dict | None) -> np.ndarray | None:
+        """Boolean mask of the chunks matching `where`, None without a filter."""
+        rows = self.rows(where)
+        if rows is None:
+            return None
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[rows] = True
+        return mask
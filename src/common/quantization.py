@@ -0,0 +1,205 @@
+from abc import ABC, abstractmethod
+import numpy as np
+import os
+
+# codes decoded to float32 per matrix product, small enough to stay in cache
+BLOCK_ROWS = 1024
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount(bits: np.ndarray) -> np.ndarray:
+    """Set bits per byte, numpy >= 2.0 has a native kernel."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(bits)
+    return POPCOUNT[bits]
+
+
+class QuantizedVectors(ABC):
+    """
+    Compressed copy of the L2-normalized chunk embeddings for a first-pass
+    search. `scores` only has to rank well: the shortlist it selects is
+    rescored against the full-precision vectors.
+    """
+
+    kind: str = ""
+
+    @classmethod
+    @abstractmethod
+    def encode(cls, embeddings: np.ndarray, **kwargs) -> "QuantizedVectors":
+        return
+
+    @classmethod
+    @abstractmethod
+    def concatenate(cls, parts: list["QuantizedVectors"]) -> "QuantizedVectors":
+        """Rows of `parts` in order, for embeddings encoded page by page."""
+        return
+
+    @abstractmethod
+    def scores(self, queries: np.ndarray, rows: np.ndarray | None = None):
+        """Approximate similarity of each query to each row, (queries, rows)."""
+        return
+
+    @abstractmethod
+    def save(self, path: str):
+        return
+
+    @classmethod
+    @abstractmethod
+    def load(cls, path: str) -> "QuantizedVectors":
+        return
+
+    @property
+    @abstractmethod
+    def nbytes(self) -> int:
+        return
+
+
+class Int8Vectors(QuantizedVectors):
+    """Symmetric int8 per row: `x ~ codes * scale`, 1 byte per dimension."""
+
+    kind = "int8"
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray):
+        self.codes = codes
+        self.scales = scales
+
+    @classmethod
+    def encode(cls, embeddings: np.ndarray, **kwargs) -> "Int8Vectors":
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        scales = np.abs(embeddings).max(axis=1) / 127
+        scales[scales == 0] = 1
+        codes = np.round(embeddings / scales[:, None]).astype(np.int8)
+        return cls(codes, scales.astype(np.float32))
+
+    @classmethod
+    def concatenate(cls, parts: list["Int8Vectors"]) -> "Int8Vectors":
+        return cls(
+            np.concatenate([part.codes for part in parts]),
+            np.concatenate([part.scales for part in parts]),
+        )
+
+    def scores(self, queries: np.ndarray, rows: np.ndarray | None = None):
+        codes = self.codes if rows is None else self.codes[rows]
+        scales = self.scales if rows is None else self.scales[rows]
+        scores = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), BLOCK_ROWS):
+            block = np.asarray(codes[start : start + BLOCK_ROWS], dtype=np.float32)
+            scores[:, start : start + BLOCK_ROWS] = queries @ block.T
+        return scores * scales
+
+    def save(self, path: str):
+        np.save(os.path.join(path, "quantized_int8.npy"), self.codes)
+        np.save(os.path.join(path, "quantized_scales.npy"), self.scales)
+
+    @classmethod
+    def load(cls, path: str) -> "Int8Vectors":
+        return cls(
+            codes=np.load(os.path.join(path, "quantized_int8.npy"), mmap_mode="r"),
+            scales=np.load(os.path.join(path, "quantized_scales.npy")),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.scales.nbytes
+
+
+class BinaryVectors(QuantizedVectors):
+    """Sign bit per dimension, 1/32 of float32; ranked by Hamming distance."""
+
+    kind = "binary"
+
+    def __init__(self, bits: np.ndarray):
+        self.bits = bits
+
+    @staticmethod
+    def _pack(matrix: np.ndarray) -> np.ndarray:
+        return np.packbits(np.asarray(matrix) > 0, axis=1)
+
+    @classmethod
+    def encode(cls, embeddings: np.ndarray, **kwargs) -> "BinaryVectors":
+        return cls(cls._pack(embeddings))
+
+    @classmethod
+    def concatenate(cls, parts: list["BinaryVectors"]) -> "BinaryVectors":
+        return cls(np.concatenate([part.bits for part in parts]))
+
+    def scores(self, queries: np.ndarray, rows: np.ndarray | None = None):
+        bits = self.bits if rows is None else self.bits[rows]
+        query_bits = self._pack(queries)
+        scores = np.empty((len(queries), len(bits)), dtype=np.float32)
+        for start in range(0, len(bits), BLOCK_ROWS):
+            block = np.asarray(bits[start : start + BLOCK_ROWS])
+            distances = popcount(query_bits[:, None, :] ^ block[None, :, :])
+            scores[:, start : start + BLOCK_ROWS] = -distances.sum(
+                axis=2, dtype=np.int32
+            )
+        return scores
+
+    def save(self, path: str):
+        np.save(os.path.join(path, "quantized_binary.npy"), self.bits)
+
+    @classmethod
+    def load(cls, path: str) -> "BinaryVectors":
+        bits = np.load(os.path.join(path, "quantized_binary.npy"), mmap_mode="r")
+        return cls(bits)
+
+    @property
+    def nbytes(self) -> int:
+        return self.bits.nbytes
+
+
+class MatryoshkaVectors(QuantizedVectors):
+    """
+    Leading `dim` dimensions, renormalized, float32. Jina v3 is trained
+    with Matryoshka representation learning, so prefixes keep most of the
+    ranking quality.
+    """
+
+    kind = "matryoshka"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @staticmethod
+    def _truncate(matrix: np.ndarray, dim: int) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)[:, :dim]
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def encode(
+        cls, embeddings: np.ndarray, dim: int = 256, **kwargs
+    ) -> "MatryoshkaVectors":
+        return cls(cls._truncate(embeddings, dim))
+
+    @classmethod
+    def concatenate(cls, parts: list["MatryoshkaVectors"]) -> "MatryoshkaVectors":
+        return cls(np.concatenate([part.vectors for part in parts]))
+
+    def scores(self, queries: np.ndarray, rows: np.ndarray | None = None):
+        vectors = self.vectors if rows is None else self.vectors[rows]
+        return self._truncate(queries, self.dim) @ vectors.T
+
+    def save(self, path: str):
+        np.save(os.path.join(path, "quantized_matryoshka.npy"), self.vectors)
+
+    @classmethod
+    def load(cls, path: str) -> "MatryoshkaVectors":
+        return cls(
+            np.load(os.path.join(path, "quantized_matryoshka.npy"), mmap_mode="r")
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.vectors.nbytes
+
+
+QUANTIZERS = {
+    "int8": Int8Vectors,
+    "binary": BinaryVectors,
+    "matryoshka": MatryoshkaVectors,
+}
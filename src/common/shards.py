@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+
+# file name -> Chroma collection name, next to the collections in the DB directory
+SHARD_MANIFEST_FILE = "shards.json"
+
+
+def shard_collection_name(file_name: str) -> str:
+    """Chroma collection of one RFP; names allow [a-zA-Z0-9._-], 3 to 63 chars."""
+    return f"rfp_{hashlib.sha1(file_name.encode('utf-8')).hexdigest()[:16]}"
+
+
+def read_shard_manifest(persist_directory: str) -> dict[str, str]:
+    path = os.path.join(persist_directory, SHARD_MANIFEST_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(
+            f"Shard manifest not found at '{path}'. "
+            "Please run the ingestion script with SHARD_BY_FILE enabled first."
+        )
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_shard_manifest(persist_directory: str, shards: dict[str, str]):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, SHARD_MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(shards.items())), f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def filter_file_names(where: dict | None) -> set[str] | None:
+    """
+    File names a filter is restricted to, None when it may match any file.
+    Understands `file_name` as a value, `$eq` or `$in`, alone or under `$and`.
+    """
+    if not where:
+        return None
+    files = None
+    for key, condition in where.items():
+        if key == "$and":
+            restricted = [filter_file_names(c) for c in condition]
+            restricted = [names for names in restricted if names is not None]
+        elif key != "file_name":
+            continue
+        elif isinstance(condition, dict) and "$eq" in condition:
+            restricted = [{condition["$eq"]}]
+        elif isinstance(condition, dict) and "$in" in condition:
+            restricted = [set(condition["$in"])]
+        elif isinstance(condition, dict):
+            continue
+        else:
+            restricted = [{condition}]
+        for names in restricted:
+            files = names if files is None else files & names
+    return files
@@ -1,5 +1,8 @@
 from contextlib import contextmanager
+import json
+import math
 import time
+import os
 
 
 @contextmanager
@@ -8,3 +11,45 @@ def measure_time(label, log):
     yield
     end = time.time()
     log.info(f"{label} took {end - start:.2f} seconds")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate LLM token count, about four characters per token."""
+    return math.ceil(len(text) / 4)
+
+
+def read_index_generation(path: str) -> int:
+    """Generation number of the vector index, 0 before the first ingestion."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("generation", 0))
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def release_chroma_clients():
+    """
+    Chroma caches one client per path, drop them so a rebuilt directory is
+    re-opened instead of the deleted one.
+    """
+    try:
+        from chromadb.api.client import SharedSystemClient
+
+        SharedSystemClient.clear_system_cache()
+    except ImportError:
+        pass
+
+
+def bump_index_generation(path: str) -> int:
+    """Increment the index generation after the index content changed."""
+    generation = read_index_generation(path) + 1
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"generation": generation, "updated_at": time.time()}, f)
+    os.replace(tmp_path, path)
+    return generation
+
+
+def format_sse_event(event: str, data) -> str:
+    """Server-sent event frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
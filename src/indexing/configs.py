@@ -1,3 +1,5 @@
+import os
+
 # Remove header footer
 MAX_CHARS = 100
 COUNT_THRESHOLD = 8
@@ -7,9 +9,76 @@ MIN_TOKENS = 100
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 100
 SEPARATORS = ["#", "##", "###", "####", "####", "\n\n", "\n", "."]
+# processes parsing and chunking PDFs in parallel, 1 chunks them in-process
+CHUNK_WORKERS = os.cpu_count() or 1
+CHUNK_PREFETCH = 2  # PDFs parsed ahead per worker while earlier ones are embedded
+# parsed markdown per PDF, gzip JSON keyed by content hash and pymupdf4llm
+# version: re-chunking and re-ingests skip parsing unchanged PDFs
+MARKDOWN_CACHE_ENABLED = True
+MARKDOWN_CACHE_DIRECTORY = "./markdown_cache"
+
+# streaming ingestion: chunks are embedded and upserted in batches as PDFs are
+# parsed, an interrupted run resumes from the last committed batch
+INGEST_BATCH_SIZE = 256  # chunks per upsert, embedded over several requests
+INGEST_QUEUE_SIZE = 4  # batches waiting to be embedded before parsing pauses
+
+EMBEDDING_MODEL = "jina-embeddings-v3"
+# embedding requests: cut by estimated tokens, several in flight, the limit is
+# halved when the API throttles (429) and failed requests are retried alone
+EMBED_BATCH_TOKENS = 8192
+EMBED_BATCH_MAX_TEXTS = 128
+EMBED_MAX_CONCURRENCY = 8
+EMBED_MAX_RETRIES = 6
+# chunk embeddings by (model, text hash) on disk, float32 blobs: chunks left
+# unchanged by a chunking change are not embedded again
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = "./embedding_cache/chunk_embeddings.sqlite"
+EMBEDDING_CACHE_MAX_AGE_DAYS = 90  # entries unused for longer are evicted
+EMBEDDING_CACHE_MAX_MB = 2048  # least recently used entries evicted beyond this
+
+# near-duplicate chunks (shared boilerplate) embedded once, MinHash + LSH
+DEDUP_ENABLED = True
+DEDUP_THRESHOLD = 0.8  # estimated Jaccard similarity of word shingles
+DEDUP_NUM_PERM = 128
+DEDUP_BANDS = 32  # 4 rows per band, pairs above ~0.42 similarity are compared
+DEDUP_SHINGLE_SIZE = 5
+# signatures of the stored chunks, new chunks are matched against them
+DEDUP_SIGNATURES_PATH = "./dedup_signatures.bin"
 
 # Data
 DATA_DIR = "data/"
 
 # vector DB
 DB_PERSIST_DIRECTORY = "./chroma_db"
+INDEX_GENERATION_PATH = "./index_generation.json"
+# content hash and chunk ids per PDF, only new or changed PDFs are re-embedded
+INGEST_MANIFEST_PATH = "./ingest_manifest.json"
+# one Chroma collection per RFP, searched with VECTOR_STORE_TYPE="sharded_chroma".
+# Each PDF is chunked and embedded in memory and written as a whole shard: the
+# batch streaming and mid-file resume of the single collection do not apply,
+# and near-duplicates are only merged within a file, never across RFPs
+SHARD_BY_FILE = False
+
+# sparse index, persisted next to the vector DB
+BM25_INDEX_DIRECTORY = "./bm25_index"
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# metadata row-id lists used to pre-filter the vector search
+METADATA_INDEX_DIRECTORY = "./metadata_index"
+METADATA_INDEX_KEYS = ["file_name", "company", "project"]
+# company/project extracted from the first section of each RFP, one LLM call per PDF
+EXTRACT_RFP_METADATA = False
+
+# exact flat vector index exported from Chroma, used with VECTOR_STORE_TYPE="flat"
+BUILD_FLAT_INDEX = True
+FLAT_INDEX_DIRECTORY = "./flat_index"
+# chunks read back from Chroma per request when the indexes are rebuilt
+INDEX_READ_PAGE_SIZE = 1000
+FLAT_INDEX_DTYPE = "float32"  # "float16" halves the size, scans are slower
+# compressed copy scanned first, full-precision rows only read for the shortlist:
+# None, "int8" (1/4 size), "binary" (1/32) or "matryoshka" (leading dims).
+# int8 only saves memory, its scans are slower than float32 ones; binary and
+# matryoshka scan faster but need large rescore factors (FLAT_RESCORE_FACTORS)
+FLAT_INDEX_QUANTIZATION = None
+FLAT_INDEX_MATRYOSHKA_DIM = 256
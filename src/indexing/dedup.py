@@ -0,0 +1,212 @@
+from langchain_core.documents import Document
+from src.common.metadata_table import MEMBER_FILES_KEY, member_file_flags
+import numpy as np
+import zlib
+import os
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+class MinHashDeduplicator:
+    """
+    Groups near-duplicate texts with MinHash signatures over word shingles and
+    locality-sensitive hashing: signatures are cut into `bands` bands and texts
+    sharing any band are candidates. Candidates whose estimated Jaccard
+    similarity reaches `threshold` end up in the same group.
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 128,
+        bands: int = 32,
+        threshold: float = 0.8,
+        shingle_size: int = 5,
+        seed: int = 0,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def _shingle_hashes(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall(text.lower())
+        size = min(self.shingle_size, len(words))
+        shingles = {
+            " ".join(words[i : i + size]) for i in range(len(words) - size + 1)
+        }
+        return np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles if s),
+            dtype=np.uint64,
+        )
+
+    def signature(self, text: str) -> np.ndarray | None:
+        """MinHash signature of `text`, None when it has no words."""
+        hashes = self._shingle_hashes(text)
+        if not len(hashes):
+            return None
+        # universal hashing, products wrap around 2**64 like datasketch's
+        permuted = (np.outer(hashes, self.a) + self.b) % MERSENNE_PRIME & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def groups(self, texts: list[str]) -> list[list[int]]:
+        """Indices of `texts` grouped by near-duplication, each group sorted."""
+        return self.group_signatures([self.signature(text) for text in texts])
+
+    def group_signatures(
+        self, signatures: list[np.ndarray | None]
+    ) -> list[list[int]]:
+        """Same as `groups`, from precomputed signatures (None never groups)."""
+        parents = list(range(len(signatures)))
+
+        def find(i: int) -> int:
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        rows = self.num_perm // self.bands
+        for band in range(self.bands):
+            buckets: dict[bytes, list[int]] = {}
+            for i, signature in enumerate(signatures):
+                if signature is not None:
+                    key = signature[band * rows : (band + 1) * rows].tobytes()
+                    buckets.setdefault(key, []).append(i)
+            for members in buckets.values():
+                for n, i in enumerate(members):
+                    for j in members[n + 1 :]:
+                        root_i, root_j = find(i), find(j)
+                        if root_i == root_j:
+                            continue
+                        similarity = np.mean(signatures[i] == signatures[j])
+                        if similarity >= self.threshold:
+                            parents[max(root_i, root_j)] = min(root_i, root_j)
+
+        grouped: dict[int, list[int]] = {}
+        for i in range(len(signatures)):
+            grouped.setdefault(find(i), []).append(i)
+        return list(grouped.values())
+
+    def deduplicate(self, documents: list[Document]) -> list[Document]:
+        """
+        Keep the first chunk of each near-duplicate group. Its metadata gets
+        the comma-joined names of the files the group spans (`member_files`),
+        a flag per file for Chroma filters and the number of chunks it stands
+        for (`duplicate_chunks`).
+        """
+        representatives = []
+        for group in self.groups([doc.page_content for doc in documents]):
+            representative = documents[group[0]]
+            if len(group) > 1:
+                files = sorted(
+                    {documents[i].metadata.get("file_name", "") for i in group}
+                )
+                representative.metadata[MEMBER_FILES_KEY] = ",".join(files)
+                representative.metadata["duplicate_chunks"] = len(group) - 1
+                representative.metadata.update(member_file_flags(files))
+            representatives.append(representative)
+        return representatives
+
+
+class MinHashLSH:
+    """
+    Incremental LSH index of MinHash signatures by chunk id, so chunks can be
+    matched one file at a time against every chunk stored before them.
+    """
+
+    def __init__(self, deduplicator: MinHashDeduplicator):
+        self.threshold = deduplicator.threshold
+        self.rows = deduplicator.num_perm // deduplicator.bands
+        self.buckets: list[dict[bytes, list[str]]] = [
+            {} for _ in range(deduplicator.bands)
+        ]
+        self.signatures: dict[str, np.ndarray] = {}
+        self._order: dict[str, int] = {}
+        self._inserted = 0
+
+    def _keys(self, signature: np.ndarray):
+        for band, buckets in enumerate(self.buckets):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            yield buckets, rows.tobytes()
+
+    def query(self, signature: np.ndarray) -> str | None:
+        """Earliest inserted chunk similar to `signature`, if any."""
+        match, seen = None, set()
+        for buckets, key in self._keys(signature):
+            for doc_id in buckets.get(key, ()):
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                if match is not None and self._order[doc_id] > self._order[match]:
+                    continue
+                if np.mean(self.signatures[doc_id] == signature) >= self.threshold:
+                    match = doc_id
+        return match
+
+    def insert(self, doc_id: str, signature: np.ndarray):
+        self.signatures[doc_id] = signature
+        self._order[doc_id] = self._inserted
+        self._inserted += 1
+        for buckets, key in self._keys(signature):
+            buckets.setdefault(key, []).append(doc_id)
+
+    def remove(self, doc_id: str):
+        signature = self.signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        del self._order[doc_id]
+        for buckets, key in self._keys(signature):
+            members = buckets[key]
+            members.remove(doc_id)
+            if not members:
+                del buckets[key]
+
+
+class SignatureLog:
+    """
+    MinHash signatures of the stored chunks as fixed-size binary records
+    (chunk id, uint32 signature). Records are appended batch by batch as
+    chunks are committed; `write` compacts the file to the live chunks.
+    """
+
+    def __init__(self, path: str, num_perm: int):
+        self.path = path
+        self.dtype = np.dtype([("id", "S32"), ("signature", "<u4", (num_perm,))])
+
+    def load(self, chunk_ids) -> dict[str, np.ndarray]:
+        """Signatures of `chunk_ids`, the last record of a chunk wins."""
+        if not os.path.exists(self.path):
+            return {}
+        # a record torn by an interrupted append is dropped
+        count = os.path.getsize(self.path) // self.dtype.itemsize
+        records = np.fromfile(self.path, dtype=self.dtype, count=count)
+        signatures = {}
+        for doc_id, signature in zip(records["id"], records["signature"]):
+            doc_id = doc_id.decode("ascii")
+            if doc_id in chunk_ids:
+                signatures[doc_id] = signature
+        return signatures
+
+    def _records(self, signatures: dict[str, np.ndarray]) -> np.ndarray:
+        records = np.empty(len(signatures), dtype=self.dtype)
+        if signatures:
+            records["id"] = list(signatures)
+            records["signature"] = list(signatures.values())
+        return records
+
+    def append(self, signatures: dict[str, np.ndarray]):
+        if signatures:
+            with open(self.path, "ab") as f:
+                f.write(self._records(signatures).tobytes())
+
+    def write(self, signatures: dict[str, np.ndarray]):
+        tmp_path = f"{self.path}.tmp"
+        self._records(signatures).tofile(tmp_path)
+        os.replace(tmp_path, self.path)
@@ -13,9 +13,41 @@ from langchain_core.documents import Document
 from src.indexing import configs
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import JinaEmbeddings
 from src.common.logger import setup_logger
+from src.common.utils import bump_index_generation, release_chroma_clients
+from src.common.bm25_index import BM25Builder, BM25Index
+from src.common.flat_index import FlatIndex, FlatIndexWriter
+from src.common.metadata_index import MetadataIndex
+from src.common.shards import (
+    shard_collection_name,
+    read_shard_manifest,
+    write_shard_manifest,
+)
+from src.common.metadata_table import (
+    MetadataColumns,
+    MEMBER_FILES_KEY,
+    is_member_file_flag,
+    member_file_flags,
+)
+from src.rag.embeddings import AsyncJinaEmbeddings
+from src.rag.embedding_executor import BatchedEmbeddings
+from src.rag.embedding_cache import ChunkEmbeddingCache
+from src.common.embedding_store import EmbeddingStore
+from src.indexing.dedup import MinHashDeduplicator, MinHashLSH, SignatureLog
+from src.indexing.manifest import (
+    IngestManifest,
+    IngestPlan,
+    chunk_id,
+    chunking_config_version,
+    file_sha256,
+)
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Iterator
 from dotenv import load_dotenv
+import numpy as np
 import os
 import shutil
 
@@ -47,8 +79,10 @@ def create_finalize_chunks(sections: list[str], file_name):
     1- check is any heading to heading section require furter chunking, if require do recurrsive charater for that particular section only.
     2- add Metadata for each chunk
     """
-    # rfp_metadata = extract_rfp_metadata(sections[0], file_name)
-    rfp_metadata = {"file_name": file_name}
+    if configs.EXTRACT_RFP_METADATA:
+        rfp_metadata = extract_rfp_metadata(sections[0], file_name)
+    else:
+        rfp_metadata = {"file_name": file_name}
     final_chunks = []
     for section in sections:
         clean_section = rm_markdown(section)
@@ -63,6 +97,9 @@ def create_finalize_chunks(sections: list[str], file_name):
             final_chunks.append(
                 Document(page_content=clean_section, metadata=rfp_metadata.copy())
             )
+    # position in the file, lets the context packer merge neighbouring chunks
+    for chunk_index, chunk in enumerate(final_chunks):
+        chunk.metadata["chunk_index"] = chunk_index
     return final_chunks
 
 
@@ -94,39 +131,816 @@ def chunk_pdf(pdf_path: str) -> list:
     return chunks
 
 
+def list_pdfs(pdfs_dir: str) -> list[str]:
+    return sorted(
+        file for file in os.listdir(pdfs_dir) if file.lower().endswith(".pdf")
+    )
+
+
+def chunk_pdf_or_error(pdf_path: str) -> list[Document] | Exception:
+    """`chunk_pdf` that returns its error, one bad PDF does not stop a batch."""
+    try:
+        return chunk_pdf(pdf_path)
+    except Exception as e:
+        # plain error, whatever the parser raised has to cross the process pool
+        return RuntimeError(f"{type(e).__name__}: {e}")
+
+
+def iter_chunked_pdfs(
+    pdf_paths: list[str], workers: int | None = None
+) -> Iterator[tuple[str, list[Document] | Exception]]:
+    """
+    File name and chunks (or error) of each PDF, in `pdf_paths` order, as
+    soon as they are ready. Parsing is CPU-bound, so with several `workers`
+    (`CHUNK_WORKERS` by default) the PDFs are chunked on a process pool, at
+    most `CHUNK_PREFETCH` per worker ahead of the consumer. A worker crash
+    breaks the whole pool: the file being waited on is then retried alone,
+    so it only fails if it crashes again, and the unfinished files are
+    resubmitted to a new pool.
+    """
+    workers = min(workers or configs.CHUNK_WORKERS, len(pdf_paths))
+    if workers <= 1:
+        for path in pdf_paths:
+            yield chunked_pdf_result(path, chunk_pdf_or_error(path))
+        return
+
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = deque()
+        paths = iter(pdf_paths)
+        while True:
+            for path in paths:
+                pending.append((path, submit_chunking(executor, path)))
+                if len(pending) >= workers * configs.CHUNK_PREFETCH:
+                    break
+            if not pending:
+                break
+            path, future = pending.popleft()
+            result = future_result(future)
+            if isinstance(result, BrokenProcessPool):
+                log.warning(f"Chunking pool broke while on {path}, retrying alone.")
+                executor.shutdown()
+                result = chunk_pdf_isolated(path)
+                executor = ProcessPoolExecutor(max_workers=workers)
+                pending = deque(
+                    (p, f if chunked(f) else submit_chunking(executor, p))
+                    for p, f in pending
+                )
+            yield chunked_pdf_result(path, result)
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def submit_chunking(executor: ProcessPoolExecutor, path: str) -> Future:
+    """Chunking future of `path`, failed with the error when the pool is broken."""
+    try:
+        return executor.submit(chunk_pdf_or_error, path)
+    except BrokenProcessPool as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def chunked(future) -> bool:
+    """Whether the future holds chunks that survived a pool crash."""
+    return future.done() and not isinstance(future.exception(), BrokenProcessPool)
+
+
+def chunk_pdf_isolated(path: str) -> list[Document] | Exception:
+    """Chunk one PDF in its own worker process, a crash only fails this file."""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        return future_result(executor.submit(chunk_pdf_or_error, path))
+
+
+def future_result(future) -> list[Document] | Exception:
+    try:
+        return future.result()
+    except Exception as e:
+        # the worker process died, e.g. in the PDF parser
+        return e
+
+
+def chunked_pdf_result(
+    path: str, result: list[Document] | Exception
+) -> tuple[str, list[Document] | Exception]:
+    if isinstance(result, Exception):
+        log.error(f"Failed to chunk {path}: {result}")
+    return os.path.basename(path), result
+
+
+def chunk_pdfs(
+    pdf_paths: list[str], workers: int | None = None
+) -> tuple[dict[str, list[Document]], dict[str, str]]:
+    """
+    Chunks of each PDF by file name, in `pdf_paths` order, and the error of
+    each PDF that failed, see `iter_chunked_pdfs`.
+    """
+    chunks_by_file, failures = {}, {}
+    for file_name, result in iter_chunked_pdfs(pdf_paths, workers):
+        if isinstance(result, Exception):
+            failures[file_name] = str(result)
+        else:
+            chunks_by_file[file_name] = result
+    return chunks_by_file, failures
+
+
 def chunk_all_pdfs(pdfs_dir: str) -> list[str]:
-    all_chunks = []
-    for file in os.listdir(pdfs_dir):
-        if file.lower().endswith(".pdf"):
-            pdf_path = os.path.join(pdfs_dir, file)
-            chunks = chunk_pdf(pdf_path)
-            all_chunks.extend(chunks)
+    paths = [os.path.join(pdfs_dir, file) for file in list_pdfs(pdfs_dir)]
+    chunks_by_file, _ = chunk_pdfs(paths)
+    all_chunks = [chunk for chunks in chunks_by_file.values() for chunk in chunks]
     log.info(f"Total Chunks Created from all PDFs: {len(all_chunks)}")
     return all_chunks
 
 
-def ingest_data():
-    # Clear existing database directory
-    log.info("Starting data ingestion process...")
+def get_deduplicator() -> MinHashDeduplicator:
+    return MinHashDeduplicator(
+        num_perm=configs.DEDUP_NUM_PERM,
+        bands=configs.DEDUP_BANDS,
+        threshold=configs.DEDUP_THRESHOLD,
+        shingle_size=configs.DEDUP_SHINGLE_SIZE,
+    )
+
+
+def deduplicate_chunks(documents: list[Document]) -> list[Document]:
+    """Keep one chunk per group of near-duplicates, see `MinHashDeduplicator`."""
+    unique_documents = get_deduplicator().deduplicate(documents)
+    log.info(
+        f"Near-duplicate removal kept {len(unique_documents)}/{len(documents)} "
+        f"chunks, {len(documents) - len(unique_documents)} embeddings saved."
+    )
+    return unique_documents
+
+
+def get_ingest_embeddings() -> BatchedEmbeddings | ChunkEmbeddingCache:
+    """
+    Jina client batching, parallelizing and retrying the chunk embeddings,
+    behind the chunk embedding cache when enabled.
+    """
+    embeddings = BatchedEmbeddings(
+        AsyncJinaEmbeddings(model_name=configs.EMBEDDING_MODEL),
+        max_batch_tokens=configs.EMBED_BATCH_TOKENS,
+        max_batch_texts=configs.EMBED_BATCH_MAX_TEXTS,
+        max_concurrency=configs.EMBED_MAX_CONCURRENCY,
+        max_retries=configs.EMBED_MAX_RETRIES,
+    )
+    if configs.EMBEDDING_CACHE_ENABLED:
+        embeddings = ChunkEmbeddingCache(
+            embeddings,
+            store=EmbeddingStore(configs.EMBEDDING_CACHE_PATH),
+            model_name=configs.EMBEDDING_MODEL,
+        )
+    return embeddings
+
+
+def evict_embedding_cache():
+    """Keep the chunk embedding cache within its age and size limits."""
+    if not configs.EMBEDDING_CACHE_ENABLED:
+        return
+    store = EmbeddingStore(configs.EMBEDDING_CACHE_PATH)
     try:
-        if os.path.exists(configs.DB_PERSIST_DIRECTORY):
-            shutil.rmtree(configs.DB_PERSIST_DIRECTORY)
-
-        log.info("Cleared existing database directory.")
-        # get chunks of all pdf files
-        documents = chunk_all_pdfs(configs.DATA_DIR)
-        if not documents:
-            log.warning("No documents to ingest. Exiting ingestion process.")
+        evicted = store.evict(
+            max_age_seconds=configs.EMBEDDING_CACHE_MAX_AGE_DAYS * 24 * 3600,
+            max_bytes=configs.EMBEDDING_CACHE_MAX_MB * 2**20,
+        )
+        if evicted:
+            log.info(f"Evicted {evicted} chunk embeddings from the cache.")
+    finally:
+        store.close()
+
+
+def save_bm25_index(index: BM25Index):
+    index.save(configs.BM25_INDEX_DIRECTORY)
+    log.info(
+        f"BM25 index saved to {configs.BM25_INDEX_DIRECTORY}: "
+        f"{index.num_docs} chunks, {len(index.vocab)} terms."
+    )
+
+
+def save_metadata_index(index: MetadataIndex):
+    index.save(configs.METADATA_INDEX_DIRECTORY)
+    log.info(f"Metadata index saved to {configs.METADATA_INDEX_DIRECTORY}.")
+
+
+def remove_indexes():
+    """Delete the saved indexes so none outlives the chunks it was built from."""
+    for directory in (
+        configs.BM25_INDEX_DIRECTORY,
+        configs.METADATA_INDEX_DIRECTORY,
+        configs.FLAT_INDEX_DIRECTORY,
+    ):
+        if os.path.exists(directory):
+            shutil.rmtree(directory)
+            log.info(f"Removed stale index {directory}.")
+
+
+def flat_index_writer(num_rows: int, dim: int) -> FlatIndexWriter:
+    return FlatIndexWriter(
+        configs.FLAT_INDEX_DIRECTORY,
+        num_rows=num_rows,
+        dim=dim,
+        dtype=configs.FLAT_INDEX_DTYPE,
+        quantization=configs.FLAT_INDEX_QUANTIZATION,
+        matryoshka_dim=configs.FLAT_INDEX_MATRYOSHKA_DIM,
+    )
+
+
+def log_flat_index(num_rows: int):
+    log.info(
+        f"Flat vector index saved to {configs.FLAT_INDEX_DIRECTORY}: "
+        f"{num_rows} chunks, {configs.FLAT_INDEX_DTYPE}, "
+        f"quantization {configs.FLAT_INDEX_QUANTIZATION}."
+    )
+
+
+def build_shard(
+    file_name: str, file_hash: str, documents: list[Document], embeddings
+) -> list[str]:
+    """(Re)build the Chroma collection of one RFP, returns its chunk ids."""
+    collection_name = shard_collection_name(file_name)
+    Chroma(
+        collection_name=collection_name,
+        embedding_function=embeddings,
+        persist_directory=configs.DB_PERSIST_DIRECTORY,
+    ).delete_collection()
+    if not documents:
+        return []
+    if configs.DEDUP_ENABLED:
+        # within the file only, a shard never depends on another RFP
+        documents = deduplicate_chunks(documents)
+    ids = [chunk_id(file_hash, doc.metadata["chunk_index"]) for doc in documents]
+    vector_db = Chroma(
+        collection_name=collection_name,
+        embedding_function=embeddings,
+        persist_directory=configs.DB_PERSIST_DIRECTORY,
+    )
+    for start in range(0, len(documents), configs.INGEST_BATCH_SIZE):
+        end = start + configs.INGEST_BATCH_SIZE
+        vector_db.add_documents(documents[start:end], ids=ids[start:end])
+    log.info(f"Shard {collection_name} of {file_name}: {len(documents)} chunks.")
+    return ids
+
+
+def iter_store_pages(
+    stores: list[Chroma], include: list[str], ids: list[str] | None = None
+) -> Iterator[dict]:
+    """
+    Chunks of every collection of `stores`, or only those with the given
+    `ids`, `INDEX_READ_PAGE_SIZE` at a time.
+    """
+    if ids is not None:
+        for start in range(0, len(ids), configs.INDEX_READ_PAGE_SIZE):
+            page_ids = ids[start : start + configs.INDEX_READ_PAGE_SIZE]
+            for store in stores:
+                page = store._collection.get(ids=page_ids, include=include)
+                if page["ids"]:
+                    yield page
+        return
+    for store in stores:
+        offset = 0
+        while True:
+            page = store._collection.get(
+                include=include, limit=configs.INDEX_READ_PAGE_SIZE, offset=offset
+            )
+            if not page["ids"]:
+                break
+            yield page
+            offset += len(page["ids"])
+
+
+def build_indexes_from_stores(stores: list[Chroma]) -> int:
+    """
+    Rebuild the BM25, metadata and flat indexes from the chunks stored in the
+    vector store collections, without embedding anything. Chunks are read
+    page by page into the index builders: texts are only kept for the flat
+    index, whose matrix is written straight to disk, and embeddings are only
+    read when it is built. Returns the total chunk count.
+    """
+    include = ["documents", "metadatas"]
+    if configs.BUILD_FLAT_INDEX:
+        include.append("embeddings")
+    total = sum(store._collection.count() for store in stores)
+    ids, columns, bm25 = [], MetadataColumns(), BM25Builder()
+    flat = None
+    for page in iter_store_pages(stores, include):
+        ids.extend(page["ids"])
+        columns.extend([metadata or {} for metadata in page["metadatas"]])
+        bm25.add(page["documents"])
+        if configs.BUILD_FLAT_INDEX:
+            if flat is None:
+                flat = flat_index_writer(total, dim=len(page["embeddings"][0]))
+            flat.add(page["ids"], page["documents"], page["embeddings"])
+    if not ids:
+        log.warning("No chunks stored in the vector store.")
+        remove_indexes()
+        return 0
+
+    metadata = columns.table()
+    save_bm25_index(bm25.build(ids, metadata, k1=configs.BM25_K1, b=configs.BM25_B))
+    save_metadata_index(
+        MetadataIndex.from_columns(ids, columns, configs.METADATA_INDEX_KEYS)
+    )
+    if flat is not None:
+        log_flat_index(flat.finish(metadata))
+    return len(ids)
+
+
+def update_indexes_from_stores(
+    stores: list[Chroma], manifest: IngestManifest
+) -> int | None:
+    """
+    Update the BM25, metadata and flat indexes instead of rebuilding them:
+    the rows of chunks still stored and not in `manifest.unindexed_chunks`
+    are kept from the saved indexes, only the chunks written since they were
+    built are read back from the vector store. Returns the total chunk
+    count, or None when the indexes have to be rebuilt in full: unknown
+    changes, missing indexes or index settings changed since.
+    """
+    if manifest.unindexed_chunks is None:
+        return None
+    try:
+        bm25 = BM25Index.load(configs.BM25_INDEX_DIRECTORY)
+        flat = None
+        if configs.BUILD_FLAT_INDEX:
+            flat = FlatIndex.load(configs.FLAT_INDEX_DIRECTORY)
+    except FileNotFoundError:
+        return None
+    if (
+        bm25.postings_freqs is None
+        or bm25.meta["k1"] != configs.BM25_K1
+        or bm25.meta["b"] != configs.BM25_B
+    ):
+        return None
+    if flat is not None and (
+        flat.embeddings.dtype != np.dtype(configs.FLAT_INDEX_DTYPE)
+        or set(flat.ids) != set(bm25.doc_ids)
+    ):
+        return None
+
+    stored = set(manifest.references())
+    keep = np.flatnonzero(
+        [
+            doc_id in stored and doc_id not in manifest.unindexed_chunks
+            for doc_id in bm25.doc_ids
+        ]
+    )
+    ids = bm25.doc_ids[keep].tolist()
+    include = ["documents", "metadatas"]
+    if flat is not None:
+        include.append("embeddings")
+    # only the changed chunks are held in memory
+    pages = list(iter_store_pages(stores, include, sorted(stored.difference(ids))))
+    num_read = sum(len(page["ids"]) for page in pages)
+
+    columns = MetadataColumns()
+    columns.extend_rows(bm25.metadata, keep)
+    builder = BM25Builder.from_index(bm25, keep)
+    writer = None
+    if flat is not None:
+        writer = flat_index_writer(len(ids) + num_read, dim=flat.embeddings.shape[1])
+        for start in range(0, len(ids), configs.INDEX_READ_PAGE_SIZE):
+            page_ids = ids[start : start + configs.INDEX_READ_PAGE_SIZE]
+            rows = [flat.positions[doc_id] for doc_id in page_ids]
+            writer.add(
+                page_ids, [flat.texts[row] for row in rows], flat.embeddings[rows]
+            )
+    for page in pages:
+        ids.extend(page["ids"])
+        columns.extend([metadata or {} for metadata in page["metadatas"]])
+        builder.add(page["documents"])
+        if writer is not None:
+            writer.add(page["ids"], page["documents"], page["embeddings"])
+    log.info(
+        f"Updating the indexes: {len(keep)} chunks kept, {num_read} read back, "
+        f"{bm25.num_docs - len(keep)} dropped."
+    )
+    if not ids:
+        log.warning("No chunks stored in the vector store.")
+        remove_indexes()
+        return 0
+
+    metadata = columns.table()
+    save_bm25_index(builder.build(ids, metadata, k1=configs.BM25_K1, b=configs.BM25_B))
+    save_metadata_index(
+        MetadataIndex.from_columns(ids, columns, configs.METADATA_INDEX_KEYS)
+    )
+    if writer is not None:
+        log_flat_index(writer.finish(metadata))
+    return len(ids)
+
+
+def shared_chunk_metadata(metadata: dict, files: list[str], references: int) -> dict:
+    """Metadata of a stored chunk after the set of files referencing it changed."""
+    metadata = {k: v for k, v in metadata.items() if not is_member_file_flag(k)}
+    if references > 1 or MEMBER_FILES_KEY in metadata:
+        metadata[MEMBER_FILES_KEY] = ",".join(files)
+        metadata["duplicate_chunks"] = references - 1
+        metadata.update(member_file_flags(files))
+    if metadata.get("file_name") not in files:
+        # its file is gone, a remaining member file takes the chunk over
+        metadata["file_name"] = files[0]
+        metadata.pop("chunk_index", None)
+    return metadata
+
+
+def refresh_shared_chunks(
+    vector_db: Chroma, manifest: IngestManifest, chunk_ids: set[str]
+):
+    """Rewrite `member_files` and ownership of stored chunks shared by files."""
+    if not chunk_ids:
+        return
+    references = manifest.references()
+    chunk_files = manifest.chunk_files(chunk_ids)
+    chunk_ids = sorted(chunk_ids)
+    for start in range(0, len(chunk_ids), configs.INGEST_BATCH_SIZE):
+        data = vector_db._collection.get(
+            ids=chunk_ids[start : start + configs.INGEST_BATCH_SIZE],
+            include=["embeddings", "documents", "metadatas"],
+        )
+        # upsert replaces the whole record, so dropped keys do not linger
+        vector_db._collection.upsert(
+            ids=data["ids"],
+            embeddings=data["embeddings"],
+            documents=data["documents"],
+            metadatas=[
+                shared_chunk_metadata(
+                    metadata or {}, chunk_files[doc_id], references[doc_id]
+                )
+                for doc_id, metadata in zip(data["ids"], data["metadatas"])
+            ],
+        )
+
+
+@dataclass
+class IngestBatch:
+    """
+    Chunks embedded and upserted together, the chunks deleted before them and
+    the manifest as of the end of the batch; `finished` files have their last
+    chunk in the batch.
+    """
+
+    documents: list[Document] = field(default_factory=list)
+    ids: list[str] = field(default_factory=list)
+    signatures: dict[str, np.ndarray] = field(default_factory=dict)
+    deleted: list[str] = field(default_factory=list)
+    finished: list[str] = field(default_factory=list)
+    manifest: IngestManifest | None = None
+
+
+class BatchWriter:
+    """
+    Commits batches in order on a background thread, at most `queue_size`
+    of them waiting: parsing the next PDFs overlaps embedding, and a slow
+    embedding API holds parsing back instead of letting chunks pile up.
+    """
+
+    def __init__(self, commit, queue_size: int):
+        self.commit = commit
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.pending = deque()
+        self.failed = False
+
+    def _commit(self, batch: IngestBatch):
+        # nothing commits after a failed batch, the manifest would run ahead
+        if self.failed:
             return
-        # save_documents_to_json(documents)
-        # embed documents and store in ChromaDB
-        Chroma.from_documents(
-            documents=documents,
-            embedding=JinaEmbeddings(model_name="jina-embeddings-v3"),
+        try:
+            self.commit(batch)
+        except Exception:
+            self.failed = True
+            raise
+
+    def submit(self, batch: IngestBatch):
+        while len(self.pending) >= self.queue_size:
+            # re-raises the error of a failed batch
+            self.pending.popleft().result()
+        self.pending.append(self.executor.submit(self._commit, batch))
+
+    def join(self):
+        while self.pending:
+            self.pending.popleft().result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class CollectionIngest:
+    """
+    Streams files into the single Chroma collection. Each file is released
+    (its chunks no other file references are deleted), deduplicated against
+    every stored chunk and queued in batches of `INGEST_BATCH_SIZE` chunks,
+    each committed to Chroma as soon as it is embedded. The manifest written
+    with each batch lists a file as complete only once all its chunks are
+    stored; the stored chunks of an incomplete file are reused by the next
+    run instead of being embedded again.
+    """
+
+    def __init__(self, vector_db: Chroma, manifest: IngestManifest):
+        self.vector_db = vector_db
+        self.manifest = manifest
+        self.manifest.indexed = False
+        self.references = manifest.references()
+        self.deduplicator = get_deduplicator()
+        self.lsh = MinHashLSH(self.deduplicator)
+        self.signature_log = SignatureLog(
+            configs.DEDUP_SIGNATURES_PATH, configs.DEDUP_NUM_PERM
+        )
+        for doc_id, signature in self.signature_log.load(self.references).items():
+            self.lsh.insert(doc_id, signature)
+        partial_ids = [
+            doc_id
+            for entry in manifest.files.values()
+            if entry["sha256"] is None
+            for doc_id in entry["chunk_ids"]
+        ]
+        self.resumable = set()
+        if partial_ids:
+            stored = vector_db._collection.get(ids=partial_ids, include=[])
+            self.resumable = set(stored["ids"])
+        self.batch = IngestBatch()
+        self.writer = BatchWriter(self.commit, configs.INGEST_QUEUE_SIZE)
+        self.chunks = self.embedded = self.resumed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.writer.__exit__(*exc_info)
+
+    def commit(self, batch: IngestBatch):
+        """Write one batch, runs on the writer thread."""
+        if batch.deleted:
+            self.vector_db.delete(ids=batch.deleted)
+        batch.manifest.snapshot(pending=batch.finished).save(
+            configs.INGEST_MANIFEST_PATH
+        )
+        if batch.documents:
+            self.vector_db.add_documents(batch.documents, ids=batch.ids)
+        self.signature_log.append(batch.signatures)
+        if batch.finished:
+            batch.manifest.save(configs.INGEST_MANIFEST_PATH)
+            log.info(f"Committed {', '.join(batch.finished)}.")
+
+    def flush(self):
+        self.batch.manifest = self.manifest.snapshot()
+        self.writer.submit(self.batch)
+        self.batch = IngestBatch()
+
+    def release(self, file_name: str) -> list[str]:
+        """Drop a file from the manifest, returns the chunks only it referenced."""
+        entry = self.manifest.files.pop(file_name, None)
+        if entry is None:
+            return []
+        self.references.subtract(entry["chunk_ids"])
+        orphans = []
+        for doc_id in set(entry["chunk_ids"]):
+            if self.references[doc_id] > 0:
+                self.manifest.stale_chunks.add(doc_id)
+                continue
+            del self.references[doc_id]
+            self.lsh.remove(doc_id)
+            orphans.append(doc_id)
+        return orphans
+
+    def remove(self, file_name: str):
+        self.batch.deleted.extend(self.release(file_name))
+
+    def add(self, file_name: str, file_hash: str, chunks: list[Document]):
+        """
+        Queue the chunks of a new or changed file. A chunk that is a
+        near-duplicate of a stored chunk, or of an earlier chunk of this run,
+        is not embedded; its file references the representative instead.
+        """
+        orphans = self.release(file_name)
+        ids = [chunk_id(file_hash, doc.metadata["chunk_index"]) for doc in chunks]
+        assigned, signatures = list(ids), {}
+        for j, doc in enumerate(chunks if configs.DEDUP_ENABLED else ()):
+            signature = self.deduplicator.signature(doc.page_content)
+            if signature is None:
+                continue
+            owner = self.lsh.query(signature)
+            if owner is None:
+                self.lsh.insert(ids[j], signature)
+                signatures[ids[j]] = signature
+            else:
+                assigned[j] = owner
+
+        stored = {doc_id for doc_id, owner in zip(ids, assigned) if doc_id == owner}
+        self.manifest.mark_unindexed(stored)
+        counts = Counter(assigned)
+        # stored chunks of other files gaining references
+        self.manifest.stale_chunks.update(set(counts) - stored)
+        self.references.update(assigned)
+        self.manifest.files[file_name] = {"sha256": None, "chunk_ids": assigned}
+        self.batch.deleted.extend(d for d in orphans if d not in stored)
+
+        for doc, doc_id in zip(chunks, ids):
+            if doc_id not in stored:
+                continue
+            if doc_id in self.resumable:
+                # committed by an interrupted run
+                self.resumable.discard(doc_id)
+                self.resumed += 1
+                continue
+            metadata = doc.metadata
+            if counts[doc_id] > 1:
+                metadata = shared_chunk_metadata(
+                    metadata, [file_name], counts[doc_id]
+                )
+            self.batch.documents.append(
+                Document(page_content=doc.page_content, metadata=metadata)
+            )
+            self.batch.ids.append(doc_id)
+            if doc_id in signatures:
+                self.batch.signatures[doc_id] = signatures[doc_id]
+            self.embedded += 1
+            if len(self.batch.ids) >= configs.INGEST_BATCH_SIZE:
+                self.flush()
+        self.manifest.files[file_name] = {"sha256": file_hash, "chunk_ids": assigned}
+        self.batch.finished.append(file_name)
+        self.chunks += len(chunks)
+
+    def finish(self):
+        """Commit the last batch and refresh the shared chunks."""
+        self.flush()
+        self.writer.join()
+        refreshed = self.manifest.stale_chunks & set(self.references)
+        refresh_shared_chunks(self.vector_db, self.manifest, refreshed)
+        self.manifest.mark_unindexed(refreshed)
+        self.manifest.stale_chunks.clear()
+        self.signature_log.write(self.lsh.signatures)
+        log.info(
+            f"Embedded {self.embedded}/{self.chunks} chunks, {self.resumed} "
+            "reused from an interrupted run, "
+            f"{self.chunks - self.embedded - self.resumed} near-duplicates of "
+            "stored chunks skipped."
+        )
+
+
+def ingest_collection(
+    plan: IngestPlan,
+    manifest: IngestManifest,
+    file_hashes: dict[str, str],
+    embeddings,
+) -> list[Chroma]:
+    """Apply `plan` to the single Chroma collection, file by file."""
+    vector_db = Chroma(
+        embedding_function=embeddings,
+        persist_directory=configs.DB_PERSIST_DIRECTORY,
+    )
+    paths = [os.path.join(configs.DATA_DIR, file) for file in plan.changed]
+    with CollectionIngest(vector_db, manifest) as ingest:
+        for file_name in plan.removed:
+            ingest.remove(file_name)
+        for file_name, chunks in iter_chunked_pdfs(paths):
+            if isinstance(chunks, Exception):
+                # a PDF that fails to parse keeps its previous chunks, if any
+                plan.fail([file_name])
+                continue
+            ingest.add(file_name, file_hashes[file_name], chunks)
+        ingest.finish()
+    return [vector_db]
+
+
+def ingest_shards(
+    plan: IngestPlan,
+    manifest: IngestManifest,
+    file_hashes: dict[str, str],
+    embeddings,
+) -> list[Chroma]:
+    """
+    Apply `plan` with one collection per RFP: only changed shards are rebuilt,
+    each committed to the manifests as soon as it is complete.
+    """
+    try:
+        shards = read_shard_manifest(configs.DB_PERSIST_DIRECTORY)
+    except FileNotFoundError:
+        shards = {}
+    manifest.indexed = False
+    for file_name in plan.removed:
+        shards.pop(file_name, None)
+        write_shard_manifest(configs.DB_PERSIST_DIRECTORY, shards)
+        Chroma(
+            collection_name=shard_collection_name(file_name),
+            persist_directory=configs.DB_PERSIST_DIRECTORY,
+        ).delete_collection()
+        manifest.files.pop(file_name, None)
+        manifest.save(configs.INGEST_MANIFEST_PATH)
+    paths = [os.path.join(configs.DATA_DIR, file) for file in plan.changed]
+    for file_name, chunks in iter_chunked_pdfs(paths):
+        if isinstance(chunks, Exception):
+            plan.fail([file_name])
+            continue
+        ids = build_shard(file_name, file_hashes[file_name], chunks, embeddings)
+        manifest.mark_unindexed(ids)
+        if ids:
+            shards[file_name] = shard_collection_name(file_name)
+        else:
+            shards.pop(file_name, None)
+        write_shard_manifest(configs.DB_PERSIST_DIRECTORY, shards)
+        manifest.files[file_name] = {
+            "sha256": file_hashes[file_name],
+            "chunk_ids": ids,
+        }
+        manifest.save(configs.INGEST_MANIFEST_PATH)
+    return [
+        Chroma(
+            collection_name=collection_name,
             persist_directory=configs.DB_PERSIST_DIRECTORY,
         )
-        log.info("Data ingestion completed successfully.")
-        return len(documents)
+        for collection_name in shards.values()
+    ]
+
+
+def ingest_data(full_rebuild: bool = False, force: list[str] = ()) -> dict:
+    """
+    Bring the vector store in line with the PDFs of `DATA_DIR`: only new or
+    changed files (by content hash, see `IngestManifest`) are parsed and
+    embedded, chunks of removed files are deleted and the rest is left
+    untouched. Everything is rebuilt on `full_rebuild`, a chunking config
+    change or a missing store. Files in `force` are re-ingested regardless.
+    PDFs are streamed through parsing, chunking, embedding and upserting in
+    batches, so memory does not grow with the corpus and an interrupted run
+    resumes from its last committed batch. PDFs that fail to parse are
+    reported and skipped. Returns the added, updated, removed, skipped and
+    failed file counts, the failed files, the total chunk count and the
+    chunks served by the embedding cache with the API calls that saved.
+    """
+    log.info("Starting data ingestion process...")
+    try:
+        config_version = chunking_config_version()
+        manifest = IngestManifest.load(configs.INGEST_MANIFEST_PATH)
+        file_hashes = {
+            file: file_sha256(os.path.join(configs.DATA_DIR, file))
+            for file in list_pdfs(configs.DATA_DIR)
+        }
+        rebuild = (
+            full_rebuild
+            or manifest.config_version != config_version
+            or not os.path.exists(configs.DB_PERSIST_DIRECTORY)
+        )
+        plan = manifest.plan(
+            file_hashes, config_version, force=list(file_hashes) if rebuild else force
+        )
+        log.info(f"Ingestion plan: {plan.counts()}")
+
+        if rebuild:
+            if os.path.exists(configs.DB_PERSIST_DIRECTORY):
+                shutil.rmtree(configs.DB_PERSIST_DIRECTORY)
+                # a client opened by the API would keep writing the deleted files
+                release_chroma_clients()
+            if os.path.exists(configs.DEDUP_SIGNATURES_PATH):
+                os.remove(configs.DEDUP_SIGNATURES_PATH)
+            log.info("Cleared existing database directory.")
+            manifest = IngestManifest(config_version)
+        elif (
+            not plan.changed
+            and not plan.removed
+            and not manifest.stale_chunks
+            and manifest.indexed
+        ):
+            log.info("No new, changed or removed PDFs, nothing to ingest.")
+            return {
+                "total_chunks": len(manifest.references()),
+                **plan.counts(),
+                "failed_files": plan.failed,
+            }
+
+        embeddings = get_ingest_embeddings()
+        ingest = ingest_shards if configs.SHARD_BY_FILE else ingest_collection
+        try:
+            stores = ingest(plan, manifest, file_hashes, embeddings)
+        finally:
+            embedding_stats = embeddings.stats()
+            log.info(f"Embedding requests: {embedding_stats}")
+            embeddings.close()
+            evict_embedding_cache()
+        total_chunks = update_indexes_from_stores(stores, manifest)
+        if total_chunks is None:
+            total_chunks = build_indexes_from_stores(stores)
+        manifest.indexed = True
+        manifest.unindexed_chunks = set()
+        manifest.save(configs.INGEST_MANIFEST_PATH)
+        # answers cached against the previous index are no longer valid
+        generation = bump_index_generation(configs.INDEX_GENERATION_PATH)
+        log.info(
+            f"Data ingestion completed successfully, index generation {generation}."
+        )
+        return {
+            "total_chunks": total_chunks,
+            **plan.counts(),
+            "failed_files": plan.failed,
+            "cached_chunks": embedding_stats.get("cached_chunks", 0),
+            "api_calls_saved": embedding_stats.get("api_calls_saved", 0),
+        }
     except Exception as e:
         log.error(f"Data ingestion failed: {e}")
         raise e
+
+
+def ingest_file(file_name: str) -> dict:
+    """Re-ingest a single RFP of `DATA_DIR` even if its content is unchanged."""
+    return ingest_data(force=[file_name])
@@ -0,0 +1,202 @@
+from src.indexing import configs
+from collections import Counter
+from dataclasses import dataclass, field
+import hashlib
+import json
+import os
+
+# bump when a code change alters chunk boundaries or content
+CHUNKING_VERSION = 1
+CHUNKING_CONFIG_KEYS = [
+    "MAX_CHARS",
+    "COUNT_THRESHOLD",
+    "MIN_TOKENS",
+    "CHUNK_SIZE",
+    "CHUNK_OVERLAP",
+    "SEPARATORS",
+    "EXTRACT_RFP_METADATA",
+    "DEDUP_ENABLED",
+    "DEDUP_THRESHOLD",
+    "DEDUP_NUM_PERM",
+    "DEDUP_BANDS",
+    "DEDUP_SHINGLE_SIZE",
+    "SHARD_BY_FILE",
+    # stored vectors are reused only if the same model produced them
+    "EMBEDDING_MODEL",
+]
+
+
+def chunking_config_version() -> str:
+    """Hash of the settings that decide which chunks a PDF produces."""
+    settings = {key: getattr(configs, key) for key in CHUNKING_CONFIG_KEYS}
+    settings["CHUNKING_VERSION"] = CHUNKING_VERSION
+    encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(file_hash: str, chunk_index: int) -> str:
+    """Deterministic id of a chunk: same PDF bytes and config, same ids."""
+    return f"{file_hash[:16]}-{chunk_index:05d}"
+
+
+@dataclass
+class IngestPlan:
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    failed: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> list[str]:
+        """Files to parse and embed."""
+        return self.added + self.updated
+
+    @property
+    def dropped(self) -> list[str]:
+        """Files whose current chunks are released."""
+        return self.updated + self.removed
+
+    def fail(self, file_names: list[str]):
+        """Leave files that could not be chunked out of this run."""
+        self.added = [f for f in self.added if f not in file_names]
+        self.updated = [f for f in self.updated if f not in file_names]
+        self.failed.extend(file_names)
+
+    def counts(self) -> dict[str, int]:
+        return {
+            "added": len(self.added),
+            "updated": len(self.updated),
+            "removed": len(self.removed),
+            "skipped": len(self.skipped),
+            "failed": len(self.failed),
+        }
+
+
+class IngestManifest:
+    """
+    What was ingested from each PDF: its content hash and the ids of the
+    chunks it contributes. A near-duplicate chunk shared by several files is
+    listed by each of them (once per chunk it stands for) and is deleted with
+    its last reference. A file whose chunks are still being committed has no
+    hash yet, so an interrupted run picks it up again. `stale_chunks` are
+    shared chunks whose stored `member_files` are out of date and `indexed`
+    tells whether the BM25, metadata and flat indexes match the store.
+    `unindexed_chunks` are the chunks written to the store since the indexes
+    were built, None when unknown: the indexes are then rebuilt in full.
+    """
+
+    def __init__(
+        self,
+        config_version: str | None = None,
+        files: dict | None = None,
+        stale_chunks: set[str] | None = None,
+        indexed: bool = False,
+        unindexed_chunks: set[str] | None = None,
+    ):
+        self.config_version = config_version
+        self.files: dict[str, dict] = files or {}
+        self.stale_chunks: set[str] = stale_chunks or set()
+        self.indexed = indexed
+        self.unindexed_chunks = unindexed_chunks
+
+    @classmethod
+    def load(cls, path: str) -> "IngestManifest":
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(
+            data.get("config_version"),
+            data.get("files", {}),
+            set(data.get("stale_chunks", [])),
+            data.get("indexed", True),
+            (
+                set(data["unindexed_chunks"])
+                if data.get("unindexed_chunks") is not None
+                else None
+            ),
+        )
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "config_version": self.config_version,
+                    "indexed": self.indexed,
+                    "stale_chunks": sorted(self.stale_chunks),
+                    "unindexed_chunks": (
+                        sorted(self.unindexed_chunks)
+                        if self.unindexed_chunks is not None
+                        else None
+                    ),
+                    "files": self.files,
+                },
+                f,
+                indent=2,
+            )
+        os.replace(tmp_path, path)
+
+    def snapshot(self, pending: list[str] = ()) -> "IngestManifest":
+        """
+        Copy of the manifest, with `pending` files not complete yet. Entries
+        are replaced rather than modified, so they are shared with the copy.
+        """
+        files = dict(self.files)
+        for file_name in pending:
+            files[file_name] = {**files[file_name], "sha256": None}
+        return IngestManifest(
+            self.config_version,
+            files,
+            set(self.stale_chunks),
+            self.indexed,
+            set(self.unindexed_chunks) if self.unindexed_chunks is not None else None,
+        )
+
+    def mark_unindexed(self, chunk_ids):
+        """Record chunks written to the store, unless everything is re-indexed."""
+        if self.unindexed_chunks is not None:
+            self.unindexed_chunks.update(chunk_ids)
+
+    def plan(
+        self,
+        file_hashes: dict[str, str],
+        config_version: str,
+        force: list[str] = (),
+    ) -> IngestPlan:
+        """Sort the PDFs on disk against the manifest, partial files are updated."""
+        rebuild = config_version != self.config_version
+        plan = IngestPlan()
+        for file_name, file_hash in sorted(file_hashes.items()):
+            entry = self.files.get(file_name)
+            if entry is None:
+                plan.added.append(file_name)
+            elif rebuild or file_name in force or entry["sha256"] != file_hash:
+                plan.updated.append(file_name)
+            else:
+                plan.skipped.append(file_name)
+        plan.removed = sorted(set(self.files) - set(file_hashes))
+        return plan
+
+    def references(self) -> Counter:
+        """Number of chunks each stored chunk id stands for."""
+        return Counter(
+            doc_id for entry in self.files.values() for doc_id in entry["chunk_ids"]
+        )
+
+    def chunk_files(self, chunk_ids: set[str]) -> dict[str, list[str]]:
+        """Files referencing each of `chunk_ids`."""
+        files: dict[str, set] = {}
+        for file_name, entry in self.files.items():
+            for doc_id in chunk_ids.intersection(entry["chunk_ids"]):
+                files.setdefault(doc_id, set()).add(file_name)
+        return {doc_id: sorted(names) for doc_id, names in files.items()}
@@ -0,0 +1,50 @@
+from importlib import metadata
+import gzip
+import json
+import os
+
+
+def parser_version() -> str:
+    """Versions of the PDF to markdown stack, its output changes with them."""
+    versions = []
+    for package in ("pymupdf4llm", "pymupdf"):
+        try:
+            versions.append(f"{package}-{metadata.version(package)}")
+        except metadata.PackageNotFoundError:
+            versions.append(f"{package}-unknown")
+    return "_".join(versions)
+
+
+class MarkdownCache:
+    """
+    Markdown of each page of the parsed PDFs, one gzip-compressed JSON file
+    per PDF keyed by its content hash and the parser version, so re-chunking
+    and re-ingests skip parsing unchanged PDFs.
+    """
+
+    def __init__(self, directory: str, version: str | None = None):
+        self.directory = directory
+        self.version = version or parser_version()
+
+    def path(self, file_hash: str) -> str:
+        return os.path.join(self.directory, f"{file_hash}_{self.version}.json.gz")
+
+    def get(self, file_hash: str) -> list[dict] | None:
+        """Pages ({"page", "text"}) of a PDF parsed before, None on a miss."""
+        try:
+            with gzip.open(self.path(file_hash), "rt", encoding="utf-8") as f:
+                return json.load(f)["pages"]
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, KeyError):
+            # truncated or corrupt entry, parsed again and overwritten
+            return None
+
+    def put(self, file_hash: str, pages: list[dict]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(file_hash)
+        # unique per process, PDFs are parsed on a process pool
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump({"version": self.version, "pages": pages}, f)
+        os.replace(tmp_path, path)
@@ -4,3 +4,13 @@ from pydantic import BaseModel
 class IngestResponse(BaseModel):
     message: str
     total_chunks: int
+    # PDFs by what ingestion did with them
+    added: int = 0
+    updated: int = 0
+    removed: int = 0
+    skipped: int = 0
+    failed: int = 0
+    failed_files: list[str] = []
+    # chunks whose embedding came from the chunk embedding cache
+    cached_chunks: int = 0
+    api_calls_saved: int = 0
@@ -3,6 +3,8 @@ from langchain_core.messages import HumanMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
 from src.indexing import configs
 from src.indexing import prompt
+from src.indexing.manifest import file_sha256
+from src.indexing.markdown_cache import MarkdownCache
 from dotenv import load_dotenv
 import re
 import pymupdf4llm
@@ -45,9 +47,35 @@ def rm_markdown(md_text: str):
     return strip_markdown.strip_markdown(md_text)
 
 
+def parse_pdf_pages(pdf_path: str) -> list[dict]:
+    """Markdown of each page, joined they are `to_markdown` of the whole PDF."""
+    pages = pymupdf4llm.to_markdown(pdf_path, page_chunks=True)
+    return [
+        {"page": page["metadata"].get("page", i + 1), "text": page["text"]}
+        for i, page in enumerate(pages)
+    ]
+
+
+def get_pdf_pages(pdf_path: str) -> list[dict]:
+    """
+    Markdown of each page of the PDF, read from the parsed-markdown cache
+    when the same bytes were parsed before by the same pymupdf4llm version.
+    """
+    if not configs.MARKDOWN_CACHE_ENABLED:
+        return parse_pdf_pages(pdf_path)
+    cache = MarkdownCache(configs.MARKDOWN_CACHE_DIRECTORY)
+    file_hash = file_sha256(pdf_path)
+    pages = cache.get(file_hash)
+    if pages is None:
+        pages = parse_pdf_pages(pdf_path)
+        cache.put(file_hash, pages)
+    else:
+        log.info(f"Parsed markdown of {pdf_path} read from the cache.")
+    return pages
+
+
 def get_pdf_markdown(pdf_path: str) -> str:
-    md_text = pymupdf4llm.to_markdown(pdf_path)
-    return md_text
+    return "".join(page["text"] for page in get_pdf_pages(pdf_path))
 
 
 def has_alphabet(line: str) -> bool:
@@ -0,0 +1,142 @@
+from src.common.logger import log
+from dataclasses import dataclass, field
+import numpy as np
+import threading
+import json
+import time
+
+
+def filter_key(metadata: dict) -> str:
+    """Canonical form of the metadata filter, empty values are not filters."""
+    return json.dumps(
+        {k: v for k, v in sorted((metadata or {}).items()) if v}, sort_keys=True
+    )
+
+
+@dataclass
+class CacheBucket:
+    """Cached answers sharing one metadata filter and index generation."""
+
+    vectors: list = field(default_factory=list)
+    responses: list = field(default_factory=list)
+    created_at: list = field(default_factory=list)
+    matrix: np.ndarray | None = None
+
+    def stacked(self) -> np.ndarray:
+        if self.matrix is None:
+            self.matrix = np.vstack(self.vectors)
+        return self.matrix
+
+    def drop(self, indexes: set[int]):
+        keep = [i for i in range(len(self.vectors)) if i not in indexes]
+        self.vectors = [self.vectors[i] for i in keep]
+        self.responses = [self.responses[i] for i in keep]
+        self.created_at = [self.created_at[i] for i in keep]
+        self.matrix = None
+
+
+class SemanticAnswerCache:
+    """
+    Response cache for RAG answers keyed by query-embedding similarity, the
+    exact metadata filter and the index generation bumped by every ingestion.
+
+    A lookup is one matrix-vector product over the answers cached for the same
+    filter and generation, so a hit returns in a few milliseconds.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: float = 3600,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._buckets: dict[tuple[str, int], CacheBucket] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _normalize(self, vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _purge_generations(self, generation: int):
+        """Answers from older index generations can never be served again."""
+        for key in [k for k in self._buckets if k[1] != generation]:
+            del self._buckets[key]
+
+    def _drop_expired(self, bucket: CacheBucket):
+        cutoff = time.time() - self.ttl_seconds
+        expired = {i for i, t in enumerate(bucket.created_at) if t < cutoff}
+        if expired:
+            bucket.drop(expired)
+
+    def lookup(self, query_vector, metadata: dict, generation: int) -> dict | None:
+        query_vector = self._normalize(query_vector)
+        with self._lock:
+            self._purge_generations(generation)
+            bucket = self._buckets.get((filter_key(metadata), generation))
+            if bucket:
+                self._drop_expired(bucket)
+            if bucket and bucket.vectors:
+                similarities = bucket.stacked() @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    self.hits += 1
+                    log.debug(f"Answer cache hit, similarity {similarities[best]:.4f}")
+                    return bucket.responses[best]
+            self.misses += 1
+            return None
+
+    def store(self, query_vector, metadata: dict, generation: int, response: dict):
+        with self._lock:
+            key = (filter_key(metadata), generation)
+            bucket = self._buckets.setdefault(key, CacheBucket())
+            bucket.vectors.append(self._normalize(query_vector))
+            bucket.responses.append(response)
+            bucket.created_at.append(time.time())
+            bucket.matrix = None
+            self._evict()
+
+    def _evict(self):
+        """Drop the oldest answers once the cache holds more than `max_entries`."""
+        entries = [
+            (created_at, key, i)
+            for key, bucket in self._buckets.items()
+            for i, created_at in enumerate(bucket.created_at)
+        ]
+        overflow = len(entries) - self.max_entries
+        if overflow <= 0:
+            return
+        to_drop: dict[tuple, set[int]] = {}
+        for _, key, i in sorted(entries)[:overflow]:
+            to_drop.setdefault(key, set()).add(i)
+        for key, indexes in to_drop.items():
+            self._buckets[key].drop(indexes)
+
+    def invalidate(self, file_name: str | None = None) -> int:
+        """
+        Drop cached answers. With `file_name`, only answers that may come from
+        that file are dropped, that is all of them but the ones filtered on
+        another file. Returns the number of dropped answers.
+        """
+        with self._lock:
+            dropped = 0
+            for key in list(self._buckets):
+                other_file = json.loads(key[0]).get("file_name")
+                if file_name is None or other_file in (None, file_name):
+                    dropped += len(self._buckets.pop(key).responses)
+            log.info(f"Answer cache invalidated, {dropped} answers dropped")
+            return dropped
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": sum(len(b.responses) for b in self._buckets.values()),
+        }
@@ -0,0 +1,159 @@
+from langchain_core.documents import Document
+from src.common.utils import estimate_tokens
+from dataclasses import dataclass, field
+import re
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def overlap_length(left: str, right: str, min_chars: int, max_chars: int) -> int:
+    """Length of the longest suffix of `left` that starts `right`, 0 below `min_chars`."""
+    for length in range(min(max_chars, len(left), len(right)), min_chars - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def shingles(text: str, size: int = 5) -> set[tuple[str, ...]]:
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        return {tuple(words)} if words else set()
+    return {tuple(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+@dataclass
+class ContextBlock:
+    """One `Document-N` entry of the prompt: a chunk or a run of adjacent chunks."""
+
+    rank: int
+    docs: list[Document] = field(default_factory=list)
+    text: str = ""
+    overlap_chars: int = 0
+
+    def document(self) -> Document:
+        first = self.docs[0]
+        metadata = dict(first.metadata)
+        if len(self.docs) > 1:
+            metadata["merged_chunks"] = len(self.docs)
+        return Document(id=first.id, page_content=self.text, metadata=metadata)
+
+
+class ContextPacker:
+    """
+    Builds the prompt context from ranked chunks under a token budget.
+
+    Chunks of the same file with consecutive `chunk_index` are merged into one
+    block and the text they share through the splitter overlap is kept once.
+    Blocks whose word shingles are mostly contained in an already packed block
+    are dropped. Blocks are then packed in rank order while they fit the
+    budget; the first block is truncated rather than dropped.
+    """
+
+    def __init__(
+        self,
+        token_budget: int,
+        merge_adjacent: bool = True,
+        duplicate_threshold: float = 0.8,
+        min_overlap_chars: int = 20,
+        max_overlap_chars: int = 400,
+    ):
+        self.token_budget = token_budget
+        self.merge_adjacent = merge_adjacent
+        self.duplicate_threshold = duplicate_threshold
+        self.min_overlap_chars = min_overlap_chars
+        self.max_overlap_chars = max_overlap_chars
+
+    def _blocks(self, docs: list[Document]) -> list[ContextBlock]:
+        """Group chunks into blocks, each ranked by its best member."""
+        if not self.merge_adjacent:
+            return [
+                ContextBlock(rank=i, docs=[doc], text=doc.page_content)
+                for i, doc in enumerate(docs)
+            ]
+
+        positioned, blocks = {}, []
+        for rank, doc in enumerate(docs):
+            index = doc.metadata.get("chunk_index")
+            if index is None:
+                blocks.append(ContextBlock(rank=rank, docs=[doc]))
+            else:
+                positioned[(doc.metadata.get("file_name"), index)] = (rank, doc)
+
+        current = None
+        for (file_name, index), (rank, doc) in sorted(
+            positioned.items(), key=lambda item: (str(item[0][0]), item[0][1])
+        ):
+            previous = current and current.docs[-1].metadata
+            if (
+                current
+                and previous.get("file_name") == file_name
+                and previous["chunk_index"] == index - 1
+            ):
+                current.docs.append(doc)
+                current.rank = min(current.rank, rank)
+            else:
+                current = ContextBlock(rank=rank, docs=[doc])
+                blocks.append(current)
+
+        for block in blocks:
+            parts = [block.docs[0].page_content]
+            for left, right in zip(block.docs, block.docs[1:]):
+                overlap = overlap_length(
+                    left.page_content,
+                    right.page_content,
+                    self.min_overlap_chars,
+                    self.max_overlap_chars,
+                )
+                block.overlap_chars += overlap
+                parts.append(
+                    right.page_content[overlap:]
+                    if overlap
+                    else "\n" + right.page_content
+                )
+            block.text = "".join(parts)
+        return sorted(blocks, key=lambda block: block.rank)
+
+    def pack(self, docs: list[Document]) -> tuple[str, list[Document], dict]:
+        """Formatted context, the packed blocks as documents, and token stats."""
+        total_tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
+        parts, packed, packed_shingles = [], [], []
+        used = overlap_tokens = duplicate_tokens = budget_tokens = 0
+        for block in self._blocks(docs):
+            overlap_tokens += estimate_tokens(" " * block.overlap_chars)
+            block_shingles = shingles(block.text)
+            if block_shingles and any(
+                len(block_shingles & seen) / len(block_shingles)
+                >= self.duplicate_threshold
+                for seen in packed_shingles
+            ):
+                duplicate_tokens += estimate_tokens(block.text)
+                continue
+
+            header = f"Document-{len(packed) + 1}:\n"
+            tokens = estimate_tokens(f"{header}{block.text}\n\n")
+            if used + tokens > self.token_budget:
+                if packed:
+                    budget_tokens += estimate_tokens(block.text)
+                    continue
+                # never send an empty context, cut the best block to the budget
+                kept_chars = max(0, self.token_budget * 4 - len(header) - 2)
+                budget_tokens += estimate_tokens(block.text[kept_chars:])
+                block.text = block.text[:kept_chars]
+                tokens = estimate_tokens(f"{header}{block.text}\n\n")
+
+            parts.extend((header, block.text, "\n\n"))
+            packed.append(block.document())
+            packed_shingles.append(block_shingles)
+            used += tokens
+
+        stats = {
+            "candidate_tokens": total_tokens,
+            "prompt_tokens": used,
+            "dropped_tokens": overlap_tokens + duplicate_tokens + budget_tokens,
+            "overlap_tokens": overlap_tokens,
+            "duplicate_tokens": duplicate_tokens,
+            "over_budget_tokens": budget_tokens,
+            "documents": len(docs),
+            "blocks": len(packed),
+        }
+        return "".join(parts), packed, stats
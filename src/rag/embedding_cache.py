@@ -0,0 +1,244 @@
+from langchain_core.embeddings import Embeddings
+from src.common.embedding_store import EmbeddingStore, embedding_key
+from collections import OrderedDict
+import threading
+import asyncio
+import time
+import re
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share a key."""
+    return re.sub(r"\s+", " ", text).strip().casefold()
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU with a maximum size and a per-entry TTL."""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[str, tuple[float, list[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with a two-tier cache: an in-memory LRU in front of an
+    on-disk store, both keyed by model name plus normalized text. Works with any
+    LangChain embeddings (Jina, HuggingFace). The on-disk store is kept within
+    `max_disk_age_seconds` and `max_disk_bytes`, evicting least recently used
+    entries on creation and every `evict_every` new entries.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        store: EmbeddingStore,
+        max_size: int = 10_000,
+        ttl_seconds: float = 24 * 3600,
+        model_name: str | None = None,
+        max_disk_age_seconds: float | None = None,
+        max_disk_bytes: int | None = None,
+        evict_every: int = 1000,
+    ):
+        self.embeddings = embeddings
+        self.store = store
+        self.memory = LRUCache(max_size, ttl_seconds)
+        self.model_name = model_name or getattr(
+            embeddings, "model_name", type(embeddings).__name__
+        )
+        self.max_disk_age_seconds = max_disk_age_seconds
+        self.max_disk_bytes = max_disk_bytes
+        self.evict_every = evict_every
+        self._saved_since_evict = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._evict_disk()
+
+    def _evict_disk(self):
+        self._saved_since_evict = 0
+        if self.max_disk_age_seconds is None and self.max_disk_bytes is None:
+            return
+        self.store.evict(
+            max_age_seconds=self.max_disk_age_seconds, max_bytes=self.max_disk_bytes
+        )
+
+    def _keys(self, texts: list[str]) -> list[str]:
+        return [embedding_key(self.model_name, normalize_text(t)) for t in texts]
+
+    def _lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        for key in keys:
+            vector = self.memory.get(key)
+            if vector is not None:
+                found[key] = vector
+        self.memory_hits += len(found)
+
+        on_disk = self.store.get_many([k for k in set(keys) if k not in found])
+        self.disk_hits += len(on_disk)
+        for key, vector in on_disk.items():
+            self.memory.put(key, vector)
+        found.update(on_disk)
+        self.store.touch(found)
+        return found
+
+    def _missing(self, texts: list[str], keys: list[str], found: dict) -> dict:
+        """First text of every key not found in either tier."""
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in missing:
+                missing[key] = text
+        self.misses += len(missing)
+        return missing
+
+    def _save(self, keys: list[str], vectors: list[list[float]], found: dict):
+        new_items = dict(zip(keys, vectors))
+        for key, vector in new_items.items():
+            self.memory.put(key, vector)
+        self.store.put_many(new_items)
+        found.update(new_items)
+        self._saved_since_evict += len(new_items)
+        if self._saved_since_evict >= self.evict_every:
+            self._evict_disk()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = self._keys(texts)
+        found = self._lookup(keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            self._save(list(missing), vectors, found)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        keys = self._keys([text])
+        found = self._lookup(keys)
+        if self._missing([text], keys, found):
+            self._save(keys, [self.embeddings.embed_query(text)], found)
+        return found[keys[0]]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = self._keys(texts)
+        found = await asyncio.to_thread(self._lookup, keys)
+        missing = self._missing(texts, keys, found)
+        if missing:
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            await asyncio.to_thread(self._save, list(missing), vectors, found)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        keys = self._keys([text])
+        found = await asyncio.to_thread(self._lookup, keys)
+        if self._missing([text], keys, found):
+            vector = await self.embeddings.aembed_query(text)
+            await asyncio.to_thread(self._save, keys, [vector], found)
+        return found[keys[0]]
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                round((self.memory_hits + self.disk_hits) / lookups, 4)
+                if lookups
+                else 0.0
+            ),
+            "memory_entries": len(self.memory),
+        }
+
+    async def aclose(self):
+        if hasattr(self.embeddings, "aclose"):
+            await self.embeddings.aclose()
+        await asyncio.to_thread(self.store.close)
+
+
+class ChunkEmbeddingCache(Embeddings):
+    """
+    Disk-only cache of document embeddings for ingestion, keyed by model name
+    and exact chunk text: chunks that come out byte-identical after a
+    chunking change are not embedded again. Counts the cached chunks and the
+    embedding API calls they saved.
+    """
+
+    def __init__(
+        self, embeddings: Embeddings, store: EmbeddingStore, model_name: str
+    ):
+        self.embeddings = embeddings
+        self.store = store
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self.calls_saved = 0
+
+    def _calls(self, texts: list[str]) -> int:
+        """API calls the wrapped client makes to embed `texts`."""
+        if not texts:
+            return 0
+        count_requests = getattr(self.embeddings, "count_requests", None)
+        return count_requests(texts) if count_requests else 1
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys = [embedding_key(self.model_name, text) for text in texts]
+        found = self.store.get_many(list(set(keys)))
+        self.store.touch(found)
+        missing = {}
+        for text, key in zip(texts, keys):
+            if key not in found:
+                missing.setdefault(key, text)
+        self.hits += len(texts) - sum(key not in found for key in keys)
+        self.misses += len(missing)
+        self.calls_saved += self._calls(texts) - self._calls(list(missing.values()))
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing, vectors))
+            self.store.put_many(new_items)
+            found.update(new_items)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    def close(self):
+        if hasattr(self.embeddings, "close"):
+            self.embeddings.close()
+        self.store.close()
+
+    def stats(self) -> dict:
+        inner = self.embeddings.stats() if hasattr(self.embeddings, "stats") else {}
+        return {
+            **inner,
+            "cached_chunks": self.hits,
+            "embedded_chunks": self.misses,
+            "api_calls_saved": self.calls_saved,
+        }
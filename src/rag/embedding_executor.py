@@ -0,0 +1,188 @@
+from langchain_core.embeddings import Embeddings
+from src.common.utils import estimate_tokens
+import threading
+import asyncio
+import random
+import httpx
+
+# throttling and transient server errors, retried with backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def token_batches(
+    texts: list[str], max_tokens: int, max_texts: int
+) -> list[list[int]]:
+    """
+    Indices of `texts` cut into consecutive batches of at most `max_tokens`
+    estimated tokens and `max_texts` texts; a longer text is sent alone.
+    """
+    batches, batch, batch_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if batch and (batch_tokens + tokens > max_tokens or len(batch) >= max_texts):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(i)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper for bulk ingestion. Documents are sent in requests of
+    at most `max_batch_tokens` estimated tokens, with up to `max_concurrency`
+    requests in flight. The limit adapts like TCP congestion control: it is
+    halved when the API throttles and grows back by one request per window
+    of successes. A throttled or failed request is retried on its own with
+    exponential backoff, at least its `Retry-After`, while the others go on.
+
+    The wrapped client must raise `httpx.HTTPStatusError` on error responses
+    (`AsyncJinaEmbeddings` does). Its async calls run on an event loop owned
+    by this wrapper, so its connection pool is reused across calls.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_tokens: int = 8192,
+        max_batch_texts: int = 128,
+        max_concurrency: int = 8,
+        max_retries: int = 6,
+        backoff_seconds: float = 0.5,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_texts = max_batch_texts
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        # current limit, fractional so that it grows by one per window
+        self.concurrency = float(max_concurrency)
+        # bumped on each decrease, one decrease per burst of throttled requests
+        self._epoch = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: threading.Thread | None = None
+        self._loop_lock = threading.Lock()
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+        self.peak_in_flight = 0
+
+    def count_requests(self, texts: list[str]) -> int:
+        """Requests sent to embed `texts`, retries aside."""
+        return len(token_batches(texts, self.max_batch_tokens, self.max_batch_texts))
+
+    def _retry_delay(self, error: Exception, epoch: int, attempt: int) -> float:
+        """Seconds to wait before retrying a failed request, or re-raise."""
+        status = None
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            if status not in RETRY_STATUS_CODES:
+                raise error
+        elif not isinstance(error, httpx.TransportError):
+            raise error
+        if attempt >= self.max_retries:
+            raise error
+
+        self.retries += 1
+        delay = random.uniform(0.5, 1.0) * self.backoff_seconds * 2**attempt
+        if status == 429:
+            self.throttled += 1
+            if epoch == self._epoch:
+                self._epoch += 1
+                self.concurrency = max(1.0, self.concurrency / 2)
+            try:
+                delay = max(delay, float(error.response.headers["Retry-After"]))
+            except (KeyError, ValueError):
+                pass
+        return delay
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        vectors: list = [None] * len(texts)
+        condition = asyncio.Condition()
+        in_flight = 0
+
+        async def embed_batch(batch: list[int]):
+            nonlocal in_flight
+            for attempt in range(self.max_retries + 1):
+                async with condition:
+                    await condition.wait_for(
+                        lambda: in_flight < int(self.concurrency)
+                    )
+                    in_flight += 1
+                    self.peak_in_flight = max(self.peak_in_flight, in_flight)
+                epoch = self._epoch
+                self.requests += 1
+                try:
+                    result = await self.embeddings.aembed_documents(
+                        [texts[i] for i in batch]
+                    )
+                except Exception as e:
+                    delay = self._retry_delay(e, epoch, attempt)
+                else:
+                    self.concurrency = min(
+                        self.max_concurrency, self.concurrency + 1 / self.concurrency
+                    )
+                    for i, vector in zip(batch, result):
+                        vectors[i] = vector
+                    return
+                finally:
+                    async with condition:
+                        in_flight -= 1
+                        condition.notify_all()
+                await asyncio.sleep(delay)
+
+        await asyncio.gather(
+            *(
+                embed_batch(batch)
+                for batch in token_batches(
+                    texts, self.max_batch_tokens, self.max_batch_texts
+                )
+            )
+        )
+        return vectors
+
+    def _run(self, coroutine):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, daemon=True
+                )
+                self._loop_thread.start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        return self._run(self.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.embeddings.aembed_query(text)
+
+    def close(self):
+        """Close the wrapped client's connections on its loop, then the loop."""
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+            thread, self._loop_thread = self._loop_thread, None
+        if loop is None:
+            return
+        if hasattr(self.embeddings, "aclose"):
+            asyncio.run_coroutine_threadsafe(self.embeddings.aclose(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "peak_in_flight": self.peak_in_flight,
+            "concurrency": round(self.concurrency, 2),
+        }
@@ -2,6 +2,13 @@ from src.common.utils import measure_time
 from abc import ABC, abstractmethod
 from src.common.logger import log
 from src.common import config
+from src.common.embedding_store import EmbeddingStore
+from src.rag.embedding_cache import CachedEmbeddings
+from functools import lru_cache
+from langchain_community.embeddings import JinaEmbeddings
+from pydantic import PrivateAttr
+from typing import Any
+import httpx
 
 
 class Embedder(ABC):
@@ -34,6 +41,57 @@ class HfEmbedder(Embedder):
             raise
 
 
+class AsyncJinaEmbeddings(JinaEmbeddings):
+    """
+    JinaEmbeddings with a configurable endpoint and native async calls over a
+    shared httpx connection pool, so awaiting an embedding does not hold a thread.
+    """
+
+    api_url: str = config.JINA_API_URL
+    timeout: float = 60.0
+    _async_client: Any = PrivateAttr(default=None)
+
+    def _parse_response(self, resp: dict) -> list[list[float]]:
+        if "data" not in resp:
+            raise RuntimeError(resp.get("detail", resp))
+        embeddings = sorted(resp["data"], key=lambda e: e["index"])
+        return [result["embedding"] for result in embeddings]
+
+    def _embed(self, input: Any) -> list[list[float]]:
+        resp = self.session.post(
+            self.api_url,
+            json={"input": input, "model": self.model_name},
+            timeout=self.timeout,
+        )
+        return self._parse_response(resp.json())
+
+    async def _aembed(self, input: Any) -> list[list[float]]:
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers=dict(self.session.headers),
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=config.EMBEDDING_MAX_CONNECTIONS),
+            )
+        resp = await self._async_client.post(
+            self.api_url, json={"input": input, "model": self.model_name}
+        )
+        # status kept on the error, so callers can tell throttling apart
+        resp.raise_for_status()
+        return self._parse_response(resp.json())
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self._aembed(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self._aembed([text]))[0]
+
+    async def aclose(self):
+        """Close the async connection pool, on the event loop that opened it."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
 class JinaEmbedder(Embedder):
     def __init__(self):
         super().__init__()
@@ -42,20 +100,34 @@ class JinaEmbedder(Embedder):
         try:
             log.info("Loading embedding model...")
             with measure_time("embedding model loading", log):
-                from langchain_community.embeddings import JinaEmbeddings
-
-                embeddings = JinaEmbeddings(model_name="jina-embeddings-v3")
+                embeddings = AsyncJinaEmbeddings(model_name="jina-embeddings-v3")
                 return embeddings
         except Exception as e:
             log.error(f"Failed to load the HuggingFace embedding Instance: {e}")
             raise
 
 
+@lru_cache(maxsize=1)
 def get_embeddings_obj():
+    """
+    Return the process-wide embedding client, created on first use and wrapped
+    in the query embedding cache when enabled.
+    """
     log.info(f"Embedding model type: {config.EMBEDDING_TYPE}")
     if config.EMBEDDING_TYPE == "jina":
-        return JinaEmbedder().get_embeder()
+        embeddings = JinaEmbedder().get_embeder()
     elif config.EMBEDDING_TYPE == "hf":
-        return HfEmbedder().get_embeder()
+        embeddings = HfEmbedder().get_embeder()
     else:
         raise ValueError(f"Wrong embedding type: {config.EMBEDDING_TYPE}")
+
+    if config.EMBEDDING_CACHE_ENABLED:
+        embeddings = CachedEmbeddings(
+            embeddings,
+            store=EmbeddingStore(config.EMBEDDING_CACHE_PATH),
+            max_size=config.EMBEDDING_CACHE_SIZE,
+            ttl_seconds=config.EMBEDDING_CACHE_TTL_SECONDS,
+            max_disk_age_seconds=config.EMBEDDING_CACHE_MAX_AGE_DAYS * 24 * 3600,
+            max_disk_bytes=config.EMBEDDING_CACHE_MAX_MB * 2**20,
+        )
+    return embeddings
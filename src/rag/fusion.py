@@ -0,0 +1,150 @@
+from langchain_core.documents import Document
+import numpy as np
+
+
+def doc_key(doc: Document) -> str:
+    """Identity of a retrieved chunk, its id or its content when it has none."""
+    return doc.id or doc.page_content
+
+
+def index_candidates(
+    result_lists: list[list[Document]],
+) -> tuple[list[Document], list[np.ndarray]]:
+    """
+    Unique candidates across ranked lists, in order of first appearance, and
+    for every list the candidate position of each of its entries.
+    """
+    positions: dict[str, int] = {}
+    candidates: list[Document] = []
+    rows = []
+    for results in result_lists:
+        row = np.empty(len(results), dtype=np.int64)
+        for rank, doc in enumerate(results):
+            key = doc_key(doc)
+            position = positions.get(key)
+            if position is None:
+                position = positions[key] = len(candidates)
+                candidates.append(doc)
+            row[rank] = position
+        rows.append(row)
+    return candidates, rows
+
+
+def _ranked(
+    candidates: list[Document], scores: np.ndarray, top_k: int | None
+) -> list[tuple[Document, float]]:
+    # stable sort keeps first-appearance order between ties
+    order = np.argsort(-scores, kind="stable")[:top_k]
+    return [(candidates[i], float(scores[i])) for i in order]
+
+
+def _weights(weights: list[float] | None, n_lists: int) -> np.ndarray:
+    if weights is None:
+        return np.ones(n_lists)
+    if len(weights) != n_lists:
+        raise ValueError(f"Expected {n_lists} fusion weights, got {len(weights)}")
+    return np.asarray(weights, dtype=np.float64)
+
+
+def reciprocal_rank_fusion(
+    result_lists: list[list[Document]],
+    weights: list[float] | None = None,
+    c: int = 60,
+    top_k: int | None = None,
+) -> list[tuple[Document, float]]:
+    """
+    Weighted reciprocal-rank fusion, `weight / (c + rank)` summed over the
+    lists a chunk appears in. Returns `(document, score)` by decreasing score,
+    ties in order of first appearance. Plain dicts beat NumPy here: for a few
+    hundred candidates building the arrays costs more than the sums.
+    """
+    if weights is None:
+        weights = [1.0] * len(result_lists)
+    elif len(weights) != len(result_lists):
+        raise ValueError(
+            f"Expected {len(result_lists)} fusion weights, got {len(weights)}"
+        )
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for weight, results in zip(weights, result_lists):
+        for rank, doc in enumerate(results, start=1):
+            key = doc_key(doc)
+            if key not in docs:
+                docs[key] = doc
+                scores[key] = 0.0
+            scores[key] += weight / (c + rank)
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(docs[key], score) for key, score in ranked[:top_k]]
+
+
+def weighted_score_fusion(
+    result_lists: list[list[Document]],
+    score_lists: list[list[float]],
+    weights: list[float] | None = None,
+    top_k: int | None = None,
+) -> list[tuple[Document, float]]:
+    """
+    Weighted sum of min-max normalized retriever scores, higher is better. A
+    chunk missing from a list gets nothing from it. Returns `(document, score)`
+    by decreasing score.
+    """
+    candidates, rows = index_candidates(result_lists)
+    if not candidates:
+        return []
+    weights = _weights(weights, len(rows))
+    contributions = []
+    for weight, scores in zip(weights, score_lists):
+        scores = np.asarray(scores, dtype=np.float64)
+        if len(scores):
+            spread = scores.max() - scores.min()
+            if spread:
+                scores = (scores - scores.min()) / spread
+            else:
+                scores = np.ones_like(scores)
+        contributions.append(weight * scores)
+    fused = np.bincount(
+        np.concatenate(rows),
+        weights=np.concatenate(contributions),
+        minlength=len(candidates),
+    )
+    return _ranked(candidates, fused, top_k)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def maximal_marginal_relevance(
+    query_embeddings,
+    candidate_embeddings,
+    k: int | None = None,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """
+    Candidate positions in maximal-marginal-relevance order.
+
+    Relevance of a candidate is its best cosine similarity to any of the
+    queries. The candidate-candidate similarity matrix is computed once, then
+    each step only updates the running redundancy of the remaining candidates.
+    """
+    n = len(candidate_embeddings)
+    k = n if k is None else min(k, n)
+    if k <= 0:
+        return []
+    candidates = _normalize_rows(np.asarray(candidate_embeddings, dtype=np.float32))
+    queries = _normalize_rows(np.atleast_2d(np.asarray(query_embeddings, np.float32)))
+
+    relevance = (candidates @ queries.T).max(axis=1)
+    similarity = candidates @ candidates.T
+    redundancy = np.zeros(n, dtype=np.float32)
+    available = np.ones(n, dtype=bool)
+    selected = []
+    for _ in range(k):
+        mmr = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        mmr[~available] = -np.inf
+        best = int(np.argmax(mmr))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+    return selected
@@ -10,11 +10,27 @@ from src.common.utils import measure_time
 from abc import ABC, abstractmethod
 from langchain_core.messages import AIMessage, HumanMessage
 from typing import Dict, Any
-from src.rag.models import UserQueries
+from src.rag.models import UserQueries, RAGAnswerWithRelevance
+from src.rag.fusion import reciprocal_rank_fusion, maximal_marginal_relevance
+from src.rag.reasoning_jobs import reasoning_jobs
+from src.rag.rerank import get_reranker
+from src.rag.context import ContextPacker
+import asyncio
 
 load_dotenv()
 
 
+def message_text(message) -> str:
+    """Text of an LLM message or stream chunk, whether content is a str or blocks."""
+    content = getattr(message, "content", message)
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content
+    )
+
+
 class Generation(ABC):
     def __init__(self):
         super().__init__()
@@ -31,103 +47,73 @@ class LcGeneration(Generation):
         self.llm = ChatGoogleGenerativeAI(
             model=config.LLM_MODEL_NAME, temperature=config.TEMPERATURE
         )
+        self.context_packer = ContextPacker(
+            token_budget=config.CONTEXT_TOKEN_BUDGET,
+            merge_adjacent=config.CONTEXT_MERGE_ADJACENT,
+            duplicate_threshold=config.CONTEXT_DUPLICATE_THRESHOLD,
+            min_overlap_chars=config.CONTEXT_MIN_OVERLAP_CHARS,
+            max_overlap_chars=config.CONTEXT_MAX_OVERLAP_CHARS,
+        )
 
         super().__init__()
 
-    def is_any_metadata_match(
-        self,
-        doc_metadata: Dict[str, Any],
-        filter_metadata: Dict[str, Any],
-    ) -> bool:
-        for key, value in filter_metadata.items():
-            if key in doc_metadata and doc_metadata[key] == value:
-                return True
-        return False
-
-    def is_any_metadata_filter_exists(self, filter_metadata: Dict[str, Any]) -> bool:
-        """check if any metadata filter exists"""
-        if not filter_metadata:
-            return False
-
-        for v in filter_metadata.values():
-            if v:
-                return True
-        return False
-
-    def format_retrieved_document_with_meta_filtering(
-        self, inputs: Dict[str, Any], fallback_docs: int = 2
-    ) -> str:
-        """This function format the retrieved documents and also post-retrieval filting, although pre-filter is already doing on the base of filename"""
-        try:
-            docs = inputs["docs"]
-            if not docs:
-                log.warning("No documents retrieved.")
-                return {"formatted_context": "", "source_documents": []}
-
-            metadata_filters = inputs["metadata"]
-
-            log.debug(f"--- Raw Docs Retrieved: {len(docs)} - doc value: {docs}")
-            log.debug(
-                f"--- Applying Filters: type: {type(metadata_filters)} - value: {metadata_filters} ---"
-            )
-
-            formatted_context = ""
-            filter_context = []
-            is_filter_exists = self.is_any_metadata_filter_exists(metadata_filters)
-            doc_i = 0
-            for doc in docs:
-                # check if either metadata matches or no filter exists
-                if (
-                    self.is_any_metadata_match(doc.metadata, metadata_filters)
-                    or not is_filter_exists
-                ):
-                    doc_i += 1
-                    formatted_context += f"Document-{doc_i}:\n{doc.page_content}\n\n"
-                    filter_context.append(doc)
-
-            # fallback case: if no documents matched, return top 2 docs
-            if not formatted_context:
-                log.warning("No documents matched the metadata filters.")
-                if len(docs) < fallback_docs:
-                    fallback_docs = len(docs)
-                filter_context = docs[:fallback_docs]
-                for i, doc in enumerate(docs[:fallback_docs]):
-                    formatted_context += f"Document-{i+1}:\n{doc.page_content}\n\n"
-            log.debug(f"total source documents: {len(filter_context)}")
-            log.debug(f"Formatted source Document:\n{formatted_context}")
-            return {
-                "formatted_context": formatted_context,
-                "source_documents": filter_context,
-            }
+    def rerank_documents(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Trim the retrieved documents to the best-scoring candidates when
+        `RERANK_ENABLED`, recording the prompt tokens saved under `rerank`.
+        """
+        if not config.RERANK_ENABLED:
+            return inputs
+        with measure_time("rerank", log):
+            docs, report = get_reranker().rerank(inputs["queries"], inputs["docs"])
+        log.info(
+            f"Rerank kept {report['kept']}/{report['candidates']} documents, "
+            f"{report['prompt_tokens_saved']} prompt tokens saved"
+        )
+        return {**inputs, "docs": docs, "rerank": report}
 
-        except Exception as e:
-            msg = f"Failed to format retrieved documents: {e}"
-            log.error(msg)
-            raise ValueError(msg)
+    async def arerank_documents(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Async version of `rerank_documents`, scoring runs in a worker thread."""
+        if not config.RERANK_ENABLED:
+            return inputs
+        return await asyncio.to_thread(self.rerank_documents, inputs)
 
     def format_retrieved_document(
         self, inputs: Dict[str, Any], fallback_docs: int = 2
     ) -> str:
-        """This function format the retrieved documents"""
+        """
+        This function format the retrieved documents, packed under
+        `CONTEXT_TOKEN_BUDGET` with adjacent chunks merged (see `ContextPacker`).
+        Source documents are the packed blocks, so `Document-N` refers to the
+        N-th of them.
+        """
         try:
             docs = inputs["docs"]
+            context_stats = {"rerank": inputs.get("rerank")}
             if not docs:
                 log.warning("No documents retrieved.")
-                return {"formatted_context": "", "source_documents": []}
+                return {
+                    "formatted_context": "",
+                    "source_documents": [],
+                    "context_stats": context_stats,
+                }
 
             log.debug(f"--- Raw Docs Retrieved: {len(docs)} - doc value: {docs}")
 
-            formatted_context = ""
-            filter_context = []
-            for doc_i, doc in enumerate(docs):
-                formatted_context += f"Document-{doc_i+1}:\n{doc.page_content}\n\n"
-                filter_context.append(doc)
-
-            log.debug(f"total source documents: {len(filter_context)}")
+            formatted_context, filter_context, packing = self.context_packer.pack(
+                docs
+            )
+            log.info(
+                f"Packed {packing['documents']} documents into "
+                f"{packing['blocks']} blocks, {packing['prompt_tokens']} tokens "
+                f"used, {packing['dropped_tokens']} dropped"
+            )
             log.debug(f"Formatted source Document:\n{formatted_context}")
+            context_stats.update(packing)
             return {
                 "formatted_context": formatted_context,
                 "source_documents": filter_context,
+                "context_stats": context_stats,
             }
         except Exception as e:
             msg = f"Failed to format retrieved documents: {e}"
@@ -165,65 +151,275 @@ class LcGeneration(Generation):
             log.error(msg)
             raise ValueError(msg)
 
-    def validate_and_process_rag_response(self, rag_response: dict) -> dict:
+    async def agenerate_retrieval_resoning(
+        self,
+        user_query: str,
+        retrieved_documents: str,
+    ) -> str:
+        """Async version of `generate_retrieval_resoning`."""
         try:
-            extracted_docs, extracted_formatted_docs = [], ""
-            user_query = rag_response.get("input", "")
-            answer = rag_response.get("answer", "")
+            message = config.RETRIEVAL_REASON_PROMPT.format(
+                user_query=user_query,
+                retrieved_documents=retrieved_documents,
+            )
+            retrieval_relevany_response = await self.llm.ainvoke(
+                [HumanMessage(content=message)]
+            )
 
-            if isinstance(answer, AIMessage):
-                answer = answer.content
+            if isinstance(retrieval_relevany_response, AIMessage):
+                retrieval_relevany_response = retrieval_relevany_response.content
 
-            retrieved_data = rag_response.get("retrieved_data", {})
-            if retrieved_data:
-                extracted_docs = retrieved_data.get("source_documents", [])
-                extracted_formatted_docs = retrieved_data.get("formatted_context", "")
+            return retrieval_relevany_response
 
-            return {
-                "user_query": user_query,
-                "answer": answer,
-                "extracted_requirements": extracted_docs,
-                "reasoning": (
-                    self.generate_retrieval_resoning(
-                        user_query,
-                        extracted_formatted_docs,
-                    )
-                    if extracted_formatted_docs
-                    else ""
-                ),
-            }
+        except Exception as e:
+            msg = f"Failed to generate retrieval reasoning for query: {user_query}\nError: {e}"
+            log.error(msg)
+            raise ValueError(msg)
+
+    def _unpack_rag_response(self, rag_response: dict) -> dict:
+        """Pull the answer and retrieved documents out of the RAG chain output."""
+        extracted_docs, extracted_formatted_docs, context_stats = [], "", None
+        user_query = rag_response.get("input", "")
+        answer = rag_response.get("answer", "")
+
+        if isinstance(answer, AIMessage):
+            answer = answer.content
+
+        retrieved_data = rag_response.get("retrieved_data", {})
+        if retrieved_data:
+            extracted_docs = retrieved_data.get("source_documents", [])
+            extracted_formatted_docs = retrieved_data.get("formatted_context", "")
+            context_stats = retrieved_data.get("context_stats")
+
+        structured_reasoning = None
+        if isinstance(answer, RAGAnswerWithRelevance):
+            # structured mode: the relevance verdicts came with the answer
+            structured_reasoning = answer.format_reasoning(len(extracted_docs))
+            answer = answer.answer
+
+        return {
+            "user_query": user_query,
+            "answer": answer,
+            "extracted_requirements": extracted_docs,
+            "formatted_context": extracted_formatted_docs,
+            "structured_reasoning": structured_reasoning,
+            "context_stats": context_stats,
+        }
+
+    def submit_reasoning_job(self, response: dict, formatted_context: str) -> str:
+        """
+        Compute the retrieval reasoning on the background worker pool. The
+        reasoning is written back into `response` when the job finishes, so a
+        cached copy of the response becomes complete as well.
+        """
+
+        def on_done(reasoning: str):
+            response["reasoning"] = reasoning
+            response["reasoning_job_id"] = None
+
+        return reasoning_jobs.submit(
+            self.generate_retrieval_resoning,
+            response["user_query"],
+            formatted_context,
+            on_done=on_done,
+        )
+
+    def validate_and_process_rag_response(
+        self, rag_response: dict, reasoning_mode: str = "inline"
+    ) -> dict:
+        """
+        `reasoning_mode` is "inline" (reasoning computed before returning),
+        "background" (returned as `reasoning_job_id`) or "skip".
+        """
+        try:
+            response = self._unpack_rag_response(rag_response)
+            formatted_context = response.pop("formatted_context")
+            structured_reasoning = response.pop("structured_reasoning")
+            response["reasoning"], response["reasoning_job_id"] = "", None
+            if structured_reasoning is not None:
+                response["reasoning"] = structured_reasoning
+                return response
+            if not formatted_context or reasoning_mode == "skip":
+                return response
+            if reasoning_mode == "background":
+                response["reasoning_job_id"] = self.submit_reasoning_job(
+                    response, formatted_context
+                )
+                return response
+            response["reasoning"] = self.generate_retrieval_resoning(
+                response["user_query"],
+                formatted_context,
+            )
+            return response
         except Exception as e:
             msg = f"Failed to valid to RAG response: {rag_response}\nError: {e}"
             log.error(msg)
             raise ValueError(msg)
 
+    async def avalidate_and_process_rag_response(
+        self, rag_response: dict, reasoning_mode: str = "inline"
+    ) -> dict:
+        """Async version of `validate_and_process_rag_response`."""
+        try:
+            response = self._unpack_rag_response(rag_response)
+            formatted_context = response.pop("formatted_context")
+            structured_reasoning = response.pop("structured_reasoning")
+            response["reasoning"], response["reasoning_job_id"] = "", None
+            if structured_reasoning is not None:
+                response["reasoning"] = structured_reasoning
+                return response
+            if not formatted_context or reasoning_mode == "skip":
+                return response
+            if reasoning_mode == "background":
+                response["reasoning_job_id"] = self.submit_reasoning_job(
+                    response, formatted_context
+                )
+                return response
+            response["reasoning"] = await self.agenerate_retrieval_resoning(
+                response["user_query"],
+                formatted_context,
+            )
+            return response
+        except Exception as e:
+            msg = f"Failed to valid to RAG response: {rag_response}\nError: {e}"
+            log.error(msg)
+            raise ValueError(msg)
+
+    def _parse_sub_queries(self, response: UserQueries, query: str) -> list[str]:
+        response_dict = response.model_dump()
+        log.debug(f"generated sub queries by LLM: {response_dict}")
+        queries = response_dict.get("queries", "")
+        return queries if queries else [query]
+
     def breakdown_queries(self, query: str) -> list[str]:
         """If user asked multiple queries in single queries, break down queries to improve the retrieved results"""
         try:
             structured_llm = self.llm.with_structured_output(UserQueries)
             message = config.QUERY_BREAK_PROMPT.format(query=query)
             response = structured_llm.invoke([HumanMessage(content=message)])
-            response_dict = response.model_dump()
-            log.debug(f"generated sub queries by LLM: {response_dict}")
-            queries = response_dict.get("queries", "")
-            queries = queries if queries else [query]
-            return queries
+            return self._parse_sub_queries(response, query)
+        except Exception as e:
+            log.error(
+                f"failed to break down query, so going with original user query "
+                f"for retrieval: {e}"
+            )
+            return [query]
+
+    async def abreakdown_queries(self, query: str) -> list[str]:
+        """Async version of `breakdown_queries`."""
+        try:
+            structured_llm = self.llm.with_structured_output(UserQueries)
+            message = config.QUERY_BREAK_PROMPT.format(query=query)
+            response = await structured_llm.ainvoke([HumanMessage(content=message)])
+            return self._parse_sub_queries(response, query)
         except Exception as e:
             log.error(
-                f"failed to break down query, so going with original user query for retrieval"
+                f"failed to break down query, so going with original user query "
+                f"for retrieval: {e}"
             )
             return [query]
 
     def deduplicate_docs(self, docs: list[Document]) -> list[Document]:
+        """Keep the first occurrence of each chunk, matched by chunk id or content."""
         unique_docs = []
-        seen_content = set()
+        seen_ids, seen_content = set(), set()
         for doc in docs:
-            if doc.page_content not in seen_content:
-                unique_docs.append(doc)
-                seen_content.add(doc.page_content)
+            if doc.id in seen_ids or doc.page_content in seen_content:
+                continue
+            unique_docs.append(doc)
+            if doc.id:
+                seen_ids.add(doc.id)
+            seen_content.add(doc.page_content)
         return unique_docs
 
-    def generate_response(self, query: str, retriever, metadata: dict) -> str:
+    def _fuse(self, results: list[list[Document]]) -> list[Document]:
+        """Merge per-query results into one deduplicated list, not truncated."""
+        if config.FUSION_METHOD == "rrf":
+            fused = reciprocal_rank_fusion(results, c=config.RRF_CONSTANT)
+            docs = [doc for doc, _ in fused]
+        else:
+            docs = [doc for query_docs in results for doc in query_docs]
+        return self.deduplicate_docs(docs)
+
+    def _mmr_order(self, query_vectors, doc_vectors) -> list[int]:
+        """Positions of the `FUSION_TOP_K` candidates picked by MMR, in order."""
+        return maximal_marginal_relevance(
+            query_vectors,
+            doc_vectors,
+            k=config.FUSION_TOP_K,
+            lambda_mult=config.MMR_LAMBDA,
+        )
+
+    def fuse_documents(
+        self, retriever, queries: list[str], results: list[list[Document]]
+    ) -> list[Document]:
+        """
+        Fuse the results of several queries and keep `FUSION_TOP_K` of them.
+        With `MMR_ENABLED` they are selected from all the fused candidates for
+        diversity using the stored chunk vectors. The query vectors come from
+        the embedding cache filled by retrieval.
+        """
+        docs = self._fuse(results)
+        if config.MMR_ENABLED and len(docs) > 1:
+            store = retriever.vectorstore
+            query_vectors = store.embeddings.embed_documents(queries)
+            doc_vectors = store.get_embeddings([doc.id for doc in docs])
+            return [docs[i] for i in self._mmr_order(query_vectors, doc_vectors)]
+        return docs[: config.FUSION_TOP_K]
+
+    async def afuse_documents(
+        self, retriever, queries: list[str], results: list[list[Document]]
+    ) -> list[Document]:
+        """Async version of `fuse_documents`."""
+        docs = self._fuse(results)
+        if config.MMR_ENABLED and len(docs) > 1:
+            store = retriever.vectorstore
+            query_vectors = await store.embeddings.aembed_documents(queries)
+            doc_vectors = await asyncio.to_thread(
+                store.get_embeddings, [doc.id for doc in docs]
+            )
+            return [docs[i] for i in self._mmr_order(query_vectors, doc_vectors)]
+        return docs[: config.FUSION_TOP_K]
+
+    async def aretrieve_for_queries(
+        self, retriever, sub_queries: list[str]
+    ) -> list[Document]:
+        """
+        Retrieve all sub-queries with one batched embedding call and one store
+        search, then fuse the results.
+        """
+        try:
+            log.debug(f"Retrieving documents for {len(sub_queries)} queries...")
+            results = await retriever.aretrieve_many(sub_queries)
+            unique_docs = await self.afuse_documents(retriever, sub_queries, results)
+            log.debug(f"Total unique docs retrieved: {len(unique_docs)}\n{unique_docs}")
+            return unique_docs
+        except Exception as e:
+            log.error(f"failed to retrieved the relevant documents due to: {e}")
+            raise
+
+    async def aprefetch_documents(self, query: str, retriever) -> dict:
+        """
+        Break down the query and retrieve its documents ahead of the router
+        decision. Retrieval for the original query starts alongside the breakdown
+        call and is reused when the query is not split.
+        """
+        original_task = asyncio.create_task(retriever.ainvoke(query))
+        try:
+            queries = await self.abreakdown_queries(query)
+            if queries == [query]:
+                docs = await self.afuse_documents(
+                    retriever, queries, [await original_task]
+                )
+            else:
+                original_task.cancel()
+                docs = await self.aretrieve_for_queries(retriever, queries)
+        except BaseException:
+            original_task.cancel()
+            raise
+        return {"sub_queries": queries, "docs": docs}
+
+    def build_rag_chain(self, retriever):
         """
         Creates and returns the main RAG chain. This chain:
         1. Retrieves documents.
@@ -233,28 +429,29 @@ class LcGeneration(Generation):
         5. Logs the final prompt before sending it to the LLM.
         6. Invokes the LLM and parses the output.
 
+        The chain supports both `invoke` and `ainvoke`. Sub-queries are embedded
+        in one batch and searched in one store query. Documents passed in the
+        input under `docs` (prefetched by speculative retrieval) skip retrieval.
+
         Args:
             retriever: The configured EnsembleRetriever to use for fetching context.
 
         Returns:
             A runnable RAG chain.
         """
-        with measure_time("break down user query", log):
-            # if user asked multiple queries in single request, breakdown into list of queries
-            queries = self.breakdown_queries(query)
 
         def retrieve_for_multiple_queries(input_dict: dict) -> list[Document]:
+            if "docs" in input_dict:
+                return input_dict["docs"]
             try:
                 # Get the list of queries from input, default to original input if missing
                 sub_queries = input_dict.get("sub_queries", [input_dict["input"]])
-                all_docs = []
                 log.debug(f"Retrieving documents for {len(sub_queries)} queries...")
-                for q in sub_queries:
-                    docs = retriever.invoke(q)
-                    all_docs.extend(docs)
-                log.debug(f"All documents retrieved: {all_docs}")
-                # Deduplicate documents to avoid passing the same text twice to LLM
-                unique_docs = self.deduplicate_docs(all_docs)
+                # one embedding call and one store search for all sub-queries
+                results = retriever.retrieve_many(sub_queries)
+                log.debug(f"All documents retrieved: {results}")
+                # Fuse and deduplicate to avoid passing the same text twice to LLM
+                unique_docs = self.fuse_documents(retriever, sub_queries, results)
                 log.debug(
                     f"Total unique docs retrieved: {len(unique_docs)}\n{unique_docs}"
                 )
@@ -263,31 +460,117 @@ class LcGeneration(Generation):
                 log.error(f"failed to retrieved the relevant documents due to: {e}")
                 raise
 
-        with measure_time("retrieve relevant documents", log):
-            retrieval_branch = RunnableParallel(
-                docs=RunnableLambda(retrieve_for_multiple_queries),
+        async def aretrieve_for_multiple_queries(input_dict: dict) -> list[Document]:
+            if "docs" in input_dict:
+                return input_dict["docs"]
+            sub_queries = input_dict.get("sub_queries", [input_dict["input"]])
+            return await self.aretrieve_for_queries(retriever, sub_queries)
+
+        retrieval_branch = (
+            RunnableParallel(
+                docs=RunnableLambda(
+                    retrieve_for_multiple_queries, afunc=aretrieve_for_multiple_queries
+                ),
                 metadata=itemgetter("metadata"),
-            ) | RunnableLambda(self.format_retrieved_document)
-
-        with measure_time("Augment & Generation Chain initialization", log):
-            rag_chain = RunnableParallel(
-                retrieved_data=retrieval_branch,
-                input=itemgetter("input"),
-            ).assign(
-                answer=(
-                    {
-                        "context": lambda x: x["retrieved_data"]["formatted_context"],
-                        "input": itemgetter("input"),
-                    }
-                    | config.RAG_GENERATION_PROMPT
-                    | RunnableLambda(self._log_final_prompt)
-                    | self.llm
-                )
+                queries=lambda x: x.get("sub_queries", [x["input"]]),
+            )
+            | RunnableLambda(self.rerank_documents, afunc=self.arerank_documents)
+            | RunnableLambda(self.format_retrieved_document)
+        )
+
+        if config.GENERATION_MODE == "structured":
+            # one call returns the answer and the per-document relevance
+            generation_step = (
+                config.RAG_STRUCTURED_PROMPT
+                | RunnableLambda(self._log_final_prompt)
+                | self.llm.with_structured_output(RAGAnswerWithRelevance)
+            )
+        else:
+            generation_step = (
+                config.RAG_GENERATION_PROMPT
+                | RunnableLambda(self._log_final_prompt)
+                | self.llm
             )
 
+        rag_chain = RunnableParallel(
+            retrieved_data=retrieval_branch,
+            input=itemgetter("input"),
+        ).assign(
+            answer=(
+                {
+                    "context": lambda x: x["retrieved_data"]["formatted_context"],
+                    "input": itemgetter("input"),
+                }
+                | generation_step
+            )
+        )
+
         log.info(
             "RAG chain with document formatting and prompt inspection created successfully."
         )
+        return rag_chain
+
+    async def astream_response(
+        self,
+        query: str,
+        retriever,
+        metadata: dict,
+        prefetched: dict | None = None,
+        reasoning_mode: str = "inline",
+    ):
+        """
+        Stream the RAG response as `(event, data)` pairs: the retrieved
+        documents as soon as retrieval finishes, then answer tokens as the LLM
+        generates them, then the retrieval reasoning (`reasoning_job_id` in
+        background mode, nothing when skipped).
+        """
+        if prefetched:
+            queries, docs = prefetched["sub_queries"], prefetched["docs"]
+        else:
+            with measure_time("break down user query", log):
+                queries = await self.abreakdown_queries(query)
+            docs = await self.aretrieve_for_queries(retriever, queries)
+
+        inputs = await self.arerank_documents(
+            {"docs": docs, "metadata": metadata, "queries": queries}
+        )
+        retrieved_data = self.format_retrieved_document(inputs)
+        yield "extracted_requirements", retrieved_data["source_documents"]
+        yield "context_stats", retrieved_data["context_stats"]
+
+        prompt = config.RAG_GENERATION_PROMPT.format_messages(
+            context=retrieved_data["formatted_context"], input=query
+        )
+        with measure_time("RAG answer streaming", log):
+            async for chunk in self.llm.astream(prompt):
+                text = message_text(chunk)
+                if text:
+                    yield "answer", text
+
+        formatted_context = retrieved_data["formatted_context"]
+        if reasoning_mode == "skip":
+            return
+        if reasoning_mode == "background" and formatted_context:
+            response = {"user_query": query, "reasoning": ""}
+            yield "reasoning_job_id", self.submit_reasoning_job(
+                response, formatted_context
+            )
+            return
+        reasoning = (
+            await self.agenerate_retrieval_resoning(query, formatted_context)
+            if formatted_context
+            else ""
+        )
+        yield "reasoning", reasoning
+
+    def generate_response(
+        self, query: str, retriever, metadata: dict, reasoning_mode: str = "inline"
+    ) -> str:
+        with measure_time("break down user query", log):
+            # if user asked multiple queries in single request, breakdown into list of queries
+            queries = self.breakdown_queries(query)
+
+        rag_chain = self.build_rag_chain(retriever)
         with measure_time("RAG answer generation", log):
             response = rag_chain.invoke(
                 {
@@ -296,7 +579,40 @@ class LcGeneration(Generation):
                     "metadata": metadata,
                 }
             )
-        response = self.validate_and_process_rag_response(response)
+        response = self.validate_and_process_rag_response(response, reasoning_mode)
+        return (
+            response
+            if response and isinstance(response, dict)
+            else "Sorry I am unable to answer from RFP Knowledge base"
+        )
+
+    async def agenerate_response(
+        self,
+        query: str,
+        retriever,
+        metadata: dict,
+        prefetched: dict | None = None,
+        reasoning_mode: str = "inline",
+    ) -> str:
+        """
+        Async version of `generate_response`, no worker thread is held on LLM calls.
+        `prefetched` is the output of `aprefetch_documents` when speculative
+        retrieval already ran alongside the router.
+        """
+        chain_input = {"input": query, "metadata": metadata}
+        if prefetched:
+            chain_input["sub_queries"] = prefetched["sub_queries"]
+            chain_input["docs"] = prefetched["docs"]
+        else:
+            with measure_time("break down user query", log):
+                chain_input["sub_queries"] = await self.abreakdown_queries(query)
+
+        rag_chain = self.build_rag_chain(retriever)
+        with measure_time("RAG answer generation", log):
+            response = await rag_chain.ainvoke(chain_input)
+        response = await self.avalidate_and_process_rag_response(
+            response, reasoning_mode
+        )
         return (
             response
             if response and isinstance(response, dict)
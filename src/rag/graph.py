@@ -1,12 +1,16 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, START, END
-from src.rag.states import RFPInputState, RFPOutputState
+from src.rag.states import RFPInputState, RFPOutputState, RFPState
 from src.rag.rag_executor import rfp_rag
+from src.rag.generation import message_text
+from src.rag.local_router import build_local_router
 from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
 from src.common import config
 from src.common.logger import log
 from dotenv import load_dotenv
+import asyncio
 
 
 load_dotenv(override=True)
@@ -19,6 +23,8 @@ llm = ChatGoogleGenerativeAI(
     max_retries=2,
 )
 
+local_router = build_local_router()
+
 
 def rag_search(state: RFPInputState) -> RFPOutputState:
     """
@@ -29,40 +35,188 @@ def rag_search(state: RFPInputState) -> RFPOutputState:
         if not state["user_query"]:
             return {"messages": [AIMessage(content="Please provide a valid question.")]}
 
-        rag_response = rfp_rag.get_response(
-            query=state["user_query"], metadata=state.get("metadata", {})
+        # the router node already looked up the answer cache
+        rag_response = state.get("cached_response") or rfp_rag.get_response(
+            query=state["user_query"],
+            metadata=state.get("metadata", {}),
+            lookup_cache=False,
+            reasoning_mode=state.get("reasoning_mode") or "inline",
         )
         log.debug("rag_response: ", rag_response)
         return {
             "answer": rag_response["answer"],
             "extracted_requirements": rag_response["extracted_requirements"],
             "reasoning": rag_response["reasoning"],
+            "reasoning_job_id": rag_response.get("reasoning_job_id"),
+            "context_stats": rag_response.get("context_stats"),
         }
     except Exception as e:
         log.error(f"Error in RAGNode execution: {e}")
         return {"messages": [AIMessage(content="Failed to generate desired results")]}
 
 
+async def arag_search(state: RFPState) -> RFPOutputState:
+    """
+    Async version of `rag_search`, reusing speculatively retrieved documents.
+    """
+    log.debug(f"Executing async ChatbotNode for query: {state['user_query']}")
+    try:
+        if not state["user_query"]:
+            return {"messages": [AIMessage(content="Please provide a valid question.")]}
+
+        rag_response = state.get("cached_response") or await rfp_rag.aget_response(
+            query=state["user_query"],
+            metadata=state.get("metadata", {}),
+            prefetched=state.get("prefetched"),
+            lookup_cache=False,
+            reasoning_mode=state.get("reasoning_mode") or "inline",
+        )
+        return {
+            "answer": rag_response["answer"],
+            "extracted_requirements": rag_response["extracted_requirements"],
+            "reasoning": rag_response["reasoning"],
+            "reasoning_job_id": rag_response.get("reasoning_job_id"),
+            "context_stats": rag_response.get("context_stats"),
+        }
+    except Exception as e:
+        log.error(f"Error in RAGNode execution: {e}")
+        return {"messages": [AIMessage(content="Failed to generate desired results")]}
+
+
+def parse_router_response(router_response) -> str:
+    if isinstance(router_response, AIMessage):
+        router_response = router_response.content
+    log.debug(f"Router decision: {router_response}")
+    if router_response.strip().strip("\"'") == "1":
+        return "rag_search"
+    else:
+        return "general_response"
+
+
+def local_route(state: RFPInputState) -> str | None:
+    """
+    Route with the in-process classifier. Returns None when the LLM router
+    has to decide, i.e. in "llm" mode or when the score is inside the
+    uncertainty band in "hybrid" mode.
+    """
+    if config.ROUTER_TYPE == "llm":
+        return None
+    score = local_router.score(state["user_query"])
+    low, high = config.ROUTER_UNCERTAINTY_BAND
+    log.debug(f"Local router score: {score:.3f}")
+    if config.ROUTER_TYPE == "local":
+        return "rag_search" if score >= 0.5 else "general_response"
+    if score >= high:
+        return "rag_search"
+    if score <= low:
+        return "general_response"
+    return None
+
+
 def router_function(state: RFPInputState):
     """
     Determines the next step in the graph.
     """
     log.info(f"Executing router for user query: {state['user_query']}.")
+    route = local_route(state)
+    if route:
+        return route
+    try:
+        message = config.ROUTER_PROMPT.format(user_query=state["user_query"])
+        return parse_router_response(llm.invoke([HumanMessage(content=message)]))
+    except Exception as e:
+        log.error(f"Error in router execution: {e}")
+        return "general_response"
+
+
+async def arouter_function(state: RFPInputState):
+    """
+    Async version of `router_function`.
+    """
+    log.info(f"Executing async router for user query: {state['user_query']}.")
+    route = local_route(state)
+    if route:
+        return route
     try:
         message = config.ROUTER_PROMPT.format(user_query=state["user_query"])
-        router_response = llm.invoke([HumanMessage(content=message)])
-        if isinstance(router_response, AIMessage):
-            router_response = router_response.content
-        log.debug(f"Router decision: {router_response}")
-        if router_response == "1" or "1" in router_response:
-            return "rag_search"
-        else:
-            return "general_response"
+        return parse_router_response(await llm.ainvoke([HumanMessage(content=message)]))
     except Exception as e:
         log.error(f"Error in router execution: {e}")
         return "general_response"
 
 
+def route_query(state: RFPInputState) -> RFPState:
+    """
+    Router node, stores the routing decision in the state. Only RAG answers
+    are cached, so an answer cache hit routes straight to `rag_search`.
+    """
+    route = local_route(state)
+    if route != "general_response":
+        cached = rfp_rag.lookup_cached_response(
+            state["user_query"], state.get("metadata", {})
+        )
+        if cached:
+            return {"route": "rag_search", "cached_response": cached}
+    return {"route": route or router_function(state)}
+
+
+async def aroute_query(state: RFPInputState) -> RFPState:
+    """
+    Async router node. With speculative retrieval enabled, query breakdown and
+    retrieval start together with the router call, taking one LLM round-trip
+    off the critical path of RAG queries. Both also overlap the answer cache
+    lookup. On a cache hit, or if the query is routed to a general response,
+    the speculative work is cancelled.
+    """
+    route = local_route(state)
+    if route == "general_response":
+        return {"route": route}
+
+    query, metadata = state["user_query"], state.get("metadata", {})
+    tasks = []
+    if route is None:
+        router_task = asyncio.create_task(arouter_function(state))
+        tasks.append(router_task)
+        speculative_task = None
+        if config.SPECULATIVE_RETRIEVAL and query:
+            speculative_task = asyncio.create_task(rfp_rag.aprefetch(query, metadata))
+            tasks.append(speculative_task)
+    try:
+        cached = await rfp_rag.alookup_cached_response(query, metadata)
+        if cached:
+            for task in tasks:
+                task.cancel()
+            return {"route": "rag_search", "cached_response": cached}
+
+        # a confident local decision leaves nothing to overlap with
+        if route:
+            return {"route": route}
+        route = await router_task
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+    if speculative_task is None:
+        return {"route": route}
+    if route != "rag_search":
+        log.debug("Router picked general response, cancelling speculative retrieval")
+        speculative_task.cancel()
+        return {"route": route}
+
+    try:
+        prefetched = await speculative_task
+    except Exception as e:
+        # rag_search falls back to the regular breakdown and retrieval
+        log.warning(f"Speculative retrieval failed, retrying in RAG node: {e}")
+        prefetched = None
+    return {"route": route, "prefetched": prefetched}
+
+
+def select_route(state: RFPState) -> str:
+    return state["route"]
+
+
 def general_response(state: RFPInputState) -> RFPOutputState:
     try:
         log.debug(f"Executing general response with user query: {state['user_query']}")
@@ -77,21 +231,45 @@ def general_response(state: RFPInputState) -> RFPOutputState:
         raise ValueError(msg)
 
 
+async def ageneral_response(state: RFPInputState) -> RFPOutputState:
+    try:
+        log.debug(f"Executing general response with user query: {state['user_query']}")
+        message = config.GENERAL_SYSTEM_PROMPT.format(user_query=state["user_query"])
+        response = await llm.ainvoke([HumanMessage(content=message)])
+        if isinstance(response, AIMessage):
+            response = response.content
+        return {"answer": response}
+    except Exception as e:
+        msg = f"Failed to response by LLM due to {e}"
+        log.error(msg)
+        raise ValueError(msg)
+
+
 def build_graph():
     """
     Builds and compiles the LangGraph.
+
+    Every node has a sync and an async implementation, so the compiled graph
+    serves both `invoke` and `ainvoke`.
     """
     try:
-        rfp_graph = StateGraph(RFPInputState, output_schema=RFPOutputState)
+        rfp_graph = StateGraph(
+            RFPState, input_schema=RFPInputState, output_schema=RFPOutputState
+        )
 
         # Add nodes to the graph
-        rfp_graph.add_node(rag_search)
-        rfp_graph.add_node(general_response)
+        rfp_graph.add_node("route_query", RunnableLambda(route_query, afunc=aroute_query))
+        rfp_graph.add_node("rag_search", RunnableLambda(rag_search, afunc=arag_search))
+        rfp_graph.add_node(
+            "general_response",
+            RunnableLambda(general_response, afunc=ageneral_response),
+        )
 
         # add edges
+        rfp_graph.add_edge(START, "route_query")
         rfp_graph.add_conditional_edges(
-            START,
-            router_function,
+            "route_query",
+            select_route,
             ["rag_search", "general_response"],
         )
         rfp_graph.add_edge("rag_search", END)
@@ -105,3 +283,36 @@ def build_graph():
         log.error(msg)
         raise
     return compiled_graph
+
+
+async def astream_query(
+    user_query: str, metadata: dict, reasoning_mode: str = "inline"
+):
+    """
+    Streaming counterpart of the compiled graph: routes the query like
+    `route_query`, then yields `(event, data)` pairs. RAG queries emit
+    `extracted_requirements`, `answer` tokens and `reasoning` (or
+    `reasoning_job_id`), general queries emit their `answer` tokens. The
+    stream always ends with `done`.
+    """
+    state = {"user_query": user_query, "metadata": metadata}
+    routed = await aroute_query(state)
+
+    if routed["route"] == "rag_search":
+        async for event, data in rfp_rag.astream_response(
+            user_query,
+            metadata,
+            prefetched=routed.get("prefetched"),
+            cached_response=routed.get("cached_response"),
+            reasoning_mode=reasoning_mode,
+        ):
+            yield event, data
+    else:
+        yield "extracted_requirements", []
+        message = config.GENERAL_SYSTEM_PROMPT.format(user_query=user_query)
+        async for chunk in llm.astream([HumanMessage(content=message)]):
+            text = message_text(chunk)
+            if text:
+                yield "answer", text
+        yield "reasoning", ""
+    yield "done", {}
@@ -0,0 +1,91 @@
+from src.common import config
+from src.common.logger import log
+import random
+import math
+import json
+import zlib
+import re
+
+
+class LocalRouter:
+    """
+    In-process query router: a logistic regression over hashed word and
+    character n-gram features, trained on labeled example queries.
+
+    `score` returns the probability that a query should go to RAG search and
+    runs in a few microseconds, so the LLM router is only needed when the score
+    falls inside the configured uncertainty band.
+    """
+
+    def __init__(
+        self,
+        n_features: int = 2**18,
+        epochs: int = 40,
+        learning_rate: float = 0.3,
+        l2: float = 1e-4,
+        seed: int = 13,
+    ):
+        self.n_features = n_features
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.weights: dict[int, float] = {}
+        self.bias = 0.0
+
+    def features(self, text: str) -> list[int]:
+        """Hashed word unigrams, word bigrams and in-word character trigrams."""
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        grams = [f"w:{w}" for w in words]
+        grams += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        if not words:
+            grams.append("empty")
+        return [zlib.crc32(g.encode("utf-8")) % self.n_features for g in grams]
+
+    def _logit(self, features: list[int]) -> float:
+        # scale by the feature count so long and short queries are comparable
+        weights = self.weights
+        total = sum(weights.get(f, 0.0) for f in features)
+        return self.bias + total / math.sqrt(len(features))
+
+    def fit(self, examples: list[dict]) -> "LocalRouter":
+        """Train with SGD on `{"query": str, "label": 0 | 1}` examples."""
+        data = [(self.features(e["query"]), int(e["label"])) for e in examples]
+        rng = random.Random(self.seed)
+        for epoch in range(self.epochs):
+            rng.shuffle(data)
+            lr = self.learning_rate / (1 + 0.1 * epoch)
+            for features, label in data:
+                gradient = sigmoid(self._logit(features)) - label
+                step = lr * gradient / math.sqrt(len(features))
+                for f in features:
+                    w = self.weights.get(f, 0.0)
+                    self.weights[f] = w - step - lr * self.l2 * w
+                self.bias -= lr * gradient
+        return self
+
+    def score(self, query: str) -> float:
+        """Probability in [0, 1] that the query is about the RFP documents."""
+        return sigmoid(self._logit(self.features(query)))
+
+
+def sigmoid(x: float) -> float:
+    if x >= 0:
+        return 1.0 / (1.0 + math.exp(-x))
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+def load_router_examples(path: str = config.ROUTER_EXAMPLES_PATH) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build_local_router(path: str = config.ROUTER_EXAMPLES_PATH) -> LocalRouter:
+    examples = load_router_examples(path)
+    router = LocalRouter().fit(examples)
+    log.info(f"Local router trained on {len(examples)} labeled queries")
+    return router
@@ -1,16 +1,20 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
+from src.common import config
 
 
 class Metadata(BaseModel):
     file_name: Optional[str]
-    # company: Optional[str]
-    # project: Optional[str]
+    company: Optional[str] = None
+    project: Optional[str] = None
 
 
 class RFPRequest(BaseModel):
     user_query: str
     metadata: Metadata
+    # "inline": reasoning in the response, "background": fetch it later from
+    # /reasoning/{reasoning_job_id}, "skip": no reasoning LLM call
+    reasoning_mode: Literal["inline", "background", "skip"] = config.REASONING_MODE
 
 
 class RFPResponse(BaseModel):
@@ -18,7 +22,47 @@ class RFPResponse(BaseModel):
     answer: str = ""
     reasoning: str = ""
     extracted_requirements: List = []
+    reasoning_job_id: Optional[str] = None
+    # prompt size and what the rerank stage trimmed
+    context_stats: Optional[dict] = None
 
 
 class UserQueries(BaseModel):
     queries: List[str] = Field(description="list of all unique queries asked by user")
+
+
+class DocumentRelevance(BaseModel):
+    document_index: int = Field(description="index N of the judged Document-N")
+    relevant: bool = Field(description="whether the document is relevant to the query")
+    reasoning: str = Field(description="why the document is relevant or not relevant")
+
+
+class RAGAnswerWithRelevance(BaseModel):
+    answer: str = Field(description="answer to the user's query from the documents")
+    documents: List[DocumentRelevance] = Field(
+        description="relevance verdict for every retrieved document"
+    )
+
+    def format_reasoning(self, total_documents: int) -> str:
+        """
+        Render the verdicts in the `RETRIEVAL_REASON_PROMPT` output format,
+        one block per retrieved document. Documents without a verdict are
+        reported as not relevant.
+        """
+        verdicts = {v.document_index: v for v in self.documents}
+        blocks = []
+        for index in range(1, total_documents + 1):
+            verdict = verdicts.get(index)
+            relevance = "Yes" if verdict and verdict.relevant else "No"
+            reasoning = verdict.reasoning if verdict else "No verdict returned."
+            blocks.append(
+                f"Document-{index}\nRelevance: {relevance}\nReasoning: {reasoning}"
+            )
+        return "\n\n".join(blocks)
+
+
+class ReasoningJobResponse(BaseModel):
+    job_id: str
+    status: Literal["pending", "running", "done", "failed"]
+    reasoning: str = ""
+    error: Optional[str] = None
@@ -1,6 +1,11 @@
-from src.rag.retriever import create_ensemble_retriever
+from src.rag.retriever import create_ensemble_retriever, load_sparse_index
+from src.rag.vector_stores import load_vector_store
 from src.rag.generation import LcGeneration
+from src.rag.answer_cache import SemanticAnswerCache
+from src.common.utils import read_index_generation
 from src.common.logger import log
+from src.common import config
+import threading
 
 
 class RfpRAGExecutor:
@@ -28,18 +33,244 @@ class RfpRAGExecutor:
 
         log.info("Initializing RAG pipeline...")
         self.generator = LcGeneration()
+        self.vector_store = None
+        self.sparse_index = None
+        self.answer_cache = (
+            SemanticAnswerCache(
+                similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+                max_entries=config.ANSWER_CACHE_MAX_ENTRIES,
+                ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+            )
+            if config.ANSWER_CACHE_ENABLED
+            else None
+        )
+        self._lock = threading.Lock()
         self._initialized = True
 
-    def get_response(self, query: str, metadata: dict) -> str:
+    def _open_retrieval_stack(self) -> tuple:
+        try:
+            sparse_index = load_sparse_index()
+        except FileNotFoundError as e:
+            log.warning(f"{e} Falling back to dense retrieval.")
+            sparse_index = None
+        return load_vector_store(), sparse_index
+
+    def load_retrieval_stack(self):
+        """
+        Open the embedding client, the vector store and the BM25 index once
+        and share them across requests. Safe to call from concurrent requests.
+        Without a BM25 index, retrieval is dense only.
+        """
+        if self.vector_store is None:
+            with self._lock:
+                if self.vector_store is None:
+                    vector_store, self.sparse_index = self._open_retrieval_stack()
+                    self.vector_store = vector_store
+        return self.vector_store
+
+    def reload_retrieval_stack(self):
+        """
+        Open the indexes written by an ingestion and swap them in for the
+        shared ones. Requests keep the previous stack until the swap, and
+        those in flight finish on it.
+        """
+        with self._lock:
+            vector_store, sparse_index = self._open_retrieval_stack()
+            self.sparse_index = sparse_index
+            self.vector_store = vector_store
+        return self.vector_store
+
+    async def aclose(self):
+        """Release the connections of the shared embedding client."""
+        if self.vector_store is None:
+            return
+        embeddings = self.vector_store.embeddings
+        if hasattr(embeddings, "aclose"):
+            await embeddings.aclose()
+
+    def lookup_cached_response(
+        self, query: str, metadata: dict, generation: int | None = None
+    ) -> dict | None:
+        """Cached answer of a near-identical query with the same filter, if any."""
+        if self.answer_cache is None:
+            return None
+        try:
+            if generation is None:
+                generation = read_index_generation(config.INDEX_GENERATION_PATH)
+            embeddings = self.load_retrieval_stack().embeddings
+            vector = embeddings.embed_query(query)
+            return self.answer_cache.lookup(vector, metadata, generation)
+        except Exception as e:
+            log.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+    async def alookup_cached_response(
+        self, query: str, metadata: dict, generation: int | None = None
+    ) -> dict | None:
+        """Async version of `lookup_cached_response`."""
+        if self.answer_cache is None:
+            return None
+        try:
+            if generation is None:
+                generation = read_index_generation(config.INDEX_GENERATION_PATH)
+            embeddings = self.load_retrieval_stack().embeddings
+            vector = await embeddings.aembed_query(query)
+            return self.answer_cache.lookup(vector, metadata, generation)
+        except Exception as e:
+            log.warning(f"Answer cache lookup failed: {e}")
+            return None
+
+    def cache_response(self, query: str, metadata: dict, generation: int, response):
+        if self.answer_cache is None or not isinstance(response, dict):
+            return
+        try:
+            # the query embedding is served by the embedding cache at this point
+            vector = self.load_retrieval_stack().embeddings.embed_query(query)
+            self.answer_cache.store(vector, metadata, generation, response)
+        except Exception as e:
+            log.warning(f"Failed to cache RAG response: {e}")
+
+    async def acache_response(
+        self, query: str, metadata: dict, generation: int, response
+    ):
+        """Async version of `cache_response`."""
+        if self.answer_cache is None or not isinstance(response, dict):
+            return
         try:
+            embeddings = self.load_retrieval_stack().embeddings
+            vector = await embeddings.aembed_query(query)
+            self.answer_cache.store(vector, metadata, generation, response)
+        except Exception as e:
+            log.warning(f"Failed to cache RAG response: {e}")
+
+    def get_response(
+        self,
+        query: str,
+        metadata: dict,
+        lookup_cache: bool = True,
+        reasoning_mode: str = "inline",
+    ) -> str:
+        """
+        RAG answer for the query. `lookup_cache=False` skips the answer cache
+        lookup when the caller already did it, the answer is still cached.
+        `reasoning_mode` is "inline", "background" or "skip"; answers without
+        reasoning are not cached.
+        """
+        try:
+            generation = read_index_generation(config.INDEX_GENERATION_PATH)
+            if lookup_cache:
+                cached = self.lookup_cached_response(query, metadata, generation)
+                if cached:
+                    return cached
+
             log.info(f"Invoking RAG chain with query: '{query}'")
-            ensemble_retriever = create_ensemble_retriever(metadata)
-            return self.generator.generate_response(
-                retriever=ensemble_retriever, query=query, metadata=metadata
+            ensemble_retriever = create_ensemble_retriever(
+                metadata,
+                vector_store=self.load_retrieval_stack(),
+                sparse_index=self.sparse_index,
             )
+            response = self.generator.generate_response(
+                retriever=ensemble_retriever,
+                query=query,
+                metadata=metadata,
+                reasoning_mode=reasoning_mode,
+            )
+            if reasoning_mode != "skip":
+                self.cache_response(query, metadata, generation, response)
+            return response
         except Exception as e:
             log.error(f"Failed to get RAG response: {e}")
             return "An error occurred while processing your request."
 
+    async def aprefetch(self, query: str, metadata: dict) -> dict:
+        """Speculatively break down the query and retrieve its documents."""
+        ensemble_retriever = create_ensemble_retriever(
+            metadata,
+            vector_store=self.load_retrieval_stack(),
+            sparse_index=self.sparse_index,
+        )
+        return await self.generator.aprefetch_documents(query, ensemble_retriever)
+
+    async def aget_response(
+        self,
+        query: str,
+        metadata: dict,
+        prefetched: dict | None = None,
+        lookup_cache: bool = True,
+        reasoning_mode: str = "inline",
+    ) -> str:
+        """Async version of `get_response`."""
+        try:
+            generation = read_index_generation(config.INDEX_GENERATION_PATH)
+            if lookup_cache:
+                cached = await self.alookup_cached_response(query, metadata, generation)
+                if cached:
+                    return cached
+
+            log.info(f"Invoking async RAG chain with query: '{query}'")
+            ensemble_retriever = create_ensemble_retriever(
+                metadata,
+                vector_store=self.load_retrieval_stack(),
+                sparse_index=self.sparse_index,
+            )
+            response = await self.generator.agenerate_response(
+                retriever=ensemble_retriever,
+                query=query,
+                metadata=metadata,
+                prefetched=prefetched,
+                reasoning_mode=reasoning_mode,
+            )
+            if reasoning_mode != "skip":
+                await self.acache_response(query, metadata, generation, response)
+            return response
+        except Exception as e:
+            log.error(f"Failed to get RAG response: {e}")
+            return "An error occurred while processing your request."
+
+    async def astream_response(
+        self,
+        query: str,
+        metadata: dict,
+        prefetched: dict | None = None,
+        cached_response: dict | None = None,
+        reasoning_mode: str = "inline",
+    ):
+        """
+        Stream the RAG response as `(event, data)` pairs, see
+        `LcGeneration.astream_response`. The answer is cached once the stream
+        finishes if its reasoning was computed inline.
+        """
+        if cached_response:
+            yield "extracted_requirements", cached_response["extracted_requirements"]
+            yield "answer", cached_response["answer"]
+            if cached_response.get("reasoning_job_id"):
+                yield "reasoning_job_id", cached_response["reasoning_job_id"]
+            elif reasoning_mode != "skip":
+                yield "reasoning", cached_response["reasoning"]
+            return
+
+        generation = read_index_generation(config.INDEX_GENERATION_PATH)
+        log.info(f"Streaming RAG response for query: '{query}'")
+        ensemble_retriever = create_ensemble_retriever(
+            metadata,
+            vector_store=self.load_retrieval_stack(),
+            sparse_index=self.sparse_index,
+        )
+        response = {"user_query": query, "answer": ""}
+        async for event, data in self.generator.astream_response(
+            query,
+            ensemble_retriever,
+            metadata,
+            prefetched=prefetched,
+            reasoning_mode=reasoning_mode,
+        ):
+            if event == "answer":
+                response["answer"] += data
+            else:
+                response[event] = data
+            yield event, data
+        if "reasoning" in response:
+            await self.acache_response(query, metadata, generation, response)
+
 
 rfp_rag = RfpRAGExecutor()
@@ -0,0 +1,100 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from src.common import config
+from src.common.logger import log
+from typing import Callable
+import threading
+import uuid
+import time
+
+
+class ReasoningJobManager:
+    """
+    Runs retrieval-reasoning LLM calls on a background worker pool so the
+    answer can be returned without waiting for them. Finished jobs are kept
+    for `ttl_seconds` so clients can poll their result.
+    """
+
+    def __init__(self, max_workers: int, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="reasoning"
+        )
+        self._jobs: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def submit(
+        self,
+        fn: Callable[..., str],
+        *args,
+        on_done: Callable[[str], None] | None = None,
+    ) -> str:
+        """Schedule `fn(*args)` and return the job id. `on_done` gets the result."""
+        self._purge_expired()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "status": "pending",
+                "reasoning": "",
+                "error": None,
+                "finished_at": None,
+            }
+
+        def run() -> str:
+            self._update(job_id, status="running")
+            return fn(*args)
+
+        def finished(future: Future):
+            try:
+                reasoning = future.result()
+                self._update(job_id, status="done", reasoning=reasoning)
+                if on_done:
+                    on_done(reasoning)
+            except Exception as e:
+                log.error(f"Reasoning job {job_id} failed: {e}")
+                self._update(job_id, status="failed", error=str(e))
+
+        self._pool.submit(run).add_done_callback(finished)
+        return job_id
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if fields.get("status") in ("done", "failed"):
+                job["finished_at"] = time.time()
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job["finished_at"] and now - job["finished_at"] > self.ttl_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> dict | None:
+        """Status and result of a job, None when unknown or expired."""
+        self._purge_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return {
+                "job_id": job_id,
+                "status": job["status"],
+                "reasoning": job["reasoning"],
+                "error": job["error"],
+            }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+reasoning_jobs = ReasoningJobManager(
+    max_workers=config.REASONING_WORKERS,
+    ttl_seconds=config.REASONING_JOB_TTL_SECONDS,
+)
@@ -0,0 +1,120 @@
+from abc import ABC, abstractmethod
+from langchain_core.documents import Document
+from src.common.bm25_index import tokenize
+from src.common.utils import estimate_tokens, measure_time
+from src.common.logger import log
+from src.common import config
+from functools import lru_cache
+import numpy as np
+import math
+
+
+class Scorer(ABC):
+    """Relevance of candidate texts to a query, scores in [0, 1]."""
+
+    def __init__(self):
+        super().__init__()
+
+    @abstractmethod
+    def score(self, query: str, texts: list[str]) -> np.ndarray:
+        return
+
+
+class LexicalOverlapScorer(Scorer):
+    """
+    Share of the query's term weight found in each text, terms weighted by
+    their rarity among the candidates. Query terms found in no candidate are
+    ignored. No model, microseconds per candidate.
+    """
+
+    def __init__(self):
+        super().__init__()
+
+    def score(self, query: str, texts: list[str]) -> np.ndarray:
+        text_terms = [set(tokenize(text)) for text in texts]
+        doc_freqs = {
+            term: sum(term in terms for terms in text_terms)
+            for term in set(tokenize(query))
+        }
+        weights = {
+            term: math.log(1 + len(texts) / df) for term, df in doc_freqs.items() if df
+        }
+        total = sum(weights.values())
+        if not total:
+            return np.zeros(len(texts), dtype=np.float32)
+        matched = [
+            sum(w for term, w in weights.items() if term in terms)
+            for terms in text_terms
+        ]
+        return np.array(matched, dtype=np.float32) / total
+
+
+class CrossEncoderScorer(Scorer):
+    """Local cross-encoder on CPU (sentence-transformers), logits mapped to [0, 1]."""
+
+    def __init__(self, model_name: str, batch_size: int = 32):
+        super().__init__()
+        from sentence_transformers import CrossEncoder
+
+        with measure_time("rerank model loading", log):
+            self.model = CrossEncoder(model_name, device="cpu")
+        self.batch_size = batch_size
+
+    def score(self, query: str, texts: list[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        logits = self.model.predict(
+            [(query, text) for text in texts], batch_size=self.batch_size
+        )
+        return 1 / (1 + np.exp(-np.asarray(logits, dtype=np.float32)))
+
+
+class Reranker:
+    """
+    Keeps the `top_n` best-scoring candidates with a score of at least
+    `min_score`, and the single best one when none reaches it. With several
+    sub-queries a candidate scores its best match over them.
+    """
+
+    def __init__(self, scorer: Scorer, top_n: int, min_score: float):
+        self.scorer = scorer
+        self.top_n = top_n
+        self.min_score = min_score
+
+    def rerank(
+        self, queries: list[str], docs: list[Document]
+    ) -> tuple[list[Document], dict]:
+        if not docs:
+            return docs, {"candidates": 0, "kept": 0, "prompt_tokens_saved": 0}
+
+        texts = [doc.page_content for doc in docs]
+        scores = np.max([self.scorer.score(q, texts) for q in queries], axis=0)
+        order = np.argsort(-scores, kind="stable")[: self.top_n]
+        kept = [i for i in order if scores[i] >= self.min_score] or [order[0]]
+        kept_set = set(kept)
+        report = {
+            "candidates": len(docs),
+            "kept": len(kept),
+            "prompt_tokens_saved": sum(
+                estimate_tokens(text)
+                for i, text in enumerate(texts)
+                if i not in kept_set
+            ),
+        }
+        return [docs[i] for i in kept], report
+
+
+@lru_cache(maxsize=1)
+def get_reranker() -> Reranker:
+    """Process-wide reranker built from `RERANK_*` settings."""
+    if config.RERANK_SCORER == "lexical":
+        scorer = LexicalOverlapScorer()
+    elif config.RERANK_SCORER == "cross_encoder":
+        scorer = CrossEncoderScorer(
+            config.RERANK_MODEL_NAME, batch_size=config.RERANK_BATCH_SIZE
+        )
+    else:
+        raise ValueError(f"Wrong rerank scorer: {config.RERANK_SCORER}")
+    return Reranker(
+        scorer, top_n=config.RERANK_TOP_N, min_score=config.RERANK_MIN_SCORE
+    )
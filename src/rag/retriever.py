@@ -1,10 +1,197 @@
 from abc import ABC, abstractmethod
 
-# from langchain.retrievers.ensemble import EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.runnables.config import run_in_executor
 from src.rag.vector_stores import load_vector_store
+from src.rag.fusion import reciprocal_rank_fusion, weighted_score_fusion
+from src.common.bm25_index import BM25Index
 from src.common import config
 from src.common.logger import log
+from typing import Any
+import asyncio
+
+
+def build_metadata_filter(metadata: dict) -> dict | None:
+    """
+    Convert request metadata into a Chroma `where` filter.
+
+    Empty values are ignored, a single key is passed as-is and multiple keys are
+    combined with `$and`. Returns None when no filter applies.
+    """
+    conditions = [{k: v} for k, v in (metadata or {}).items() if v]
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
+
+
+class BatchVectorStoreRetriever(VectorStoreRetriever):
+    """
+    VectorStoreRetriever that can retrieve several queries with one batched
+    embedding call and one multi-vector store search. The async paths await the
+    embedding client natively and only hand the local search to a thread.
+    """
+
+    def retrieve_many(self, queries: list[str]) -> list[list[Document]]:
+        """Retrieved documents for each query, in query order."""
+        embeddings = self.vectorstore.embeddings.embed_documents(queries)
+        return self.vectorstore.similarity_search_by_vectors(
+            embeddings, **self.search_kwargs
+        )
+
+    async def aretrieve_many(self, queries: list[str]) -> list[list[Document]]:
+        """Async version of `retrieve_many`."""
+        embeddings = await self.vectorstore.embeddings.aembed_documents(queries)
+        return await run_in_executor(
+            None,
+            self.vectorstore.similarity_search_by_vectors,
+            embeddings,
+            **self.search_kwargs,
+        )
+
+    def retrieve_many_with_scores(
+        self, queries: list[str]
+    ) -> list[list[tuple[Document, float]]]:
+        """`(document, score)` for each query, higher scores are more similar."""
+        embeddings = self.vectorstore.embeddings.embed_documents(queries)
+        return self.vectorstore.similarity_search_by_vectors_with_scores(
+            embeddings, **self.search_kwargs
+        )
+
+    async def aretrieve_many_with_scores(
+        self, queries: list[str]
+    ) -> list[list[tuple[Document, float]]]:
+        """Async version of `retrieve_many_with_scores`."""
+        embeddings = await self.vectorstore.embeddings.aembed_documents(queries)
+        return await run_in_executor(
+            None,
+            self.vectorstore.similarity_search_by_vectors_with_scores,
+            embeddings,
+            **self.search_kwargs,
+        )
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        embedding = await self.vectorstore.embeddings.aembed_query(query)
+        return await run_in_executor(
+            None,
+            self.vectorstore.similarity_search_by_vector,
+            embedding,
+            **self.search_kwargs,
+        )
+
+
+class SparseIndexRetriever(BaseRetriever):
+    """
+    BM25 retriever over the persisted inverted index. The index only holds
+    chunk ids, the chunks themselves are read back from the vector store.
+    """
+
+    index: Any
+    vectorstore: Any
+    k: int = 3
+    filter: dict | None = None
+
+    def retrieve_many_with_scores(
+        self, queries: list[str]
+    ) -> list[list[tuple[Document, float]]]:
+        """`(document, BM25 score)` for each query, best first."""
+        hits = self.index.search_many(queries, self.k, self.filter)
+        ids = list(dict.fromkeys(doc_id for result in hits for doc_id, _ in result))
+        by_id = {doc.id: doc for doc in self.vectorstore.get_by_ids(ids)}
+        return [
+            [(by_id[doc_id], score) for doc_id, score in query_hits if doc_id in by_id]
+            for query_hits in hits
+        ]
+
+    def retrieve_many(self, queries: list[str]) -> list[list[Document]]:
+        return [
+            [doc for doc, _ in hits] for hits in self.retrieve_many_with_scores(queries)
+        ]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.retrieve_many([query])[0]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Dense and BM25 retrieval fused with weighted reciprocal rank, or with
+    `method="weighted"` a weighted sum of their min-max normalized scores.
+    Exposes the same batched `retrieve_many` / `aretrieve_many` as the dense
+    retriever.
+    """
+
+    dense_retriever: BatchVectorStoreRetriever
+    sparse_retriever: SparseIndexRetriever
+    weights: list[float]
+    c: int = 60
+    method: str = "rrf"
+
+    @property
+    def vectorstore(self):
+        return self.dense_retriever.vectorstore
+
+    def _fuse(self, dense, sparse) -> list[list[Document]]:
+        if self.method == "weighted":
+            return [
+                [
+                    doc
+                    for doc, _ in weighted_score_fusion(
+                        [[doc for doc, _ in d], [doc for doc, _ in s]],
+                        [[score for _, score in d], [score for _, score in s]],
+                        self.weights,
+                    )
+                ]
+                for d, s in zip(dense, sparse)
+            ]
+        return [
+            [doc for doc, _ in reciprocal_rank_fusion([d, s], self.weights, self.c)]
+            for d, s in zip(dense, sparse)
+        ]
+
+    def retrieve_many(self, queries: list[str]) -> list[list[Document]]:
+        if self.method == "weighted":
+            dense = self.dense_retriever.retrieve_many_with_scores(queries)
+            sparse = self.sparse_retriever.retrieve_many_with_scores(queries)
+        else:
+            dense = self.dense_retriever.retrieve_many(queries)
+            sparse = self.sparse_retriever.retrieve_many(queries)
+        return self._fuse(dense, sparse)
+
+    async def aretrieve_many(self, queries: list[str]) -> list[list[Document]]:
+        if self.method == "weighted":
+            dense, sparse = await asyncio.gather(
+                self.dense_retriever.aretrieve_many_with_scores(queries),
+                run_in_executor(
+                    None, self.sparse_retriever.retrieve_many_with_scores, queries
+                ),
+            )
+        else:
+            dense, sparse = await asyncio.gather(
+                self.dense_retriever.aretrieve_many(queries),
+                run_in_executor(None, self.sparse_retriever.retrieve_many, queries),
+            )
+        return self._fuse(dense, sparse)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.retrieve_many([query])[0]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return (await self.aretrieve_many([query]))[0]
 
 
 class DenseRetriever(ABC):
@@ -21,7 +208,7 @@ class SparseRetriever(ABC):
         pass
 
     @abstractmethod
-    def get_retriever(self):
+    def get_retriever(self, metadata, index, vector_store):
         return
 
 
@@ -30,11 +217,17 @@ class ChromaRetriever(DenseRetriever):
         super().__init__()
 
     def get_retriever(self, metadata, vector_store):
-        """TODO: For now metadata is only working for filename or single key-value. Need to fix for multiple."""
-        retriever = vector_store.as_retriever(
+        """Per-request view over the shared vector store; the filter is only a search argument."""
+        retriever = BatchVectorStoreRetriever(
+            vectorstore=vector_store,
             search_kwargs={
-                "k": config.DENSE_RETRIEVED_DOCUMENTS,
-                "filter": metadata,
+                # over-fetch, the rerank stage trims the candidates
+                "k": (
+                    config.RERANK_CANDIDATES
+                    if config.RERANK_ENABLED
+                    else config.DENSE_RETRIEVED_DOCUMENTS
+                ),
+                "filter": build_metadata_filter(metadata),
             },
         )
         return retriever
@@ -44,36 +237,63 @@ class Bm25Retriever(SparseRetriever):
     def __init__(self):
         super().__init__()
 
-    def get_retriever(self, documents):
-        retriever = BM25Retriever.from_documents(
-            documents,
-            k=config.SPARSE_RETRIEVED_DOCUMENTS,
+    def get_retriever(self, metadata, index, vector_store):
+        """Per-request view over the shared BM25 index built at ingestion."""
+        retriever = SparseIndexRetriever(
+            index=index,
+            vectorstore=vector_store,
+            # over-fetch like the dense side, the rerank stage trims the candidates
+            k=(
+                config.RERANK_CANDIDATES
+                if config.RERANK_ENABLED
+                else config.SPARSE_RETRIEVED_DOCUMENTS
+            ),
+            filter=build_metadata_filter(metadata),
         )
         return retriever
 
 
-def create_ensemble_retriever(metadata: dict) -> ChromaRetriever:
+def load_sparse_index() -> BM25Index:
+    """Open the persisted BM25 index, its arrays are memory-mapped."""
+    log.info(f"Loading BM25 index from {config.BM25_INDEX_DIRECTORY}...")
+    return BM25Index.load(config.BM25_INDEX_DIRECTORY)
+
+
+def create_ensemble_retriever(
+    metadata: dict, vector_store=None, sparse_index=None
+) -> HybridRetriever | BatchVectorStoreRetriever:
     """
-    Creates and returns an EnsembleRetriever combining a dense and a sparse retriever.
+    Creates and returns a retriever fusing dense and BM25 results.
 
     Args:
-        vectorstore: The Chroma vector store for dense retrieval.
-        documents: The list of documents for initializing the sparse retriever.
-        weights: A list of two floats to weigh the dense and sparse retrievers.
+        metadata: Request metadata, applied as a search filter.
+        vector_store: Shared vector store opened once per process. When omitted,
+            a new store is loaded (slow path, kept for scripts and notebooks).
+        sparse_index: Shared BM25 index. When omitted, only dense retrieval
+            is used.
 
     Returns:
-        An configured EnsembleRetriever.
+        A HybridRetriever, or the dense retriever alone without a sparse index.
     """
-    # TODO: update sparse retriver
-    # sparse_retriever = Bm25Retriever().get_retriever(documents=load_reviews_documents())
+    if vector_store is None:
+        vector_store = load_vector_store()
+
     dense_retriever = ChromaRetriever().get_retriever(
-        metadata, vector_store=load_vector_store()
+        metadata, vector_store=vector_store
     )
+    if sparse_index is None:
+        log.debug("No sparse index, using the dense retriever only.")
+        return dense_retriever
 
-    # ensemble_retriever = EnsembleRetriever(
-    #     retrievers=[dense_retriever, sparse_retriever],
-    #     weights=config.ENSEMBLE_RETRIEVER_WEIGHTS,
-    # )
-
-    log.info("Ensemble retriever created successfully.")
-    return dense_retriever
+    sparse_retriever = Bm25Retriever().get_retriever(
+        metadata, index=sparse_index, vector_store=vector_store
+    )
+    ensemble_retriever = HybridRetriever(
+        dense_retriever=dense_retriever,
+        sparse_retriever=sparse_retriever,
+        weights=config.ENSEMBLE_RETRIEVER_WEIGHTS,
+        c=config.RRF_CONSTANT,
+        method=config.HYBRID_FUSION_METHOD,
+    )
+    log.debug("Ensemble retriever created successfully.")
+    return ensemble_retriever
@@ -13,10 +13,12 @@ class RFPInputState(TypedDict):
     TypedDict for LangGraph input.
     - `user_query` is required
     - `metadata` is optional
+    - `reasoning_mode` is optional: "inline", "background" or "skip"
     """
 
     user_query: str
     metadata: MetadataSchema
+    reasoning_mode: Optional[str]
 
 
 class RFPOutputState(TypedDict):
@@ -29,3 +31,18 @@ class RFPOutputState(TypedDict):
     answer: str
     reasoning: str
     extracted_requirements: list[str]
+    reasoning_job_id: Optional[str]
+    context_stats: Optional[dict]
+
+
+class RFPState(RFPInputState, RFPOutputState):
+    """
+    TypedDict for the internal LangGraph state.
+    - `route` is the node chosen by the router
+    - `prefetched` holds speculatively retrieved documents
+    - `cached_response` holds an answer served from the answer cache
+    """
+
+    route: str
+    prefetched: Optional[dict]
+    cached_response: Optional[dict]
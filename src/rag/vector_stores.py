@@ -3,10 +3,336 @@ from src.common import config
 from src.common.logger import log
 from src.common.utils import measure_time
 from langchain_community.vectorstores import Chroma
+from langchain_core.vectorstores import VectorStore
+from langchain_core.embeddings import Embeddings
+from langchain_core.documents import Document
+from src.common.flat_index import FlatIndex
+from src.common.metadata_index import MetadataIndex
+from src.common.metadata_table import expand_member_files
+from src.common.shards import read_shard_manifest, filter_file_names
+from concurrent.futures import ThreadPoolExecutor
 from src.rag.embeddings import get_embeddings_obj
+import numpy as np
+import heapq
 import os
 
 
+class RfpChroma(Chroma):
+    """
+    Chroma store that can search several query vectors in one collection query.
+    With a `metadata_index`, filters are resolved to candidate chunk ids first
+    and the search is restricted to them.
+    """
+
+    metadata_index: MetadataIndex | None = None
+
+    def _search_scope(self, filter: dict | None) -> dict | None:
+        """Query arguments restricting the search to the chunks matching `filter`."""
+        if not filter:
+            return {}
+        if self.metadata_index is not None:
+            ids = self.metadata_index.candidate_ids(filter)
+            if len(ids) <= config.METADATA_PREFILTER_MAX_IDS:
+                return {"ids": ids} if ids else None
+        return {"where": expand_member_files(filter)}
+
+    def similarity_search_by_vectors_with_distances(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[tuple[Document, float]]]:
+        """Top-k `(document, distance)` for each query vector, nearest first."""
+        scope = self._search_scope(filter)
+        if scope is None:
+            # nothing matches the filter
+            return [[] for _ in embeddings]
+        if "ids" in scope:
+            k = min(k, len(scope["ids"]))
+        results = self._collection.query(
+            query_embeddings=embeddings,
+            n_results=k,
+            include=["documents", "metadatas", "distances"],
+            **scope,
+        )
+        return [
+            [
+                (
+                    Document(id=doc_id, page_content=text, metadata=metadata or {}),
+                    distance,
+                )
+                for doc_id, text, metadata, distance in zip(
+                    ids, texts, metadatas, distances
+                )
+            ]
+            for ids, texts, metadatas, distances in zip(
+                results["ids"],
+                results["documents"],
+                results["metadatas"],
+                results["distances"],
+            )
+        ]
+
+    def similarity_search_by_vectors_with_scores(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[tuple[Document, float]]]:
+        """Top-k `(document, score)` for each query vector, the negated distance."""
+        return [
+            [(doc, -distance) for doc, distance in hits]
+            for hits in self.similarity_search_by_vectors_with_distances(
+                embeddings, k, filter
+            )
+        ]
+
+    def similarity_search_by_vectors(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[Document]]:
+        """Top-k documents for each query vector, with the chunk id set on each."""
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_by_vectors_with_distances(
+                embeddings, k, filter
+            )
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[Document]:
+        return self.similarity_search_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[Document]:
+        embedding = self.embeddings.embed_query(query)
+        return self.similarity_search_by_vector(embedding, k, filter)
+
+    def get_by_ids(self, ids: list[str]) -> list[Document]:
+        """Stored chunks with the given ids, in `ids` order; unknown ids are skipped."""
+        if not ids:
+            return []
+        results = self._collection.get(
+            ids=list(ids), include=["documents", "metadatas"]
+        )
+        by_id = {
+            doc_id: Document(id=doc_id, page_content=text, metadata=metadata or {})
+            for doc_id, text, metadata in zip(
+                results["ids"], results["documents"], results["metadatas"]
+            )
+        }
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    def get_embeddings(self, ids: list[str]) -> np.ndarray:
+        """Stored vectors of the given ids as a matrix, one row per id."""
+        results = self._collection.get(ids=list(ids), include=["embeddings"])
+        by_id = dict(zip(results["ids"], results["embeddings"]))
+        return np.asarray([by_id[doc_id] for doc_id in ids], dtype=np.float32)
+
+
+class RfpFlatStore(VectorStore):
+    """
+    Read-only LangChain vector store over a `FlatIndex`. Search is an exact
+    scan of the memory-mapped embedding matrix, with the same batched API and
+    metadata filters as `RfpChroma`. The index is rebuilt by ingestion.
+    """
+
+    def __init__(
+        self,
+        index: FlatIndex,
+        embedding_function: Embeddings,
+        rescore_factor: int = 4,
+    ):
+        self.index = index
+        self._embedding_function = embedding_function
+        self.rescore_factor = rescore_factor
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def _document(self, position: int) -> Document:
+        return Document(
+            id=self.index.ids[position],
+            page_content=self.index.texts[position],
+            metadata=self.index.metadata.row(position),
+        )
+
+    def similarity_search_by_vectors_with_scores(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[tuple[Document, float]]]:
+        """Top-k `(document, cosine similarity)` for each query vector."""
+        return [
+            [(self._document(position), score) for position, score in hits]
+            for hits in self.index.search(
+                embeddings, k, filter, rescore_factor=self.rescore_factor
+            )
+        ]
+
+    def similarity_search_by_vectors(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[Document]]:
+        """Top-k documents for each query vector, with the chunk id set on each."""
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_by_vectors_with_scores(
+                embeddings, k, filter
+            )
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[Document]:
+        return self.similarity_search_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[tuple[Document, float]]:
+        embedding = self.embeddings.embed_query(query)
+        return [
+            (self._document(position), score)
+            for position, score in self.index.search(
+                embedding, k, filter, rescore_factor=self.rescore_factor
+            )[0]
+        ]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[Document]:
+        embedding = self.embeddings.embed_query(query)
+        return self.similarity_search_by_vector(embedding, k, filter)
+
+    def _select_relevance_score_fn(self):
+        # scores are already cosine similarities
+        return lambda score: score
+
+    def get_by_ids(self, ids: list[str]) -> list[Document]:
+        """Stored chunks with the given ids, in `ids` order; unknown ids are skipped."""
+        positions = self.index.positions
+        return [self._document(positions[i]) for i in ids if i in positions]
+
+    def get_embeddings(self, ids: list[str]) -> np.ndarray:
+        """Stored vectors of the given ids as a matrix, one row per id."""
+        rows = [self.index.positions[doc_id] for doc_id in ids]
+        return np.asarray(self.index.embeddings[rows], dtype=np.float32)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("The flat index is rebuilt by ingestion.")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("The flat index is built by ingestion.")
+
+
+class ShardedChromaStore(VectorStore):
+    """
+    One `RfpChroma` collection per RFP file. A filter naming files only
+    searches their shards; other searches fan out to every shard on a thread
+    pool and the per-shard top-k are merged by distance.
+    """
+
+    def __init__(
+        self,
+        shards: dict[str, RfpChroma],
+        embedding_function: Embeddings,
+        max_workers: int = 8,
+    ):
+        self.shards = shards
+        self._embedding_function = embedding_function
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="shard-search"
+        )
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def _route(self, filter: dict | None) -> list[RfpChroma]:
+        """Shards that can hold chunks matching `filter`."""
+        file_names = filter_file_names(filter)
+        if file_names is None:
+            return list(self.shards.values())
+        return [self.shards[name] for name in file_names if name in self.shards]
+
+    def _map(self, shards: list[RfpChroma], func) -> list:
+        if len(shards) == 1:
+            return [func(shards[0])]
+        return list(self.executor.map(func, shards))
+
+    def similarity_search_by_vectors_with_scores(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[tuple[Document, float]]]:
+        """Top-k `(document, score)` for each query vector, the negated distance."""
+        shards = self._route(filter)
+        if len(shards) == 1:
+            return shards[0].similarity_search_by_vectors_with_scores(
+                embeddings, k, filter
+            )
+        per_shard = self._map(
+            shards,
+            lambda shard: shard.similarity_search_by_vectors_with_scores(
+                embeddings, k, filter
+            ),
+        )
+        return [
+            heapq.nlargest(
+                k,
+                (hit for hits in shard_hits for hit in hits),
+                key=lambda hit: hit[1],
+            )
+            for shard_hits in zip(*per_shard)
+        ] or [[] for _ in embeddings]
+
+    def similarity_search_by_vectors(
+        self, embeddings: list[list[float]], k: int = 4, filter: dict | None = None
+    ) -> list[list[Document]]:
+        """Top-k documents for each query vector, with the chunk id set on each."""
+        return [
+            [doc for doc, _ in hits]
+            for hits in self.similarity_search_by_vectors_with_scores(
+                embeddings, k, filter
+            )
+        ]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[Document]:
+        return self.similarity_search_by_vectors([embedding], k, filter)[0]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs
+    ) -> list[Document]:
+        embedding = self.embeddings.embed_query(query)
+        return self.similarity_search_by_vector(embedding, k, filter)
+
+    def get_by_ids(self, ids: list[str]) -> list[Document]:
+        """Stored chunks with the given ids, in `ids` order; unknown ids are skipped."""
+        if not ids:
+            return []
+        by_id = {
+            doc.id: doc
+            for docs in self._map(
+                list(self.shards.values()), lambda shard: shard.get_by_ids(ids)
+            )
+            for doc in docs
+        }
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    def get_embeddings(self, ids: list[str]) -> np.ndarray:
+        """Stored vectors of the given ids as a matrix, one row per id."""
+
+        def shard_embeddings(shard: RfpChroma) -> dict:
+            results = shard._collection.get(ids=list(ids), include=["embeddings"])
+            return dict(zip(results["ids"], results["embeddings"]))
+
+        by_id = {}
+        for found in self._map(list(self.shards.values()), shard_embeddings):
+            by_id.update(found)
+        return np.asarray([by_id[doc_id] for doc_id in ids], dtype=np.float32)
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        raise NotImplementedError("Shards are rebuilt by ingestion.")
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        raise NotImplementedError("Shards are built by ingestion.")
+
+
 class VectorStores(ABC):
     def __init__(self):
         super().__init__()
@@ -30,19 +356,91 @@ class ChromaVectorStore(VectorStores):
         try:
             log.info(f"Loading vector store from {config.DB_PERSIST_DIRECTORY}...")
             with measure_time("vector db instance", log):
-                vector_store = Chroma(
+                vector_store = RfpChroma(
                     persist_directory=config.DB_PERSIST_DIRECTORY,
                     embedding_function=embeddings,
                 )
-                return vector_store
+            try:
+                vector_store.metadata_index = MetadataIndex.load(
+                    config.METADATA_INDEX_DIRECTORY
+                )
+            except FileNotFoundError as e:
+                log.warning(f"{e} Filters are passed to Chroma as `where`.")
+            return vector_store
         except Exception as e:
             log.error(f"Failed to load the Chroma Vector store: {e}")
             raise
 
 
-def load_vector_store(store_type="chroma"):
-    if store_type:
-        vector_store = ChromaVectorStore().load(embeddings=get_embeddings_obj())
-    else:
+class FlatVectorStore(VectorStores):
+    def __init__(self):
+        super().__init__()
+
+    def load(self, embeddings):
+        try:
+            log.info(f"Loading flat vector index from {config.FLAT_INDEX_DIRECTORY}...")
+            with measure_time("flat vector index instance", log):
+                index = FlatIndex.load(config.FLAT_INDEX_DIRECTORY)
+                kind = index.quantized.kind if index.quantized else None
+                return RfpFlatStore(
+                    index,
+                    embedding_function=embeddings,
+                    rescore_factor=config.FLAT_RESCORE_FACTORS.get(kind, 4),
+                )
+        except Exception as e:
+            log.error(f"Failed to load the flat vector index: {e}")
+            raise
+
+
+class ShardedChromaVectorStore(VectorStores):
+    def __init__(self):
+        super().__init__()
+
+    def load(self, embeddings):
+        try:
+            manifest = read_shard_manifest(config.DB_PERSIST_DIRECTORY)
+            log.info(
+                f"Loading {len(manifest)} vector store shards from "
+                f"{config.DB_PERSIST_DIRECTORY}..."
+            )
+            with measure_time("sharded vector db instance", log):
+                shards = {
+                    file_name: RfpChroma(
+                        collection_name=collection_name,
+                        persist_directory=config.DB_PERSIST_DIRECTORY,
+                        embedding_function=embeddings,
+                    )
+                    for file_name, collection_name in manifest.items()
+                }
+            try:
+                metadata_index = MetadataIndex.load(config.METADATA_INDEX_DIRECTORY)
+                for file_name, shard in shards.items():
+                    # candidate ids of the shard's own chunks only
+                    shard.metadata_index = metadata_index.restrict(
+                        {"file_name": file_name}
+                    )
+            except FileNotFoundError as e:
+                log.warning(f"{e} Filters are passed to Chroma as `where`.")
+            return ShardedChromaStore(
+                shards,
+                embedding_function=embeddings,
+                max_workers=config.SHARD_SEARCH_WORKERS,
+            )
+        except Exception as e:
+            log.error(f"Failed to load the sharded Chroma vector store: {e}")
+            raise
+
+
+VECTOR_STORES = {
+    "chroma": ChromaVectorStore,
+    "flat": FlatVectorStore,
+    "sharded_chroma": ShardedChromaVectorStore,
+}
+
+
+def load_vector_store(store_type=None):
+    """Open the vector store of `store_type`, `VECTOR_STORE_TYPE` by default."""
+    store_type = store_type or config.VECTOR_STORE_TYPE
+    if store_type not in VECTOR_STORES:
         raise ValueError(f"Unknown vector store type: {store_type}")
-    return vector_store
+    return VECTOR_STORES[store_type]().load(embeddings=get_embeddings_obj())